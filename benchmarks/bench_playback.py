@@ -0,0 +1,82 @@
+# Drives the playback state machine (PlayQueue + a PlaybackBackend) with a simulated
+# backend: random seeks, repeat / shuffle changes, playlist switches and injected
+# open / seek failures, while checking that every transition goes where peek_next()
+# said it would. No audio and no UI.
+#
+#   python benchmarks/bench_playback.py --transitions 100000 --tracks 100000
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.play_queue import PlayQueue
+from core.playback_backend import ENDED, ERROR
+from core.simulated_backend import SimulatedBackend, VirtualClock
+
+
+def run(transitions, track_count, seed, fail_rate, seek_fail_rate):
+    rng = random.Random(seed)
+    tracks = [f"track{i:06d}.mp3" for i in range(track_count)]
+    lengths = {track: rng.randrange(500, 10000) for track in tracks}
+    clock = VirtualClock()
+    backend = SimulatedBackend(
+        clock, lengths=lengths, open_delay_ms=15, fail_rate=fail_rate, seek_fail_rate=seek_fail_rate, seed=seed
+    )
+    queue = PlayQueue(tracks, rng=random.Random(seed))
+    queue.play_library(0)
+    backend.play_song(queue.current())
+    done = cycles = playlists = 0
+    started = time.perf_counter()
+    while done < transitions:
+        action = rng.random()
+        if action < 0.02:
+            queue.cycle_repeat()
+            cycles += 1
+        elif action < 0.04:
+            queue.toggle_shuffle()
+            cycles += 1
+        elif action < 0.05:
+            queue.play_playlist("bench", rng.sample(tracks, min(20, track_count)), 0)
+            backend.play_song(queue.current())
+            playlists += 1
+        elif action < 0.06:
+            queue.play_library(rng.randrange(track_count))
+            backend.play_song(queue.current())
+        elif action < 0.4:
+            length = backend.get_length()
+            if length > 0:
+                backend.set_time(rng.randrange(length))
+        clock.advance(rng.randrange(0, 1500))
+        if backend.get_state() in (ENDED, ERROR):
+            expected = queue.peek_next()
+            repeat_mode = queue.repeat_mode
+            current = queue.current()
+            song = queue.advance()
+            assert song == expected, (song, expected)
+            if repeat_mode != "none" and queue.playlist is None:
+                assert song == current
+            backend.play_song(song)
+            done += 1
+    elapsed = time.perf_counter() - started
+    return elapsed, backend.stats, cycles, playlists
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the playback state machine")
+    parser.add_argument("--transitions", type=int, default=50000)
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fail-rate", type=float, default=0.01)
+    parser.add_argument("--seek-fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    elapsed, stats, cycles, playlists = run(args.transitions, args.tracks, args.seed, args.fail_rate, args.seek_fail_rate)
+    print(f"{args.transitions} transitions in {elapsed:.2f}s ({args.transitions / elapsed:,.0f}/s)")
+    print(f"seeks: {stats['seeks']} ({stats['failed_seeks']} failed), open errors: {stats['errors']}, "
+          f"repeat/shuffle changes: {cycles}, playlist switches: {playlists}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# Soak test: drives the whole player offscreen (SimulatedBackend, no audio) through
+# many view switches, searches, sort changes, favorites / playlist edits and track
+# changes, sampling RSS, traced Python memory, live Python objects, Qt objects and
+# open file descriptors as it goes. Fails (exit code 1) when any of them keeps
+# growing after the warm-up.
+#
+#   python benchmarks/soak.py --iterations 300000 --tracks 500
+#
+# Runs in a temporary directory: favorites / playlists / settings / caches of the
+# real installation are never touched.
+import os
+import gc
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+import wave
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Soak-test the player for memory and handle leaks")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--tracks", type=int, default=500)
+    parser.add_argument("--sample-every", type=int, default=2000)
+    parser.add_argument("--warmup", type=float, default=0.2, help="share of the samples ignored at the start")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="directory for the generated library (default: a temporary one)")
+    parser.add_argument("--csv", help="also write every sample to this file")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=32)
+    parser.add_argument("--max-traced-growth-mb", type=float, default=8)
+    parser.add_argument("--max-object-growth", type=int, default=20000)
+    parser.add_argument("--max-qt-growth", type=int, default=100)
+    parser.add_argument("--max-fd-growth", type=int, default=8)
+    return parser.parse_args()
+
+
+def make_library(songs_dir, count, rng):
+    # Tiny WAV files under a few nested folders, with names that searches can hit
+    words = ("love", "night", "שיר", "אהבה", "blue", "road", "live", "דרך", "rain", "summer")
+    for i in range(count):
+        folder = os.path.join(songs_dir, f"artist{i % 17}") if i % 3 else songs_dir
+        os.makedirs(folder, exist_ok=True)
+        name = f"{rng.choice(words)} {rng.choice(words)} {i:05d}.wav"
+        with wave.open(os.path.join(folder, name), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(b"\0\0" * 800)
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Peak rather than current RSS where /proc is not available (ru_maxrss: kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def open_fds():
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return 0
+
+
+def sustained_growth(values, warmup):
+    # Growth between the first and last quarter of the post-warm-up samples, counted
+    # only when the quarter medians never go down (a one-off step or noise is not a leak)
+    values = values[int(len(values) * warmup):]
+    if len(values) < 8:
+        return 0
+    quarter = len(values) // 4
+    medians = [statistics.median(values[i * quarter:(i + 1) * quarter]) for i in range(4)]
+    if all(later >= earlier for earlier, later in zip(medians, medians[1:])):
+        return medians[-1] - medians[0]
+    return 0
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="player-soak-")
+    # The app keeps its files next to sys.path[0]; point that at the work directory
+    sys.path[0] = workdir
+    sys.path.insert(1, REPO)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    songs_dir = os.path.join(workdir, "songs")
+    if not os.path.isdir(songs_dir):
+        make_library(songs_dir, args.tracks, rng)
+    with open(os.path.join(workdir, "settings.json"), "w", encoding="utf-8") as f:
+        f.write('{"visualizer": false}')
+
+    from PyQt6.QtCore import Qt, QCoreApplication, QEvent, QObject
+    from PyQt6.QtWidgets import QApplication
+    from core.simulated_backend import SimulatedBackend, VirtualClock
+    from core.playback_backend import ENDED
+    from widgets.player.main_player import MusicPlayer
+
+    app = QApplication([sys.argv[0]])
+    clock = VirtualClock()
+    backend = SimulatedBackend(clock, lengths=lambda path: 4000, open_delay_ms=20, seed=args.seed)
+    player = MusicPlayer(backend=backend)
+    player.show()
+    # Let the scanner deliver the library
+    deadline = time.monotonic() + 30
+    while len(player.songs) < args.tracks and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    for n in range(3):
+        player.playlists_manager.create_playlist(f"soak {n}", rng.sample(player.songs, min(30, len(player.songs))))
+
+    search_words = ("", "love", "שיר", "00", "road", "x", "דרך", "artist", "")
+
+    def view_switch():
+        choice = rng.randrange(7)
+        if choice == 0:
+            player.show_favorites()
+        elif choice == 1:
+            player.show_all_songs()
+        elif choice == 2:
+            player.toggle_playlists_view()
+        elif choice == 3 and player.playlists_list.count():
+            player.show_playlist_songs(player.playlists_list.item(rng.randrange(player.playlists_list.count())))
+        elif choice == 4:
+            player.show_playlists_list()
+        elif choice == 5:
+            player.show_history(rng.choice(("most", "recent", "never")))
+        else:
+            player.load_songs()
+
+    def track_change():
+        choice = rng.randrange(5)
+        if choice == 0:
+            player.next_song()
+        elif choice == 1:
+            player.prev_song()
+        elif choice == 2 and player.song_list.count():
+            item = player.song_list.item(rng.randrange(player.song_list.count()))
+            # Group headers carry no song
+            if item.data(Qt.ItemDataRole.UserRole) is not None:
+                player.song_double_clicked(item)
+        elif choice == 3 and player.playlist_songs_list.count():
+            player.playlist_song_double_clicked(player.playlist_songs_list.item(0))
+        else:
+            player.seek_song(rng.randrange(4000))
+
+    def edit():
+        choice = rng.randrange(5)
+        song = rng.choice(player.songs)
+        if choice == 0:
+            player.favorites_manager.toggle(song)
+        elif choice == 1:
+            player.playlists_manager.add_many_to_playlist([song], f"soak {rng.randrange(3)}")
+        elif choice == 2:
+            player.playlists_manager.remove_many_from_playlist([song], f"soak {rng.randrange(3)}")
+        elif choice == 3:
+            player.sort_combo.setCurrentIndex(rng.randrange(player.sort_combo.count()))
+        else:
+            rng.choice((player.toggle_shuffle, player.toggle_repeat))()
+
+    actions = (
+        (0.40, view_switch),
+        (0.65, lambda: player.search_bar.setText(rng.choice(search_words))),
+        (0.90, track_change),
+        (1.00, edit),
+    )
+
+    tracemalloc.start()
+    samples = []
+    baseline = None
+    warmup_samples = int(args.iterations / args.sample_every * args.warmup)
+    started = time.perf_counter()
+    print(f"soaking {len(player.songs)} tracks for {args.iterations} iterations in {workdir}")
+    print(f"{'iteration':>10} {'seconds':>8} {'rss MB':>8} {'traced MB':>10} {'objects':>9} {'qt':>6} {'fds':>5}")
+    for iteration in range(1, args.iterations + 1):
+        roll = rng.random()
+        for limit, action in actions:
+            if roll < limit:
+                action()
+                break
+        clock.advance(rng.randrange(0, 600))
+        player.update_position()
+        if iteration % 10 == 0:
+            player.update_ui()
+            if backend.get_state() == ENDED:
+                player.next_song()
+        if iteration % 50 == 0:
+            app.processEvents()
+            # deleteLater() objects are only freed by the event loop
+            QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+        if iteration % args.sample_every == 0:
+            gc.collect()
+            sample = (
+                iteration,
+                time.perf_counter() - started,
+                rss_bytes(),
+                tracemalloc.get_traced_memory()[0],
+                len(gc.get_objects()),
+                len(player.findChildren(QObject)) + len(app.allWidgets()),
+                open_fds(),
+            )
+            samples.append(sample)
+            print(f"{sample[0]:>10} {sample[1]:>8.1f} {sample[2] / 2**20:>8.1f} {sample[3] / 2**20:>10.2f} "
+                  f"{sample[4]:>9} {sample[5]:>6} {sample[6]:>5}")
+            if len(samples) == warmup_samples + 1:
+                baseline = tracemalloc.take_snapshot()
+
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8") as f:
+            f.write("iteration,seconds,rss,traced,objects,qt_objects,fds\n")
+            for sample in samples:
+                f.write(",".join(str(value) for value in sample) + "\n")
+
+    limits = (
+        ("RSS", 2, args.max_rss_growth_mb * 2**20, lambda v: f"{v / 2**20:.1f} MB"),
+        ("traced Python memory", 3, args.max_traced_growth_mb * 2**20, lambda v: f"{v / 2**20:.2f} MB"),
+        ("Python objects", 4, args.max_object_growth, lambda v: str(int(v))),
+        ("Qt objects", 5, args.max_qt_growth, lambda v: str(int(v))),
+        ("file descriptors", 6, args.max_fd_growth, lambda v: str(int(v))),
+    )
+    failed = False
+    for name, column, limit, show in limits:
+        growth = sustained_growth([sample[column] for sample in samples], args.warmup)
+        verdict = "FAIL" if growth > limit else "ok"
+        failed = failed or growth > limit
+        print(f"{verdict:>4}  {name}: sustained growth {show(growth)} (limit {show(limit)})")
+    if failed and baseline is not None:
+        print("largest traced allocations since the warm-up:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:10]:
+            print(f"      {stat}")
+    player.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
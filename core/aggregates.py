@@ -0,0 +1,143 @@
+# Totals (tracks, duration, bytes, favorites) of the library, the favorites and every
+# playlist, kept up to date incrementally: an add / remove / metadata or favorite change
+# adjusts only the views the track is in, so showing the totals never reads a file or
+# walks a whole list.
+
+LIBRARY_VIEW = "library"
+FAVORITES_VIEW = "favorites"
+
+
+def playlist_view(name):
+    return "playlist:" + name
+
+
+class ViewTotals:
+    __slots__ = ("tracks", "duration_ms", "unknown", "bytes", "favorites")
+
+    def __init__(self):
+        self.tracks = 0
+        # Sum of the known durations; `unknown` tracks have no duration yet
+        self.duration_ms = 0
+        self.unknown = 0
+        self.bytes = 0
+        self.favorites = 0
+
+
+class Aggregates:
+    # stats_of(track) -> (duration_ms or None, bytes), from cached metadata only
+    # is_favorite(track) -> bool
+    # on_changed() is called when a view's totals change and none were pending before
+    # (take_changed() hands out and clears the pending views)
+    def __init__(self, stats_of, is_favorite, on_changed=None):
+        self.stats_of = stats_of
+        self.is_favorite = is_favorite
+        self.on_changed = on_changed
+        self.views = {}
+        self._members = {}
+        self._views_of = {}
+        # (duration_ms, bytes, favorite) of every tracked track, exactly as counted in its views
+        self._stats = {}
+        self._changed = set()
+
+    def totals(self, view):
+        return self.views.get(view) or ViewTotals()
+
+    def contains(self, view, track):
+        return track in self._members.get(view, ())
+
+    def take_changed(self):
+        changed, self._changed = self._changed, set()
+        return changed
+
+    def _touch(self, view):
+        if not self._changed and self.on_changed:
+            self.on_changed()
+        self._changed.add(view)
+
+    def _apply(self, view, stats, sign):
+        totals = self.views[view]
+        duration, size, favorite = stats
+        totals.tracks += sign
+        if duration is None:
+            totals.unknown += sign
+        else:
+            totals.duration_ms += sign * duration
+        totals.bytes += sign * size
+        totals.favorites += sign * favorite
+        self._touch(view)
+
+    def _stats_for(self, track):
+        stats = self._stats.get(track)
+        if stats is None:
+            stats = self._stats[track] = self.stats_of(track) + (bool(self.is_favorite(track)),)
+        return stats
+
+    def _untrack(self, track, view):
+        views = self._views_of[track]
+        views.discard(view)
+        if not views:
+            del self._views_of[track], self._stats[track]
+
+    def add(self, view, tracks):
+        members = self._members.setdefault(view, set())
+        if view not in self.views:
+            self.views[view] = ViewTotals()
+            self._touch(view)
+        for track in tracks:
+            if track not in members:
+                members.add(track)
+                self._views_of.setdefault(track, set()).add(view)
+                self._apply(view, self._stats_for(track), 1)
+
+    def remove(self, view, tracks):
+        members = self._members.get(view)
+        if not members:
+            return
+        for track in tracks:
+            if track in members:
+                members.discard(track)
+                self._apply(view, self._stats[track], -1)
+                self._untrack(track, view)
+
+    def set_view(self, view, tracks):
+        # Full recount of one view (first build, or after a change that has no delta)
+        self.drop_view(view)
+        self.add(view, tracks)
+
+    def drop_view(self, view):
+        for track in self._members.pop(view, ()):
+            self._untrack(track, view)
+        if self.views.pop(view, None) is not None:
+            self._touch(view)
+
+    def _restat(self, track, stats):
+        old = self._stats[track]
+        if old == stats:
+            return
+        self._stats[track] = stats
+        for view in self._views_of[track]:
+            self._apply(view, old, -1)
+            self._apply(view, stats, 1)
+
+    def update(self, tracks):
+        # The metadata of these tracks changed (tags read, file edited, chapters moved)
+        for track in tracks:
+            old = self._stats.get(track)
+            if old is not None:
+                self._restat(track, self.stats_of(track) + (old[2],))
+
+    def set_favorite(self, tracks, favorite):
+        for track in tracks:
+            old = self._stats.get(track)
+            if old is not None:
+                self._restat(track, old[:2] + (favorite,))
+        if favorite:
+            self.add(FAVORITES_VIEW, tracks)
+        else:
+            self.remove(FAVORITES_VIEW, tracks)
+
+    def forget(self, tracks):
+        # Tracks that left the library leave every view
+        for track in tracks:
+            for view in list(self._views_of.get(track, ())):
+                self.remove(view, [track])
@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+import threading
+from core.library import CACHE_DIR
+from core.id3 import read_embedded_picture
+
+ART_CACHE_DIR = os.path.join(CACHE_DIR, "art")
+FOLDER_IMAGES = ("folder.jpg", "cover.jpg", "front.jpg", "folder.png", "cover.png", "front.png")
+
+
+def find_cover(path):
+    # Embedded ID3 picture first, then a cover image next to the file
+    if path.lower().endswith(".mp3"):
+        image = read_embedded_picture(path)
+        if image:
+            return image
+    directory = os.path.dirname(path)
+    try:
+        names = {name.lower(): name for name in os.listdir(directory)}
+    except OSError:
+        return None
+    for candidate in FOLDER_IMAGES:
+        if candidate in names:
+            try:
+                with open(os.path.join(directory, names[candidate]), "rb") as f:
+                    return f.read()
+            except OSError:
+                continue
+    return None
+
+
+class ArtDiskCache:
+    # Thumbnails are stored once per image content (sha1 of the image bytes) and size,
+    # so every track of an album shares the same files. The index remembers which
+    # image a track has, keyed by (path, mtime), so unchanged files are never re-read.
+    def __init__(self, cache_dir=ART_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.index = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+
+    def lookup(self, path, mtime):
+        # Content hash of the track's art, "" if it has none, None if unknown
+        with self._lock:
+            entry = self.index.get(path)
+        if entry and entry[0] == mtime:
+            return entry[1]
+        return None
+
+    def remember(self, path, mtime, image):
+        content_hash = hashlib.sha1(image).hexdigest() if image else ""
+        with self._lock:
+            self.index[path] = [mtime, content_hash]
+            self._dirty = True
+        return content_hash
+
+    def thumbnail_path(self, content_hash, size):
+        return os.path.join(self.cache_dir, f"{content_hash}_{size}.png")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            index = dict(self.index)
+            self._dirty = False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
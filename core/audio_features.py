@@ -0,0 +1,147 @@
+import os
+import time
+import wave
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:  # Auto-DJ is optional
+    np = None
+
+# Every track is summarised by one short vector computed from a mono segment:
+# tempo, spectral centroid, loudness and the MFCC means
+FEATURE_RATE = 22050
+SEGMENT_START = 30
+SEGMENT_SECONDS = 30
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+MEL_BANDS = 40
+N_MFCC = 13
+FEATURE_NAMES = ("tempo", "centroid", "loudness") + tuple(f"mfcc{i}" for i in range(N_MFCC))
+FEATURE_DIM = len(FEATURE_NAMES)
+DECODE_TIMEOUT = 60
+
+
+def _read_wav(path, start, seconds, rate=FEATURE_RATE):
+    # Mono float32 samples at `rate`, None if the format is not plain PCM
+    with wave.open(path, "rb") as f:
+        width, channels, source_rate = f.getsampwidth(), f.getnchannels(), f.getframerate()
+        if width not in (1, 2, 4):
+            return None
+        if start * source_rate >= f.getnframes():
+            start = 0
+        f.setpos(int(start * source_rate))
+        data = f.readframes(int(seconds * source_rate))
+    if width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+    else:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648
+    samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    if source_rate != rate and len(samples):
+        positions = np.arange(0, len(samples), source_rate / rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+def _decode_with_vlc(path, start, seconds, rate=FEATURE_RATE):
+    # libVLC transcodes the segment to a temporary mono WAV (faster than real time)
+    import vlc
+    fd, tmp_file = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        instance = vlc.Instance("--quiet", "--no-video")
+        media = instance.media_new(
+            path,
+            f":sout=#transcode{{acodec=s16l,channels=1,samplerate={rate}}}"
+            f":std{{access=file,mux=wav,dst='{tmp_file}'}}",
+            f":start-time={start}",
+            f":stop-time={start + seconds}",
+        )
+        player = instance.media_player_new()
+        player.set_media(media)
+        player.play()
+        deadline = time.monotonic() + DECODE_TIMEOUT
+        done = (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped)
+        while player.get_state() not in done and time.monotonic() < deadline:
+            time.sleep(0.05)
+        player.stop()
+        player.release()
+        instance.release()
+        if os.path.getsize(tmp_file) <= 44:
+            return None
+        return _read_wav(tmp_file, 0, seconds, rate)
+    finally:
+        os.remove(tmp_file)
+
+
+def decode_segment(path, start=SEGMENT_START, seconds=SEGMENT_SECONDS):
+    if path.lower().endswith(".wav"):
+        try:
+            samples = _read_wav(path, start, seconds)
+            if samples is not None:
+                return samples
+        except (wave.Error, EOFError):
+            pass
+    samples = _decode_with_vlc(path, start, seconds)
+    if (samples is None or len(samples) < FRAME_SIZE) and start:
+        # Shorter than the offset - take the beginning instead
+        samples = _decode_with_vlc(path, 0, seconds)
+    return samples
+
+
+_mel_cache = {}
+
+
+def _mel_filters(rate, bins):
+    key = (rate, bins)
+    if key not in _mel_cache:
+        to_mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+        to_hz = lambda mel: 700 * (10 ** (mel / 2595) - 1)
+        edges = to_hz(np.linspace(to_mel(20), to_mel(rate / 2), MEL_BANDS + 2))
+        freqs = np.linspace(0, rate / 2, bins)
+        filters = np.zeros((MEL_BANDS, bins), dtype=np.float32)
+        for i in range(MEL_BANDS):
+            low, mid, high = edges[i:i + 3]
+            rising = (freqs - low) / (mid - low)
+            falling = (high - freqs) / (high - mid)
+            filters[i] = np.maximum(0, np.minimum(rising, falling))
+        n = np.arange(MEL_BANDS)
+        dct = np.cos(np.pi / MEL_BANDS * (n + 0.5)[None, :] * np.arange(N_MFCC)[:, None])
+        _mel_cache[key] = (filters, dct.astype(np.float32))
+    return _mel_cache[key]
+
+
+def extract_features(samples, rate=FEATURE_RATE):
+    # Feature vector (FEATURE_DIM floats) of a mono signal, None if it is too short
+    if samples is None or len(samples) < FRAME_SIZE * 2:
+        return None
+    count = 1 + (len(samples) - FRAME_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.as_strided(
+        samples, shape=(count, FRAME_SIZE), strides=(samples.strides[0] * HOP_SIZE, samples.strides[0])
+    )
+    power = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE).astype(np.float32), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1.0 / rate)
+    totals = power.sum(axis=1) + 1e-12
+    centroid = float(np.mean(power @ freqs / totals)) / 1000
+    loudness = float(20 * np.log10(np.sqrt(np.mean(samples ** 2)) + 1e-9))
+    filters, dct = _mel_filters(rate, power.shape[1])
+    log_mel = np.log(power @ filters.T + 1e-10)
+    mfcc = (log_mel @ dct.T).mean(axis=0)
+    # Tempo: strongest autocorrelation lag of the onset envelope within 60-200 BPM
+    onset = np.maximum(0, np.diff(log_mel, axis=0)).sum(axis=1)
+    onset -= onset.mean()
+    autocorr = np.correlate(onset, onset, mode="full")[len(onset) - 1:]
+    frames_per_minute = 60 * rate / HOP_SIZE
+    lags = np.arange(int(frames_per_minute / 200), min(int(frames_per_minute / 60) + 1, len(autocorr)))
+    tempo = frames_per_minute / lags[np.argmax(autocorr[lags])] if len(lags) else 0.0
+    return np.concatenate(([tempo, centroid, loudness], mfcc)).astype(np.float32)
+
+
+def compute_features(path):
+    # Process-pool entry point: decode + extract, None on any failure
+    try:
+        return extract_features(decode_segment(path))
+    except Exception:
+        return None
@@ -0,0 +1,389 @@
+import sys
+import math
+import time
+import heapq
+import threading
+from collections import deque
+from core.playback_backend import PlaybackBackend, OPENING, PLAYING, PAUSED, NOTHING_SPECIAL
+
+# Length of a crossfade between songs when none is given
+CROSSFADE_MS = 4000
+# Pause / resume and seeks fade out and back in this quickly instead of cutting
+PAUSE_FADE_MS = 150
+SEEK_FADE_MS = 60
+# Volume ramps are applied in steps of this length; every step sets the volume the
+# curve has at the moment it runs, so a late step is never a stale one
+RAMP_STEP_MS = 20
+# A thread that wakes up waits for the GIL up to the interpreter's switch interval
+# (5 ms by default) while another thread runs Python code; fades lower it to this
+GIL_SWITCH_INTERVAL = 0.001
+# Volume steps are woken up early by the time getting back onto the CPU and the GIL
+# recently took (at most this much), and wait out the rest while holding the GIL
+MAX_LEAD_MS = 3
+LEAD_DECAY = 0.95
+# How often the position of the playing song is read while it is far from its end
+WATCH_MS = 200
+# How often a deck that is opening a file is polled, and for how long at most
+OPEN_POLL_MS = 5
+OPEN_TIMEOUT_MS = 5000
+FULL_VOLUME = 100
+
+
+class FadeScheduler:
+    # Runs callbacks at perf_counter deadlines on its own thread, which sleeps until the
+    # next deadline, so steps never wait for the UI thread's event loop. How late every
+    # callback ran (ms) is kept in `lateness`.
+    def __init__(self, history=5000):
+        # Otherwise a busy UI thread keeps a due step waiting up to 5 ms for the GIL
+        # (lowering it costs nothing while only one thread wants to run)
+        if sys.getswitchinterval() > GIL_SWITCH_INTERVAL:
+            sys.setswitchinterval(GIL_SWITCH_INTERVAL)
+        # How early timed steps wake up (s): the slowest recent wake-up, decaying
+        self._lead = 0.0
+        self._events = []
+        self._seq = 0
+        self._wake = threading.Condition()
+        self._closed = False
+        self.lateness = deque(maxlen=history)
+        self._thread = threading.Thread(target=self._run, name="crossfade", daemon=True)
+        self._thread.start()
+
+    def at(self, deadline, callback, timed=False):
+        # timed: a step whose lateness is audible (volume ramps); only those are measured
+        with self._wake:
+            self._seq += 1
+            heapq.heappush(self._events, (deadline, self._seq, timed, callback))
+            self._wake.notify()
+
+    def after(self, ms, callback):
+        self.at(time.perf_counter() + ms / 1000, callback)
+
+    def timing(self):
+        # {"steps", "mean_ms", "p99_ms", "max_ms"} of the lateness, None before the first step
+        values = sorted(self.lateness)
+        if not values:
+            return None
+        return {
+            "steps": len(values),
+            "mean_ms": sum(values) / len(values),
+            "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))],
+            "max_ms": values[-1],
+        }
+
+    def shutdown(self):
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._closed:
+                    if not self._events:
+                        self._wake.wait()
+                        continue
+                    deadline, _, timed, _ = self._events[0]
+                    wake_at = deadline - self._lead if timed else deadline
+                    wait = wake_at - time.perf_counter()
+                    if wait <= 0:
+                        break
+                    if not self._wake.wait(wait) and timed:
+                        # Timed out (not a new event): how long getting going again took
+                        woke = time.perf_counter() - wake_at
+                        self._lead = min(MAX_LEAD_MS / 1000, max(woke, self._lead * LEAD_DECAY))
+                if self._closed:
+                    return
+                deadline, _, timed, callback = heapq.heappop(self._events)
+            if timed:
+                # Running now, so holding the GIL: keep it until the step is due
+                while time.perf_counter() < deadline:
+                    pass
+                self.lateness.append((time.perf_counter() - deadline) * 1000)
+            try:
+                callback()
+            except Exception:
+                pass
+
+
+def _shape(progress, rising):
+    # Equal-power curves: the two sides of a crossfade always add up to the same loudness
+    if rising:
+        return math.sin(progress * math.pi / 2)
+    return 1 - math.cos(progress * math.pi / 2)
+
+
+class CrossfadeBackend(PlaybackBackend):
+    # Two players ("decks") of another backend, one of them audible (`active`):
+    # - play_song() while a song plays starts the new one on the other deck and
+    #   crossfades the two
+    # - queue_next() arms the following song: it is started on the idle deck fade_ms
+    #   (plus the measured opening time) before the current one ends, crossfaded, and
+    #   reported with on_started(path)
+    # - pause / resume and seeks ramp the volume out and back in instead of cutting
+    # Volume steps and the start of the next song are timed by a FadeScheduler thread,
+    # never by the UI timers. make_deck() creates one deck (e.g. VLCController).
+    def __init__(self, make_deck, fade_ms=CROSSFADE_MS):
+        self.decks = (make_deck(), make_deck())
+        self.active = self.decks[0]
+        self.fade_ms = fade_ms
+        self.scheduler = FadeScheduler()
+        self._lock = threading.RLock()
+        # The ramp currently allowed to change a deck's volume (a newer one replaces it)
+        self._ramps = {}
+        self._volume = {}
+        self._paused = False
+        self._seeking = False
+        self._seek_to = 0
+        self._next = None
+        self._watch = 0
+        self._auto_started = None
+        # Average time from opening a file to hearing it; the next song is started this much earlier
+        self._open_latency_ms = 0
+        self.stats = {"crossfades": 0, "queued_starts": 0}
+
+    def _other(self, deck):
+        return self.decks[1] if deck is self.decks[0] else self.decks[0]
+
+    def _set_volume(self, deck, volume):
+        self._volume[deck] = volume
+        deck.set_volume(round(volume))
+
+    def _ramp(self, deck, target, ms, then=None):
+        # Move deck's volume to target over ms; then() runs after the last step unless
+        # another ramp of the same deck took over
+        token = object()
+        with self._lock:
+            self._ramps[deck] = token
+            start = self._volume.get(deck, FULL_VOLUME)
+        steps = max(1, int(ms // RAMP_STEP_MS))
+        began = time.perf_counter()
+
+        def step(n):
+            with self._lock:
+                if self._ramps.get(deck) is not token:
+                    return
+                # Where the curve is now, not where step n was meant to be
+                progress = 1 if n == steps else min(1, (time.perf_counter() - began) * 1000 / ms)
+                self._set_volume(deck, start + (target - start) * _shape(progress, target > start))
+                if n < steps:
+                    self.scheduler.at(began + (n + 1) * ms / steps / 1000, lambda: step(n + 1), timed=True)
+                    return
+                del self._ramps[deck]
+                if then is not None:
+                    then()
+
+        self.scheduler.at(began, lambda: step(0), timed=True)
+
+    def _cancel_ramp(self, deck):
+        # The cancelled ramp notices at its next step
+        self._ramps.pop(deck, None)
+
+    def _crossfade(self, old, new, end_ms=None):
+        # Fade new in and old out; both ramps start once new is audible (opening a file takes a moment)
+        opened = time.perf_counter()
+        self.stats["crossfades"] += 1
+
+        def wait_until_playing():
+            with self._lock:
+                if self.active is not new:
+                    return
+                state = new.get_state()
+                waited = (time.perf_counter() - opened) * 1000
+                if state in (NOTHING_SPECIAL, OPENING) and waited < OPEN_TIMEOUT_MS:
+                    self.scheduler.after(OPEN_POLL_MS, wait_until_playing)
+                    return
+                if state != PLAYING:
+                    # Unplayable: no fade, the error surfaces through get_state()
+                    old.stop()
+                    self._set_volume(new, FULL_VOLUME)
+                    return
+                self._open_latency_ms += (waited - self._open_latency_ms) / 4
+                out_ms = self.fade_ms
+                if old.get_state() == PLAYING:
+                    end = end_ms if end_ms is not None else old.get_length()
+                    remaining = end - old.get_time()
+                    if 0 < remaining < out_ms:
+                        out_ms = remaining
+                else:
+                    out_ms = 0
+                self._ramp(new, FULL_VOLUME, self.fade_ms)
+                if out_ms:
+                    self._ramp(old, 0, out_ms, then=lambda: self._stop_faded(old))
+                else:
+                    self._cancel_ramp(old)
+                    old.stop()
+
+        wait_until_playing()
+
+    def _stop_faded(self, deck):
+        if deck is not self.active:
+            deck.stop()
+
+    def _open(self, path, start_ms, fade):
+        # Start path on the idle deck (silent if it is going to fade in); returns the old deck
+        old = self.active
+        new = self._other(old)
+        self._cancel_ramp(new)
+        self._set_volume(new, 0 if fade else FULL_VOLUME)
+        new.play_song(path, start_ms)
+        self.active = new
+        self._paused = False
+        self._seeking = False
+        return old
+
+    def play_song(self, path, start_ms=0):
+        with self._lock:
+            if self._auto_started == (path, start_ms) and self.active.get_state() in (OPENING, PLAYING):
+                # Already started ahead of the previous song's end (see queue_next)
+                self._auto_started = None
+                return
+            self._auto_started = None
+            self._next = None
+            fade = self.fade_ms > 0 and not self._paused and self.active.get_state() == PLAYING
+            old = self._open(path, start_ms, fade)
+            if fade:
+                self._crossfade(old, self.active)
+            else:
+                self._cancel_ramp(old)
+                old.stop()
+
+    def queue_next(self, path, start_ms=0, end_ms=None, on_started=None):
+        with self._lock:
+            self._auto_started = None
+            self._next = (path, start_ms, end_ms, on_started) if path and self.fade_ms > 0 else None
+            self._watch += 1
+            if self._next is not None:
+                self._watch_end(self._watch)
+
+    def _watch_end(self, generation):
+        # Start the queued song once the playing one is fade_ms (+ opening time) from its end
+        with self._lock:
+            if generation != self._watch or self._next is None:
+                return
+            deck = self.active
+            path, start_ms, end_ms, on_started = self._next
+            end = end_ms if end_ms is not None else deck.get_length()
+            if self._paused or deck.get_state() != PLAYING or end <= 0:
+                self.scheduler.after(WATCH_MS, lambda: self._watch_end(generation))
+                return
+            remaining = end - deck.get_time() - self.fade_ms - self._open_latency_ms
+            if remaining > 0:
+                # Far away: look again later; close: exactly when it is due
+                self.scheduler.after(min(WATCH_MS, remaining), lambda: self._watch_end(generation))
+                return
+            self._next = None
+            self._auto_started = (path, start_ms)
+            self.stats["queued_starts"] += 1
+            old = self._open(path, start_ms, True)
+            self._crossfade(old, self.active, end_ms)
+        if on_started is not None:
+            on_started(path)
+
+    def play(self):
+        with self._lock:
+            deck = self.active
+            if not self._paused:
+                deck.play()
+                self._set_volume(deck, FULL_VOLUME)
+                return
+            self._paused = False
+            if deck.get_state() == PAUSED:
+                deck.play()
+            # (if the pause fade has not finished, it simply turns around)
+            self._ramp(deck, FULL_VOLUME, PAUSE_FADE_MS)
+
+    def pause(self):
+        with self._lock:
+            if self._paused:
+                return
+            self._paused = True
+            deck = self.active
+            if self._seeking:
+                self._seeking = False
+                deck.set_time(self._seek_to)
+            # A song still fading out is not resumed with this one
+            other = self._other(deck)
+            self._cancel_ramp(other)
+            other.stop()
+            self._ramp(deck, 0, PAUSE_FADE_MS, then=lambda: self._pause_faded(deck))
+
+    def _pause_faded(self, deck):
+        if self._paused and deck is self.active:
+            deck.pause()
+
+    def stop(self):
+        with self._lock:
+            self._next = None
+            self._paused = False
+            self._seeking = False
+            for deck in self.decks:
+                self._cancel_ramp(deck)
+                deck.stop()
+                self._set_volume(deck, FULL_VOLUME)
+
+    # Readers take the lock too: the scheduler switches decks from its own thread
+
+    def is_playing(self):
+        with self._lock:
+            return not self._paused and self.active.is_playing()
+
+    def set_time(self, ms):
+        with self._lock:
+            deck = self.active
+            self._seek_to = ms
+            if self._seeking:
+                # The running fade-out seeks to the latest position
+                return
+            if self._paused or deck.get_state() != PLAYING:
+                deck.set_time(ms)
+                return
+            self._seeking = True
+            self._ramp(deck, 0, SEEK_FADE_MS, then=lambda: self._seek_faded(deck))
+
+    def _seek_faded(self, deck):
+        if not self._seeking or deck is not self.active:
+            return
+        self._seeking = False
+        deck.set_time(self._seek_to)
+        self._ramp(deck, FULL_VOLUME, SEEK_FADE_MS)
+
+    def get_time(self):
+        # A seek waiting for its fade-out already counts as done
+        with self._lock:
+            return self._seek_to if self._seeking else self.active.get_time()
+
+    def get_length(self):
+        with self._lock:
+            return self.active.get_length()
+
+    def get_state(self):
+        with self._lock:
+            state = self.active.get_state()
+            return PAUSED if self._paused and state == PLAYING else state
+
+    def now(self):
+        return self.decks[0].now()
+
+    def tick(self):
+        self.active.tick()
+
+    def enable_pcm_tap(self, on_samples):
+        # Both decks decode for the visualizer; only the audible one is passed on
+        rate = None
+        for deck in self.decks:
+            rate = deck.enable_pcm_tap(lambda data, deck=deck: self.active is deck and on_samples(data))
+        return rate
+
+    def set_pcm_tap_active(self, active):
+        for deck in self.decks:
+            deck.set_pcm_tap_active(active)
+
+    def timing(self):
+        return self.scheduler.timing()
+
+    def release(self):
+        self.scheduler.shutdown()
+        with self._lock:
+            self._ramps.clear()
+        for deck in self.decks:
+            deck.release()
@@ -0,0 +1,114 @@
+import os
+
+# CUE sheets count time in mm:ss:ff with 75 frames per second
+CUE_FRAMES_PER_SECOND = 75
+# Hebrew CUE sheets from older rippers are usually windows-1255
+CUE_ENCODINGS = ("utf-8-sig", "cp1255", "latin-1")
+
+
+def cue_path_for(path):
+    # The sidecar sheet of an audio file: "mix.mp3" -> "mix.cue"
+    return os.path.splitext(path)[0] + ".cue"
+
+
+def _read_text(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in CUE_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def _cue_time(value):
+    minutes, seconds, frames = (int(part) for part in value.split(":"))
+    return (minutes * 60 + seconds) * 1000 + frames * 1000 // CUE_FRAMES_PER_SECOND
+
+
+def _split(line):
+    # 'TITLE "Some name"' -> ("TITLE", ["Some name"]); a backslash is not an escape (Windows paths)
+    command, _, rest = line.strip().partition(" ")
+    rest = rest.strip()
+    if rest.startswith('"'):
+        end = rest.find('"', 1)
+        if end < 0:
+            return command.upper(), [rest[1:]]
+        return command.upper(), [rest[1:end]] + rest[end + 1:].split()
+    return command.upper(), rest.split()
+
+
+def parse_cue(text):
+    # [{"file", "title", "performer", "start"}] of every TRACK with an INDEX 01
+    tracks = []
+    current_file = None
+    performer = ""
+    track = None
+    for line in text.splitlines():
+        command, args = _split(line)
+        if not args:
+            continue
+        if command == "FILE":
+            current_file = args[0].replace("\\", "/")
+        elif command == "TRACK":
+            track = {"file": current_file, "title": "", "performer": performer, "start": None}
+            tracks.append(track)
+        elif command == "TITLE" and track is not None:
+            track["title"] = args[0]
+        elif command == "PERFORMER":
+            if track is None:
+                performer = args[0]
+            else:
+                track["performer"] = args[0]
+        elif command == "INDEX" and track is not None and len(args) > 1 and args[0] == "01":
+            try:
+                track["start"] = _cue_time(args[1])
+            except ValueError:
+                pass
+    return [t for t in tracks if t["start"] is not None]
+
+
+def read_cue_chapters(path):
+    # Pieces of `path` listed in its sidecar sheet as [(start_ms, title, performer)]
+    cue_path = cue_path_for(path)
+    try:
+        tracks = parse_cue(_read_text(cue_path))
+    except OSError:
+        return []
+    name = os.path.basename(path).casefold()
+    files = {t["file"] for t in tracks}
+    if len(files) > 1:
+        # A sheet for several files: only the entries of this one
+        tracks = [t for t in tracks if t["file"] and os.path.basename(t["file"]).casefold() == name]
+    return sorted((t["start"], t["title"], t["performer"]) for t in tracks)
+
+
+def build_chapters(starts, duration):
+    # [(start_ms, title, performer)] + file duration (s, or None) ->
+    # [{"start", "end", "title", "performer"}]; each piece ends where the next begins
+    # and the last one at the end of the file (None if that is not known)
+    end_of_file = int(duration * 1000) if duration else None
+    chapters = []
+    for i, (start, title, performer) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else end_of_file
+        if end is not None and end <= start:
+            continue
+        chapters.append({"start": start, "end": end, "title": title, "performer": performer})
+    # A single piece is just the file itself
+    return chapters if len(chapters) > 1 else []
+
+
+def chapter_entry(entry, chapter, number):
+    # Metadata of one chapter derived from its file's entry (for sorting / grouping):
+    # the file's album - or its title, for a mix - is the chapter's album
+    entry = entry or {}
+    end = chapter["end"]
+    return {
+        "title": chapter["title"],
+        "artist": chapter["performer"] or entry.get("artist", ""),
+        "album": entry.get("album") or entry.get("title", ""),
+        "track": str(number),
+        "duration": (end - chapter["start"]) / 1000 if end is not None else None,
+        "added": entry.get("added", 0),
+    }
@@ -5,9 +5,14 @@ import sys
 FAVORITES_FILE = os.path.join(sys.path[0], "favorites.txt")
 
 class FavoritesManager:
-    def __init__(self):
+    def __init__(self, refs=None):
         self.favorites_file = FAVORITES_FILE
+        # Stored entries are references (core.track_ids.TrackRefs): content ids once known,
+        # filenames before that. Everything outside this class deals in library keys.
+        self.refs = refs
         self.favorites = set()
+        # Called with (added, removed) sets after every change
+        self.listeners = []
         self.load_favorites()
 
     def load_favorites(self):
@@ -19,13 +24,56 @@ class FavoritesManager:
         with open(self.favorites_file, "w", encoding="utf-8") as f:
             json.dump(list(self.favorites), f, ensure_ascii=False)
 
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self, added, removed):
+        for callback in self.listeners:
+            callback(added, removed)
+
     def add(self, song):
-        self.favorites.add(song)
-        self.save_favorites()
+        self.add_many([song])
 
     def remove(self, song):
-        self.favorites.discard(song)
+        self.remove_many([song])
+
+    def _ref(self, song):
+        return self.refs.ref(song) if self.refs else song
+
+    def add_many(self, songs):
+        # One save and one notification for the whole batch
+        added = {song for song in songs if not self.is_favorite(song)}
+        if not added:
+            return
+        self.favorites |= {self._ref(song) for song in added}
         self.save_favorites()
+        self._notify(added, set())
+
+    def remove_many(self, songs):
+        removed = {song for song in songs if self.is_favorite(song)}
+        if not removed:
+            return
+        self.favorites -= {self._ref(song) for song in removed} | removed
+        self.save_favorites()
+        self._notify(set(), removed)
+
+    def toggle(self, song):
+        if self.is_favorite(song):
+            self.remove(song)
+        else:
+            self.add(song)
 
     def is_favorite(self, song):
-        return song in self.favorites
\ No newline at end of file
+        # The filename still counts until migrate() has replaced it with the content id
+        return self._ref(song) in self.favorites or song in self.favorites
+
+    def migrate(self):
+        # Store content ids instead of filenames wherever the id is known; True if saved
+        if not self.refs:
+            return False
+        migrated = {self.refs.ref(entry) for entry in self.favorites}
+        if migrated == self.favorites:
+            return False
+        self.favorites = migrated
+        self.save_favorites()
+        return True
\ No newline at end of file
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import uuid
+import datetime
+from collections import OrderedDict
+from core.track_ids import is_content_id
+
+HISTORY_FILE = os.path.join(sys.path[0], "history.log")
+HISTORY_STATS_FILE = os.path.join(sys.path[0], "history_stats.json")
+# Number of logged events after which the log is folded into the stats snapshot
+COMPACT_EVERY = 5000
+
+
+class PlayHistory:
+    # Append-only play log plus rolled-up counters.
+    # Every finished play is one JSON line in history.log: [track, started_at, listened, completed].
+    # The counters live in memory and are periodically written to history_stats.json,
+    # after which the log is started over, so startup only replays the short log tail.
+    # Tracks are stored by reference (core.track_ids.TrackRefs) like favorites and
+    # playlists: the content id once known, so the history follows renames and moves;
+    # entries recorded under a library key are moved to the id by migrate().
+    def __init__(self, log_file=HISTORY_FILE, stats_file=HISTORY_STATS_FILE, compact_every=COMPACT_EVERY, refs=None):
+        self.log_file = log_file
+        self.stats_file = stats_file
+        self.compact_every = compact_every
+        self.refs = refs
+        self.tracks = {}
+        # Stored keys that are library keys rather than content ids
+        self._unmigrated = set()
+        self.days = {}
+        self._recent = OrderedDict()
+        self._by_plays = {}
+        self._log_id = None
+        self._log_entries = 0
+        self._log = None
+        self.load_history()
+
+    def load_history(self):
+        snapshot_log_id = None
+        if os.path.exists(self.stats_file):
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_log_id = snapshot.get("log_id")
+            self.days = snapshot.get("days", {})
+            for track, stats in sorted(snapshot.get("tracks", {}).items(), key=lambda kv: kv[1]["last_played"]):
+                self.tracks[track] = stats
+                self._recent[track] = stats["last_played"]
+                self._by_plays.setdefault(stats["plays"], set()).add(track)
+                self._note_key(track)
+        if os.path.exists(self.log_file):
+            with open(self.log_file, "r", encoding="utf-8") as f:
+                header = f.readline()
+                try:
+                    self._log_id = json.loads(header)["log_id"]
+                except (ValueError, KeyError, TypeError):
+                    self._log_id = None
+                # A log whose id differs from the snapshot's was already folded
+                # into it (the app stopped between the two steps of compact())
+                if self._log_id is not None and self._log_id == snapshot_log_id:
+                    for line in f:
+                        try:
+                            self._apply(json.loads(line))
+                        except (ValueError, TypeError, IndexError):
+                            continue
+                        self._log_entries += 1
+        if self._log_id is None or self._log_id != snapshot_log_id:
+            self.compact()
+        else:
+            self._drop_torn_tail()
+            self._log = open(self.log_file, "a", encoding="utf-8")
+
+    def _drop_torn_tail(self):
+        # A crash while writing an event leaves a line without its newline; new events
+        # would be appended to it, so it is cut off
+        with open(self.log_file, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _note_key(self, key):
+        if not is_content_id(key.partition("#")[0]):
+            self._unmigrated.add(key)
+
+    def _key(self, track):
+        return self.refs.ref(track) if self.refs else track
+
+    def _stats(self, track):
+        # The library key still counts until migrate() has moved it to the content id
+        return self.tracks.get(self._key(track)) or self.tracks.get(track)
+
+    def _track(self, key):
+        return self.refs.track(key) if self.refs else key
+
+    def record(self, track, started_at, listened, completed):
+        event = [self._key(track), round(started_at, 3), round(listened, 3), 1 if completed else 0]
+        self._log.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._log.flush()
+        self._apply(event)
+        self._log_entries += 1
+        if self._log_entries >= self.compact_every:
+            self.compact()
+
+    def _apply(self, event):
+        track, started_at, listened, completed = event
+        stats = self.tracks.get(track)
+        if stats is None:
+            stats = {"plays": 0, "completed": 0, "skips": 0, "listened": 0.0, "last_played": 0}
+            self.tracks[track] = stats
+            self._note_key(track)
+        else:
+            self._unbucket(track, stats["plays"])
+        stats["plays"] += 1
+        if completed:
+            stats["completed"] += 1
+        else:
+            stats["skips"] += 1
+        stats["listened"] += listened
+        stats["last_played"] = max(stats["last_played"], started_at)
+        self._by_plays.setdefault(stats["plays"], set()).add(track)
+        self._recent[track] = stats["last_played"]
+        self._recent.move_to_end(track)
+        day = datetime.date.fromtimestamp(started_at).isoformat()
+        self.days[day] = self.days.get(day, 0) + 1
+
+    def compact(self):
+        # 1. snapshot the counters tagged with the id of the next log
+        # 2. atomically replace the log with an empty one carrying that id
+        new_log_id = uuid.uuid4().hex
+        tmp_file = self.stats_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"log_id": new_log_id, "tracks": self.tracks, "days": self.days}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.stats_file)
+        if self._log is not None:
+            self._log.close()
+        tmp_file = self.log_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"log_id": new_log_id}) + "\n")
+        os.replace(tmp_file, self.log_file)
+        self._log = open(self.log_file, "a", encoding="utf-8")
+        self._log_id = new_log_id
+        self._log_entries = 0
+
+    def migrate(self):
+        # Move entries recorded under a library key to its content id where that is known
+        # (merged with what the id already has); True if anything moved
+        if not self.refs or not self._unmigrated:
+            return False
+        moved = {}
+        for key in self._unmigrated:
+            ref = self.refs.ref(key)
+            if ref != key:
+                moved[key] = ref
+        if not moved:
+            return False
+        for key, ref in moved.items():
+            self._unmigrated.discard(key)
+            stats = self.tracks.pop(key)
+            self._unbucket(key, stats["plays"])
+            other = self.tracks.get(ref)
+            if other is None:
+                self.tracks[ref] = stats
+            else:
+                self._unbucket(ref, other["plays"])
+                for field in ("plays", "completed", "skips", "listened"):
+                    other[field] += stats[field]
+                other["last_played"] = max(other["last_played"], stats["last_played"])
+                stats = other
+            self._by_plays.setdefault(stats["plays"], set()).add(ref)
+        self._recent = OrderedDict(
+            sorted(((track, stats["last_played"]) for track, stats in self.tracks.items()), key=lambda kv: kv[1])
+        )
+        # The log still names the old keys: fold it into a snapshot with the new ones
+        self.compact()
+        return True
+
+    def _unbucket(self, key, plays):
+        bucket = self._by_plays[plays]
+        bucket.discard(key)
+        if not bucket:
+            del self._by_plays[plays]
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def play_count(self, track):
+        stats = self._stats(track)
+        return stats["plays"] if stats else 0
+
+    def last_played(self, track):
+        stats = self._stats(track)
+        return stats["last_played"] if stats else None
+
+    def skip_rate(self, track):
+        stats = self._stats(track)
+        if not stats:
+            return 0.0
+        return stats["skips"] / stats["plays"]
+
+    # Queries hand out library keys; entries that do not resolve right now are left out
+
+    def most_played(self, limit=50):
+        result = {}
+        for plays in sorted(self._by_plays, reverse=True):
+            for key in sorted(self._by_plays[plays], key=self._recent.get, reverse=True):
+                track = self._track(key)
+                if track is not None:
+                    result[track] = None
+                    if len(result) >= limit:
+                        return list(result)
+        return list(result)
+
+    def recently_played(self, limit=50):
+        result = {}
+        for key in reversed(self._recent):
+            track = self._track(key)
+            if track is not None:
+                result[track] = None
+                if len(result) >= limit:
+                    break
+        return list(result)
+
+    def never_played(self, tracks):
+        return [t for t in tracks if self._stats(t) is None]
+
+    def plays_per_day(self, days=30):
+        today = datetime.date.today()
+        return [
+            (day.isoformat(), self.days.get(day.isoformat(), 0))
+            for day in (today - datetime.timedelta(days=n) for n in range(days - 1, -1, -1))
+        ]
@@ -0,0 +1,176 @@
+import struct
+
+# Minimal ID3v2 (2.2 / 2.3 / 2.4) reader - only the tag at the start of the file is read
+
+PICTURE_FRONT_COVER = 3
+
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _unsync(data):
+    return data.replace(b"\xff\x00", b"\xff")
+
+
+def read_id3_frames(path, wanted=None):
+    # Returns (major_version, {frame_id: [frame_data, ...]}); (None, {}) when the file has no tag
+    with open(path, "rb") as f:
+        header = f.read(10)
+        if len(header) < 10 or header[:3] != b"ID3":
+            return None, {}
+        version, flags = header[3], header[5]
+        if version not in (2, 3, 4):
+            return None, {}
+        tag = f.read(_syncsafe(header[6:10]))
+    if flags & 0x80 and version < 4:
+        tag = _unsync(tag)
+    pos = 0
+    if flags & 0x40 and version >= 3:
+        if version == 3:
+            pos = 4 + struct.unpack(">I", tag[:4])[0]
+        else:
+            pos = _syncsafe(tag[:4])
+    frames = {}
+    id_len, header_len = (3, 6) if version == 2 else (4, 10)
+    while pos + header_len <= len(tag):
+        frame_id = tag[pos:pos + id_len]
+        if not frame_id.strip(b"\x00") or not frame_id.isalnum():
+            break
+        if version == 2:
+            size = int.from_bytes(tag[pos + 3:pos + 6], "big")
+            frame_flags = 0
+        elif version == 3:
+            size = struct.unpack(">I", tag[pos + 4:pos + 8])[0]
+            frame_flags = tag[pos + 9]
+        else:
+            size = _syncsafe(tag[pos + 4:pos + 8])
+            frame_flags = tag[pos + 9]
+        data = tag[pos + header_len:pos + header_len + size]
+        pos += header_len + size
+        frame_id = frame_id.decode("latin-1")
+        if wanted is not None and frame_id not in wanted:
+            continue
+        if version == 3:
+            if frame_flags & 0xC0:
+                continue  # compressed / encrypted
+            if frame_flags & 0x20:
+                data = data[1:]
+        elif version == 4:
+            if frame_flags & 0x0C:
+                continue  # compressed / encrypted
+            if frame_flags & 0x40:
+                data = data[1:]
+            if frame_flags & 0x01:
+                data = data[4:]
+            if frame_flags & 0x02 or flags & 0x80:
+                data = _unsync(data)
+        frames.setdefault(frame_id, []).append(data)
+    return version, frames
+
+
+def _skip_string(data, pos, encoding):
+    # Skip a terminated string in `encoding` starting at pos; returns the position after it
+    if encoding in (1, 2):
+        while pos + 1 < len(data):
+            if data[pos] == 0 and data[pos + 1] == 0:
+                return pos + 2
+            pos += 2
+        return len(data)
+    end = data.find(b"\x00", pos)
+    return len(data) if end < 0 else end + 1
+
+
+def parse_picture(data, version):
+    # APIC (PIC in v2.2) frame -> (picture_type, image_bytes)
+    if len(data) < 4:
+        return None, b""
+    encoding = data[0]
+    if version == 2:
+        pos = 4
+    else:
+        pos = _skip_string(data, 1, 0)
+    picture_type = data[pos] if pos < len(data) else 0
+    pos = _skip_string(data, pos + 1, encoding)
+    return picture_type, data[pos:]
+
+
+def read_embedded_picture(path):
+    # Front cover if present, otherwise the first picture in the tag
+    try:
+        version, frames = read_id3_frames(path, wanted=("APIC", "PIC"))
+    except (OSError, struct.error, IndexError):
+        return None
+    best = None
+    for data in frames.get("APIC", []) + frames.get("PIC", []):
+        picture_type, image = parse_picture(data, version)
+        if not image:
+            continue
+        if picture_type == PICTURE_FRONT_COVER:
+            return image
+        if best is None:
+            best = image
+    return best
+
+
+TEXT_FRAMES = {
+    "title": ("TIT2", "TT2"),
+    "artist": ("TPE1", "TP1"),
+    "album": ("TALB", "TAL"),
+    "track": ("TRCK", "TRK"),
+}
+TEXT_ENCODINGS = ("latin-1", "utf-16", "utf-16-be", "utf-8")
+
+
+def decode_text(data):
+    # Text frame -> first value (v2.4 separates several values with a null)
+    if not data:
+        return ""
+    codec = TEXT_ENCODINGS[data[0]] if data[0] < len(TEXT_ENCODINGS) else "latin-1"
+    return data[1:].decode(codec, errors="replace").split("\x00")[0].strip()
+
+
+def read_text_tags(path):
+    # {"title", "artist", "album", "track"} as found in the tag (missing keys are left out)
+    return read_tags_and_chapters(path)[0]
+
+
+def read_tags_and_chapters(path):
+    # (text tags, chapters) from one read of the tag, see text_tags / parse_chapters
+    try:
+        version, frames = read_id3_frames(path, wanted=[i for ids in TEXT_FRAMES.values() for i in ids] + ["CHAP"])
+    except (OSError, struct.error, IndexError):
+        return {}, []
+    return text_tags(frames), parse_chapters(frames.get("CHAP", []), version)
+
+
+def parse_chapters(chap_frames, version):
+    # CHAP frames (ID3v2 chapter addendum) -> [(start_ms, end_ms, title)] by start time
+    chapters = []
+    for data in chap_frames:
+        pos = _skip_string(data, 0, 0)
+        if pos + 16 > len(data):
+            continue
+        start, end = struct.unpack(">II", data[pos:pos + 8])
+        title = ""
+        pos += 16
+        # Embedded sub-frames (only TIT2 is used), same layout as the tag's own frames
+        while pos + 10 <= len(data):
+            size = _syncsafe(data[pos + 4:pos + 8]) if version == 4 else struct.unpack(">I", data[pos + 4:pos + 8])[0]
+            if data[pos:pos + 4] == b"TIT2":
+                title = decode_text(data[pos + 10:pos + 10 + size])
+            pos += 10 + size
+        chapters.append((start, end, title))
+    chapters.sort()
+    return chapters
+
+
+def text_tags(frames):
+    tags = {}
+    for name, ids in TEXT_FRAMES.items():
+        for frame_id in ids:
+            value = decode_text(frames[frame_id][0]) if frame_id in frames else ""
+            if value:
+                tags[name] = value
+                break
+    return tags
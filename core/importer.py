@@ -0,0 +1,224 @@
+import os
+import time
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.library import AUDIO_EXTENSIONS
+from core.track_ids import content_id
+
+IMPORT_WORKERS = 4
+COPY_CHUNK = 1 << 20
+# Landed files are reported in batches, so 10k imports are not 10k UI updates
+REPORT_EVERY = 50
+REPORT_INTERVAL = 0.25
+
+
+class LibraryImporter:
+    # Copies dropped / command-line files and folders into a library root on a bounded
+    # pool. A file is skipped when one with the same size and content id is already in
+    # the library or was copied by this import; while a copy of the same content is in
+    # flight it waits for it, and takes over if that copy fails. Copies go to a ".part"
+    # name and are renamed when complete, so a scan never sees half a file (nor a
+    # leftover one after a failure). Callbacks run on worker threads:
+    #   on_landed(root, relative_paths)             files that were just copied
+    #   on_progress(done, total)
+    #   on_finished({"copied", "skipped", "failed", "cancelled"})
+    def __init__(self, root, on_landed, on_progress, on_finished, workers=IMPORT_WORKERS):
+        self.root = root
+        self.on_landed = on_landed
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._running = False
+
+    def running(self):
+        return self._running
+
+    def start(self, sources, existing):
+        # sources: files / folders; existing: [(path, size or None, id or None)] of the library
+        if self._running:
+            return False
+        self._running = True
+        self._cancel.clear()
+        threading.Thread(target=self._run, args=(list(sources), list(existing)), daemon=True).start()
+        return True
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _plan(self, sources):
+        # (source, relative destination) of every audio file; folders keep their own name
+        for source in sources:
+            source = os.path.abspath(source)
+            if os.path.isfile(source):
+                if source.lower().endswith(AUDIO_EXTENSIONS):
+                    yield source, os.path.basename(source)
+                continue
+            base = os.path.dirname(source)
+            for directory, _, files in os.walk(source):
+                for name in files:
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        path = os.path.join(directory, name)
+                        yield path, os.path.relpath(path, base)
+
+    def _run(self, sources, existing):
+        # Library files and completed copies by size; in-flight copies by content id,
+        # with the duplicates waiting for them
+        self._by_size = {}
+        self._ids = {}
+        self._pending = {}
+        self._reserved = set()
+        self._landed = []
+        self._last_report = time.monotonic()
+        self._counts = {"copied": 0, "skipped": 0, "failed": 0, "cancelled": False}
+        self._done = 0
+        for path, size, track_id in existing:
+            if size is None:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+            self._by_size.setdefault(size, []).append(path)
+            if track_id is not None:
+                self._ids[path] = track_id
+        plan = [] if self._cancel.is_set() else list(self._plan(sources))
+        self._total = len(plan)
+        self.on_progress(0, self._total)
+        # Bounds the copies queued at once
+        slots = threading.Semaphore(self.workers * 2)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import") as pool:
+            for source, relative in plan:
+                slots.acquire()
+                if self._cancel.is_set():
+                    slots.release()
+                    break
+                future = pool.submit(self._import_one, source, relative)
+                future.add_done_callback(lambda _: slots.release())
+        self._report(force=True)
+        self._counts["cancelled"] = self._cancel.is_set()
+        self._running = False
+        self.on_finished(dict(self._counts))
+
+    def _id(self, path):
+        track_id = self._ids.get(path)
+        if track_id is None:
+            try:
+                track_id = content_id(path)
+            except OSError:
+                return None
+            self._ids[path] = track_id
+        return track_id
+
+    def _import_one(self, source, relative):
+        if self._cancel.is_set():
+            return
+        try:
+            size = os.path.getsize(source)
+        except OSError:
+            self._finish_one("failed")
+            return
+        # Only two small blocks are hashed, so every source gets its id
+        source_id = self._id(source)
+        with self._lock:
+            known = list(self._by_size.get(size, ()))
+        if source_id is not None and any(self._id(other) == source_id for other in known):
+            self._finish_one("skipped")
+            return
+        with self._lock:
+            # Copies that completed meanwhile already have their ids
+            if source_id is not None and any(
+                self._ids.get(other) == source_id for other in self._by_size.get(size, ())[len(known):]
+            ):
+                duplicate = "skipped"
+            elif source_id in self._pending:
+                self._pending[source_id].append((source, relative))
+                duplicate = "waiting"
+            else:
+                duplicate = None
+                if source_id is not None:
+                    self._pending[source_id] = []
+        if duplicate == "skipped":
+            self._finish_one("skipped")
+        if duplicate is not None:
+            return
+        reserved = None
+        try:
+            reserved = self._reserve(relative)
+            copied = self._copy(source, os.path.join(self.root, reserved))
+        except OSError:
+            copied = None
+        with self._lock:
+            if copied:
+                self._by_size.setdefault(size, []).append(source)
+            elif reserved is not None:
+                # The name is free again for whoever imports this song instead
+                self._reserved.discard(os.path.normcase(reserved))
+            waiting = self._pending.pop(source_id, [])
+        if copied:
+            self._finish_one("copied", reserved)
+            for _ in waiting:
+                self._finish_one("skipped")
+            return
+        if copied is None:
+            self._finish_one("failed")
+        # The copy failed or was cancelled: the duplicates are imported in its place
+        # (the first one copies, the rest find it done)
+        for waiting_source, waiting_relative in waiting:
+            self._import_one(waiting_source, waiting_relative)
+
+    def _reserve(self, relative):
+        # A free destination name: "song.mp3", then "song (2).mp3", ...
+        stem, ext = os.path.splitext(relative)
+        with self._lock:
+            number = 1
+            while True:
+                candidate = relative if number == 1 else f"{stem} ({number}){ext}"
+                key = os.path.normcase(candidate)
+                if key not in self._reserved and not os.path.exists(os.path.join(self.root, candidate)):
+                    self._reserved.add(key)
+                    return candidate
+                number += 1
+
+    def _copy(self, source, target):
+        # False if cancelled half way; the partial file never outlives a cancel or an error
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = target + ".part"
+        try:
+            with open(source, "rb") as src, open(partial, "wb") as dst:
+                while not self._cancel.is_set():
+                    chunk = src.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            if self._cancel.is_set():
+                os.remove(partial)
+                return False
+            shutil.copystat(source, partial)
+            os.replace(partial, target)
+        except OSError:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return True
+
+    def _finish_one(self, outcome, relative=None):
+        with self._lock:
+            self._counts[outcome] += 1
+            self._done += 1
+            if relative is not None:
+                self._landed.append(relative)
+        self._report()
+
+    def _report(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and len(self._landed) < REPORT_EVERY and now - self._last_report < REPORT_INTERVAL:
+                return
+            landed, self._landed = self._landed, []
+            self._last_report = now
+            done = self._done
+        if landed:
+            self.on_landed(self.root, landed)
+        self.on_progress(done, self._total)
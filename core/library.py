@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav')
+CACHE_DIR = os.path.join(sys.path[0], ".cache")
+LIBRARY_CACHE_DIR = os.path.join(CACHE_DIR, "library")
+# Each device (disk / mount) gets its own bounded pool, so a slow NFS mount
+# can only tie up its own workers and never starves the local disks.
+WORKERS_PER_DEVICE = 4
+
+
+class RootCache:
+    # Last known file list of a single library root (relative paths)
+    def __init__(self, root):
+        name = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+        self.cache_file = os.path.join(LIBRARY_CACHE_DIR, name + ".json")
+
+    def load(self):
+        if not os.path.exists(self.cache_file):
+            return []
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)["files"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def save(self, files):
+        os.makedirs(LIBRARY_CACHE_DIR, exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"files": files}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+
+class _RootScan:
+    def __init__(self, root):
+        self.root = root
+        self.files = []
+        self.pending = 0
+        self.failed = False
+        self.lock = threading.Lock()
+
+
+class LibraryScanner:
+    # Recursive parallel walker. Every directory is one task on the pool of the
+    # device it lives on; found files are reported per directory as they arrive.
+    # Callbacks run on worker threads:
+    #   on_batch(root, relative_paths)
+    #   on_root_done(root, relative_paths or None if the root is unreachable)
+    def __init__(self, on_batch, on_root_done, workers_per_device=WORKERS_PER_DEVICE):
+        self.on_batch = on_batch
+        self.on_root_done = on_root_done
+        self.workers_per_device = workers_per_device
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def scan(self, roots):
+        for root in roots:
+            # stat() on a dead mount can hang, so it is done off the caller's thread
+            threading.Thread(target=self._start_root, args=(root,), daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, path, fn, *args):
+        # Run fn(*args) on the pool of the device `path` lives on, so other per-file work
+        # (e.g. content hashing) shares that device's bound; False once shut down
+        try:
+            device = os.stat(path).st_dev
+        except OSError:
+            return False
+        pool = self._pool_for(device)
+        if pool is None:
+            return False
+        try:
+            pool.submit(fn, *args)
+        except RuntimeError:
+            return False
+        return True
+
+    def _pool_for(self, device):
+        with self._lock:
+            if self._closed:
+                return None
+            pool = self._pools.get(device)
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=self.workers_per_device, thread_name_prefix=f"scan-{device}"
+                )
+                self._pools[device] = pool
+            return pool
+
+    def _start_root(self, root):
+        try:
+            device = os.stat(root).st_dev
+        except OSError:
+            self.on_root_done(root, None)
+            return
+        pool = self._pool_for(device)
+        if pool is None:
+            return
+        state = _RootScan(root)
+        state.pending = 1
+        self._submit(pool, state, root)
+
+    def _submit(self, pool, state, directory):
+        try:
+            pool.submit(self._scan_dir, pool, state, directory)
+        except RuntimeError:
+            # Pool was shut down while the scan was running
+            pass
+
+    def _scan_dir(self, pool, state, directory):
+        files = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            with state.lock:
+                                state.pending += 1
+                            self._submit(pool, state, entry.path)
+                        elif entry.name.lower().endswith(AUDIO_EXTENSIONS) and entry.is_file():
+                            files.append(os.path.relpath(entry.path, state.root))
+                    except OSError:
+                        continue
+        except OSError:
+            if directory == state.root:
+                state.failed = True
+        if files:
+            self.on_batch(state.root, files)
+        with state.lock:
+            state.files.extend(files)
+            state.pending -= 1
+            done = state.pending == 0
+        if done:
+            if not state.failed:
+                try:
+                    RootCache(state.root).save(state.files)
+                except OSError:
+                    pass
+            self.on_root_done(state.root, None if state.failed else state.files)
+
+
+class Library:
+    # In-memory track list built from several roots.
+    # Tracks of the first (default) root are keyed by their path relative to
+    # it, which keeps bare filenames for top-level songs; tracks of any other
+    # root are keyed by their absolute path.
+    # A file with chapters (CUE sheet / ID3 CHAP) is listed as virtual tracks "key#1",
+    # "key#2", ... instead of itself; they share the file's path and carry their offsets
+    # in `segments`. The file stays known under its own key (paths, keys_by_path).
+    # position_of maps every listed key to its index in `tracks`.
+    def __init__(self, roots):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.tracks = []
+        self.position_of = {}
+        self.paths = {}
+        self.root_of = {}
+        self.keys_by_path = {}
+        self.parent_of = {}
+        self.children = {}
+        self.segments = {}
+
+    def key_for(self, root, relative_path):
+        if root == self.roots[0]:
+            return relative_path.replace(os.sep, "/")
+        return os.path.join(root, relative_path)
+
+    def path(self, key):
+        return self.paths.get(key, os.path.join(self.roots[0], key))
+
+    def add(self, root, relative_paths):
+        # Returns the keys that were not in the library yet
+        added = []
+        for rel in relative_paths:
+            key = self.key_for(root, rel)
+            if key in self.paths:
+                continue
+            self.paths[key] = os.path.join(root, rel)
+            self.keys_by_path[self.paths[key]] = key
+            self.root_of[key] = root
+            self.position_of[key] = len(self.tracks)
+            self.tracks.append(key)
+            added.append(key)
+        return added
+
+    def add_file(self, path):
+        # A single file (e.g. opened from a file manager); returns (key, newly_added)
+        path = os.path.abspath(path)
+        key = self.keys_by_path.get(path)
+        if key is not None:
+            if key in self.children:
+                return self.children[key][0], False
+            return key, False
+        for root in self.roots:
+            if path.startswith(os.path.join(root, "")):
+                return self.add(root, [os.path.relpath(path, root)])[0], True
+        # Outside every root: kept for this session only, never reconciled away
+        self.paths[path] = path
+        self.keys_by_path[path] = path
+        self.root_of[path] = None
+        self.position_of[path] = len(self.tracks)
+        self.tracks.append(path)
+        return path, True
+
+    def reconcile(self, root, relative_paths):
+        # Drop tracks of `root` that the latest scan did not find; returns them
+        present = {self.key_for(root, rel) for rel in relative_paths}
+        removed = [
+            k for k in self.tracks if self.root_of.get(k) == root and self.parent_of.get(k, k) not in present
+        ]
+        if removed:
+            gone = set(removed)
+            first = min(self.position_of.pop(key) for key in removed)
+            self.tracks[:] = [k for k in self.tracks if k not in gone]
+            self._renumber(first)
+            for key in removed:
+                parent = self.parent_of.pop(key, None)
+                if parent is None:
+                    self._forget(key)
+                    continue
+                del self.paths[key], self.root_of[key], self.segments[key]
+                if self.children.pop(parent, None) is not None:
+                    self._forget(parent)
+        return removed
+
+    def _renumber(self, start, end=None):
+        # Positions from `start` on (up to `end`) after tracks were replaced or removed
+        tracks = self.tracks
+        for i in range(start, len(tracks) if end is None else end):
+            self.position_of[tracks[i]] = i
+
+    def _forget(self, key):
+        del self.keys_by_path[self.paths.pop(key)]
+        del self.root_of[key]
+
+    def split(self, key, chapters):
+        # List file track `key` as one virtual track per chapter ({"start", "end", ...}, ms),
+        # or as itself again when chapters is empty. Returns (removed, added) tracks.
+        if key not in self.paths:
+            return [], []
+        old = self.children.get(key) or [key]
+        new = [f"{key}#{n}" for n in range(1, len(chapters) + 1)] or [key]
+        for child, chapter in zip(new, chapters):
+            self.segments[child] = chapter
+        if old == new:
+            return [], []
+        position = self.position_of[old[0]]
+        self.tracks[position:position + len(old)] = new
+        for child in old:
+            del self.position_of[child]
+        self._renumber(position, None if len(old) != len(new) else position + len(new))
+        removed = [k for k in old if k not in new]
+        added = [k for k in new if k not in old]
+        for child in removed:
+            if child != key:
+                del self.paths[child], self.root_of[child], self.parent_of[child], self.segments[child]
+        for child in added:
+            if child != key:
+                self.paths[child] = self.paths[key]
+                self.root_of[child] = self.root_of[key]
+                self.parent_of[child] = key
+        if chapters:
+            self.children[key] = new
+        else:
+            self.children.pop(key, None)
+        return removed, added
+
+    def parent(self, key):
+        # The file track a (possibly virtual) track plays from
+        return self.parent_of.get(key, key)
+
+    def listed(self, key):
+        # In the track list (a split file is listed through its chapters only)
+        return key in self.paths and key not in self.children
+
+    def playable(self, key):
+        # The listed track for key: itself, the first chapter of a split file, None if unknown
+        if key in self.children:
+            return self.children[key][0]
+        return key if key in self.paths else None
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import wave
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.library import CACHE_DIR
+from core.id3 import read_tags_and_chapters, _syncsafe
+from core.cue import cue_path_for, read_cue_chapters, build_chapters
+
+METADATA_FILE = os.path.join(CACHE_DIR, "metadata.json")
+# How far into the file the first MPEG frame is looked for (after the ID3 tag)
+MP3_SYNC_SEARCH = 64 * 1024
+
+MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = (44100, 48000, 32000)
+
+
+def _mp3_duration(path):
+    # Seconds, from the Xing/Info or VBRI frame count, else estimated from the first
+    # frame's bitrate (exact for CBR files). Only MPEG layer III is understood.
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(10)
+        start = 0
+        if head[:3] == b"ID3" and len(head) == 10:
+            start = 10 + _syncsafe(head[6:10]) + (10 if head[5] & 0x10 else 0)
+        f.seek(start)
+        data = f.read(MP3_SYNC_SEARCH)
+        f.seek(max(0, size - 128))
+        has_id3v1 = f.read(3) == b"TAG"
+    pos = 0
+    while pos + 4 <= len(data):
+        pos = data.find(b"\xff", pos)
+        if pos < 0 or pos + 4 > len(data):
+            return None
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        version_bits, layer_bits = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if (b1 & 0xE0) != 0xE0 or version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+        mpeg1 = version_bits == 3
+        sample_rate = MP3_SAMPLE_RATES[rate_index] >> (0 if mpeg1 else 1 if version_bits == 2 else 2)
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (b3 >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+        xing = pos + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info") and data[xing + 7] & 1:
+            frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+            return frames * samples_per_frame / sample_rate
+        if data[pos + 36:pos + 40] == b"VBRI":
+            frames = struct.unpack(">I", data[pos + 50:pos + 54])[0]
+            return frames * samples_per_frame / sample_rate
+        bitrate = MP3_BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+        audio_bytes = size - start - pos - (128 if has_id3v1 else 0)
+        return max(0, audio_bytes) * 8 / bitrate
+    return None
+
+
+def _wav_duration(path):
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def read_metadata(path):
+    # Tags + duration (seconds, None if unknown) + chapters of one file. Chapters come from
+    # a sidecar CUE sheet, else from ID3 CHAP frames; [] when the file is a single song.
+    chapters = []
+    if path.lower().endswith(".wav"):
+        tags = {}
+        try:
+            duration = _wav_duration(path)
+        except (OSError, wave.Error, EOFError, ZeroDivisionError):
+            duration = None
+    else:
+        tags, chapters = read_tags_and_chapters(path)
+        try:
+            duration = _mp3_duration(path)
+        except (OSError, struct.error, IndexError):
+            duration = None
+    starts = read_cue_chapters(path) or [(start, title, "") for start, _, title in chapters]
+    tags["duration"] = duration
+    tags["chapters"] = build_chapters(starts, duration)
+    return tags
+
+
+def _cue_mtime(path):
+    try:
+        return os.path.getmtime(cue_path_for(path))
+    except OSError:
+        return None
+
+
+class MetadataCache:
+    # Tags, duration, size, chapters and date added per file. Entries are keyed by path and
+    # re-read only when the mtime (or the CUE sheet's) changes; "added" is when the file
+    # was first seen.
+    def __init__(self, cache_file=METADATA_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        # One worker: batches are read in order and saves never overlap
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metadata")
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def refresh(self, path):
+        # Entry for path, read from the file if it is new or changed; True if it changed
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self.entries.get(path), False
+        entry = self.entries.get(path)
+        cue_mtime = _cue_mtime(path)
+        if (entry is not None and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size
+                and entry.get("cue_mtime") == cue_mtime):
+            return entry, False
+        fresh = read_metadata(path)
+        fresh["mtime"] = st.st_mtime
+        fresh["cue_mtime"] = cue_mtime
+        fresh["size"] = st.st_size
+        fresh["added"] = entry["added"] if entry else time.time()
+        with self._lock:
+            self.entries[path] = fresh
+            self._dirty = True
+        return fresh, True
+
+    def load_async(self, items, on_loaded, batch=500):
+        # items: [(track, path)]; on_loaded(tracks) is called from the worker thread
+        # for every batch of tracks whose entry is new or changed
+        def work():
+            changed = []
+            for track, path in items:
+                if self.refresh(path)[1]:
+                    changed.append(track)
+                    if len(changed) >= batch:
+                        on_loaded(changed)
+                        changed = []
+            if changed:
+                on_loaded(changed)
+            self.save()
+        self._pool.submit(work)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.save()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self.entries)
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
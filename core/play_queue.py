@@ -0,0 +1,203 @@
+import copy
+import random
+from collections import deque
+
+
+class PlayQueue:
+    # Decides what plays next: the library (in the order given by `order`), an active
+    # playlist, repeat / shuffle, and an optional `similar` hook (auto-DJ).
+    # Pure state - no UI and no playback - so it can be driven by any PlaybackBackend.
+    #   order():        (positions in play order, rank of every position); None = library order
+    #   similar(track): a track to continue with, or None
+    def __init__(self, tracks, order=None, similar=None, rng=None):
+        self.tracks = tracks
+        self.order = order
+        self.similar = similar
+        self.rng = rng or random.Random()
+        self.index = 0
+        self.repeat_mode = "none"
+        self.shuffle = False
+        self.playlist = None
+        self.playlist_index = None
+        self.playlist_name = None
+        self._shuffle_ahead = deque()
+        self._shuffle_sink = None
+        self._next_similar = None
+
+    def current(self):
+        if not self.tracks or self.index >= len(self.tracks):
+            return None
+        return self.tracks[self.index]
+
+    def select(self, position):
+        # Jump to a position of the current context (playlist position while a playlist plays)
+        if self.playlist:
+            self.playlist_index = position
+            self.index = self.tracks.index(self.playlist[position])
+        else:
+            self.index = position
+        return self.current()
+
+    def play_library(self, index):
+        self.leave_playlist()
+        return self.select(index)
+
+    def play_playlist(self, name, songs, position):
+        self.playlist_name = name
+        self.playlist = list(songs)
+        return self.select(position)
+
+    def leave_playlist(self):
+        self.playlist_name = None
+        self.playlist = None
+        self.playlist_index = None
+
+    def update_playlist(self, songs):
+        # The active playlist was edited: keep following the current song if it is still there
+        current = self.current()
+        self.playlist = list(songs)
+        if current in self.playlist:
+            self.playlist_index = self.playlist.index(current)
+        elif self.playlist:
+            self.playlist_index = min(self.playlist_index or 0, len(self.playlist) - 1)
+        else:
+            self.leave_playlist()
+
+    def library_changed(self, current, exists):
+        # Library positions shifted; `current` is the song that was current before
+        self.index = self.tracks.index(current) if current is not None and exists(current) else 0
+        if self.playlist is not None:
+            self.playlist = [song for song in self.playlist if exists(song)]
+        self.reset_lookahead()
+
+    def reset_lookahead(self):
+        self._shuffle_ahead.clear()
+        self._next_similar = None
+
+    def cycle_repeat(self):
+        # none -> once -> always -> none
+        self.repeat_mode = {"none": "once", "once": "always"}.get(self.repeat_mode, "none")
+        return self.repeat_mode
+
+    def toggle_shuffle(self):
+        self.shuffle = not self.shuffle
+        return self.shuffle
+
+    def _step(self, step):
+        if self.order is None:
+            return (self.index + step) % len(self.tracks)
+        order, rank = self.order()
+        return order[(rank[self.index] + step) % len(order)]
+
+    def _at_library_end(self):
+        if self.order is None:
+            return self.index + 1 >= len(self.tracks)
+        order, rank = self.order()
+        return rank[self.index] + 1 >= len(order)
+
+    def _shuffle_pick(self, count):
+        # Shuffle picks are drawn ahead, so the next songs are known before they start
+        ahead = self._shuffle_ahead
+        while ahead and ahead[0] >= count:
+            ahead.popleft()
+        if not ahead:
+            ahead.append(self.rng.randrange(count))
+            if self._shuffle_sink is not None:
+                self._shuffle_sink.append(ahead[0])
+        return ahead[0]
+
+    def _similar_pick(self):
+        # The similar hook takes over where the queue would wrap around or pick at random.
+        # Like shuffle, the pick is drawn one step ahead; None falls back to the normal order
+        if self.similar is None:
+            return None
+        if self.playlist:
+            if self.shuffle or self.playlist_index + 1 < len(self.playlist):
+                return None
+        elif self.repeat_mode != "none" or not (self.shuffle or self._at_library_end()):
+            return None
+        current = self.current()
+        if self._next_similar is None or self._next_similar[0] != current:
+            similar = self.similar(current)
+            if similar is None:
+                return None
+            self._next_similar = (current, similar)
+        return self._next_similar[1]
+
+    def peek_next(self):
+        # The song advance() will move to (without moving)
+        if not self.tracks:
+            return None
+        similar = self._similar_pick()
+        if similar is not None:
+            return similar
+        if self.playlist:
+            count = len(self.playlist)
+            if self.shuffle:
+                return self.playlist[self._shuffle_pick(count)]
+            return self.playlist[(self.playlist_index + 1) % count]
+        if self.repeat_mode != "none":
+            return self.current()
+        if self.shuffle:
+            return self.tracks[self._shuffle_pick(len(self.tracks))]
+        return self.tracks[self._step(1)]
+
+    def upcoming(self, count):
+        # The next `count` songs advance() will move to, without moving. Shuffle picks drawn
+        # here are kept, so these are the songs that will actually play; auto-DJ only
+        # decides one song ahead, so later entries assume the normal order.
+        if not self.tracks or count <= 0:
+            return []
+        songs = [self.peek_next()]
+        probe = copy.copy(self)
+        probe._shuffle_ahead = deque(self._shuffle_ahead)
+        probe._shuffle_sink = self._shuffle_ahead
+        probe.advance()
+        probe.similar = None
+        while len(songs) < count:
+            songs.append(probe.advance())
+        return songs
+
+    def advance(self):
+        # Move to the next song and return it; "repeat once" falls back to "none" here
+        if not self.tracks:
+            return None
+        similar = self._similar_pick()
+        if similar is not None:
+            # Continuing with similar songs leaves the playlist
+            self.leave_playlist()
+            self._next_similar = None
+            self.index = self.tracks.index(similar)
+        elif self.playlist:
+            if self.shuffle:
+                self.playlist_index = self._shuffle_pick(len(self.playlist))
+                self._shuffle_ahead.popleft()
+            else:
+                self.playlist_index = (self.playlist_index + 1) % len(self.playlist)
+            self.index = self.tracks.index(self.playlist[self.playlist_index])
+        elif self.repeat_mode == "once":
+            self.repeat_mode = "none"
+        elif self.repeat_mode == "always":
+            pass
+        elif self.shuffle:
+            self.index = self._shuffle_pick(len(self.tracks))
+            self._shuffle_ahead.popleft()
+        else:
+            self.index = self._step(1)
+        return self.current()
+
+    def back(self):
+        # Move to the previous song (a random one in shuffle mode) and return it
+        if not self.tracks:
+            return None
+        if self.playlist:
+            if self.shuffle:
+                self.playlist_index = self.rng.randrange(len(self.playlist))
+            else:
+                self.playlist_index = (self.playlist_index - 1) % len(self.playlist)
+            self.index = self.tracks.index(self.playlist[self.playlist_index])
+        elif self.shuffle:
+            self.index = self.rng.randrange(len(self.tracks))
+        else:
+            self.index = self._step(-1)
+        return self.current()
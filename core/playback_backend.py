@@ -0,0 +1,87 @@
+import time
+from abc import ABC, abstractmethod
+
+# Playback states reported by PlaybackBackend.get_state() (the libVLC state names)
+NOTHING_SPECIAL = "NothingSpecial"
+OPENING = "Opening"
+PLAYING = "Playing"
+PAUSED = "Paused"
+STOPPED = "Stopped"
+ENDED = "Ended"
+ERROR = "Error"
+
+
+class PlaybackBackend(ABC):
+    # What MusicPlayer needs from a player. Times are in ms. The abstract methods are
+    # required (a backend missing one cannot be created); the rest have defaults.
+    # Implementations: core.vlc_controller.VLCController (real audio) and
+    # core.simulated_backend.SimulatedBackend (virtual clock, for tests and benchmarks).
+    @abstractmethod
+    def play_song(self, path, start_ms=0):
+        # Open path and start playing at start_ms
+        raise NotImplementedError
+
+    @abstractmethod
+    def play(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def pause(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stop(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_playing(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_time(self, ms):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_time(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_length(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_state(self):
+        raise NotImplementedError
+
+    def set_volume(self, volume):
+        # 0-100; backends without volume control ignore it
+        pass
+
+    def queue_next(self, path, start_ms=0, end_ms=None, on_started=None):
+        # The song that follows the current one (path None: nothing / unknown). A backend
+        # that can overlap songs (core.crossfade.CrossfadeBackend) starts it on its own
+        # before the current one ends - at end_ms, or the end of the file - and reports
+        # it with on_started(path) from another thread. Others ignore it: the player
+        # moves on when it sees ENDED.
+        pass
+
+    def now(self):
+        # Seconds on the clock the playback position runs by (see core.playback_clock)
+        return time.monotonic()
+
+    def tick(self):
+        # Periodic housekeeping, called from the UI update timer
+        pass
+
+    def enable_pcm_tap(self, on_samples):
+        # Deliver decoded mono 16-bit PCM to on_samples(bytes); returns the sample
+        # rate, or None when the backend cannot tap audio
+        return None
+
+    def set_pcm_tap_active(self, active):
+        # Whether anything shows the tapped audio right now; a backend that pays for the
+        # tap (e.g. with a second decode) only runs it while active
+        pass
+
+    def release(self):
+        pass
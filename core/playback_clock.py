@@ -0,0 +1,43 @@
+import time
+
+# libVLC's reported time only advances in coarse steps; smaller differences are
+# treated as reporting jitter rather than drift
+SYNC_TOLERANCE_MS = 250
+
+
+class PlaybackClock:
+    # Local estimate of the playback position in ms. It is anchored on start,
+    # pause, resume and seek and advanced with a monotonic clock in between, so
+    # the position can be redrawn every frame without asking the player.
+    def __init__(self, now=time.monotonic):
+        self._now = now
+        self._anchor_ms = 0
+        self._anchor_time = now()
+        self.running = False
+        self.length_ms = 0
+
+    def position(self):
+        pos = self._anchor_ms
+        if self.running:
+            pos += (self._now() - self._anchor_time) * 1000
+        if self.length_ms > 0:
+            pos = min(pos, self.length_ms)
+        return max(int(pos), 0)
+
+    def start(self, position_ms=0, running=True):
+        self._anchor_ms = position_ms
+        self._anchor_time = self._now()
+        self.running = running
+
+    def pause(self):
+        self.start(self.position(), running=False)
+
+    def resume(self):
+        self.start(self.position(), running=True)
+
+    def seek(self, position_ms):
+        self.start(position_ms, running=self.running)
+
+    def sync(self, reported_ms, tolerance=SYNC_TOLERANCE_MS):
+        if reported_ms is not None and reported_ms >= 0 and abs(reported_ms - self.position()) > tolerance:
+            self.seek(reported_ms)
@@ -5,34 +5,162 @@ import sys
 PLAYLISTS_FILE = os.path.join(sys.path[0], "playlists.json")
 
 class PlaylistsManager:
-    def __init__(self):
+    def __init__(self, refs=None):
         self.playlists_file = PLAYLISTS_FILE
+        # Entries are stored as references (core.track_ids.TrackRefs) and handed out as
+        # library keys; entries that do not resolve right now are kept, just not returned
+        self.refs = refs
+        # Called with (name of the changed playlist, songs added, songs removed), or with
+        # (None, (), ()) when playlists were added/removed; a reorder adds / removes nothing
+        self.listeners = []
+        # The file is read once; every change goes through save_playlists()
+        self._playlists = None
+        # stored entry -> names of the playlists holding it (built when first needed)
+        self._names_of = None
 
     def load_playlists(self):
-        if not os.path.exists(PLAYLISTS_FILE):
-            return []
-        with open(self.playlists_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-        
+        if self._playlists is None:
+            self._playlists = []
+            if os.path.exists(self.playlists_file):
+                with open(self.playlists_file, "r", encoding="utf-8") as f:
+                    self._playlists = json.load(f)
+        return self._playlists
+
     def save_playlists(self, playlists):
+        self._playlists = playlists
+        self._names_of = None
         with open(self.playlists_file, "w", encoding="utf-8") as f:
             json.dump(playlists, f, ensure_ascii=False, indent=2)
 
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self, playlist_name, added=(), removed=()):
+        for callback in self.listeners:
+            callback(playlist_name, added, removed)
+
+    def playlist_names(self):
+        return [pl["name"] for pl in self.load_playlists()]
+
+    def _ref(self, song):
+        return self.refs.ref(song) if self.refs else song
+
+    def _track(self, entry):
+        return self.refs.track(entry) if self.refs else entry
+
+    def _resolve(self, entries):
+        songs = []
+        for entry in entries:
+            song = self._track(entry)
+            if song is not None:
+                songs.append(song)
+        return list(dict.fromkeys(songs))
+
+    def all_songs(self):
+        # {name: songs} of every playlist, with a single read of the file
+        return {pl["name"]: self._resolve(pl["songs"]) for pl in self.load_playlists()}
+
+    def get_songs(self, playlist_name):
+        for pl in self.load_playlists():
+            if pl["name"] == playlist_name:
+                return self._resolve(pl["songs"])
+        return []
+
+    def playlists_containing(self, song):
+        refs = {self._ref(song), song}
+        return [pl["name"] for pl in self.load_playlists() if refs.intersection(pl["songs"])]
+
+    def playlists_of(self, song):
+        # Names of the playlists with an entry that resolves to song
+        if self._names_of is None:
+            self._names_of = {}
+            for pl in self.load_playlists():
+                for entry in pl["songs"]:
+                    self._names_of.setdefault(entry, set()).add(pl["name"])
+        names = set()
+        for entry in self.refs.refs_of(song) if self.refs else (song,):
+            if entry in self._names_of and self._track(entry) == song:
+                names |= self._names_of[entry]
+        return names
+
+    def migrate(self):
+        # Store content ids instead of filenames wherever the id is known; True if saved
+        if not self.refs:
+            return False
+        playlists = self.load_playlists()
+        changed = False
+        for pl in playlists:
+            migrated = list(dict.fromkeys(self.refs.ref(entry) for entry in pl["songs"]))
+            if migrated != pl["songs"]:
+                pl["songs"] = migrated
+                changed = True
+        if changed:
+            self.save_playlists(playlists)
+        return changed
+
+    def create_playlist(self, playlist_name, songs=()):
+        playlists = self.load_playlists()
+        playlists.append({"name": playlist_name, "songs": list(dict.fromkeys(map(self._ref, songs)))})
+        self.save_playlists(playlists)
+        self._notify(None)
+
+    def delete_playlist(self, playlist_name):
+        playlists = [pl for pl in self.load_playlists() if pl["name"] != playlist_name]
+        self.save_playlists(playlists)
+        self._notify(None)
+
+    def set_songs(self, playlist_name, songs):
+        # New order of the resolvable songs; entries that are missing right now keep
+        # their relative order after them
+        playlists = self.load_playlists()
+        for pl in playlists:
+            if pl["name"] == playlist_name:
+                refs = list(dict.fromkeys(map(self._ref, songs)))
+                shown = set(refs) | set(songs)
+                pl["songs"] = refs + [
+                    entry for entry in pl["songs"] if entry not in shown and self._track(entry) is None
+                ]
+                break
+        self.save_playlists(playlists)
+        self._notify(playlist_name)
+
     def add_to_playlist(self, song, playlist_name):
+        self.add_many_to_playlist([song], playlist_name)
+
+    def remove_from_playlist(self, song, playlist_name):
+        self.remove_many_from_playlist([song], playlist_name)
+
+    # Bulk changes: one load, one save and one notification, however many songs
+
+    def add_many_to_playlist(self, songs, playlist_name):
         playlists = self.load_playlists()
         for pl in playlists:
             if pl["name"] == playlist_name:
-                if song not in pl["songs"]:
-                    pl["songs"].append(song)
                 break
         else: 
-            playlists.append({"name": playlist_name, "songs": [song]})
+            pl = {"name": playlist_name, "songs": []}
+            playlists.append(pl)
+        present = set(pl["songs"])
+        added = []
+        for song in songs:
+            ref = self._ref(song)
+            if ref not in present and song not in present:
+                present.add(ref)
+                pl["songs"].append(ref)
+                added.append(song)
         self.save_playlists(playlists)
+        self._notify(playlist_name, added, ())
 
-    def remove_from_playlist(self, song, playlist_name):
+    def remove_many_from_playlist(self, songs, playlist_name):
+        songs = set(songs)
+        refs = {self._ref(song): song for song in songs}
+        refs.update((song, song) for song in songs)
         playlists = self.load_playlists()
+        removed = set()
         for pl in playlists:
-            if pl["name"] == playlist_name and song in pl["songs"]:
-                pl["songs"].remove(song)
+            if pl["name"] == playlist_name:
+                removed = {refs[entry] for entry in pl["songs"] if entry in refs}
+                pl["songs"] = [entry for entry in pl["songs"] if entry not in refs]
                 break
-        self.save_playlists(playlists)
\ No newline at end of file
+        self.save_playlists(playlists)
+        self._notify(playlist_name, (), removed)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import os
+import threading
+from collections import OrderedDict
+
+# How many upcoming songs are warmed, and how much of them in total
+PREFETCH_TRACKS = 3
+PREFETCH_BUDGET_MB = 64
+PREFETCH_CHUNK = 1 << 20
+# Files warmed recently are not read again (the page cache most likely still has them)
+WARM_MEMORY = 32
+
+
+class Prefetcher:
+    # Warms the page cache for the songs that play next, so starting one does not stall
+    # on slow storage (NFS, USB disks). A background thread asks the kernel to read the
+    # files ahead (posix_fadvise WILLNEED, where available) and then reads them in chunks,
+    # which makes sure the data is really cached and works on every platform.
+    # Every plan() replaces the previous one; work on the old plan stops at the next chunk.
+    def __init__(self, budget=PREFETCH_BUDGET_MB * 1024 * 1024, chunk=PREFETCH_CHUNK):
+        self.budget = budget
+        self.chunk = chunk
+        self._plan = []
+        # The plan the thread is working through (or finished), until a new one replaces it
+        self._running_plan = None
+        self._generation = 0
+        self._warm = OrderedDict()
+        # Files only partly read because the budget ran out
+        self._partial = OrderedDict()
+        self._in_progress = None
+        self._wake = threading.Condition()
+        self._closed = False
+        # hits: started after being fully warmed; partial: still being warmed at start,
+        # or cut short by the budget
+        self.stats = {"hits": 0, "partial": 0, "misses": 0, "bytes": 0, "cancelled": 0}
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def plan(self, paths):
+        # Songs about to play, nearest first; duplicates and already warm files are skipped
+        paths = [path for path in dict.fromkeys(paths) if path]
+        with self._wake:
+            if paths == (self._plan or self._running_plan or []):
+                return
+            if self._in_progress is not None:
+                self.stats["cancelled"] += 1
+            self._plan = paths
+            self._running_plan = None
+            self._generation += 1
+            self._wake.notify()
+
+    def started(self, path):
+        # A song began playing: count whether prefetching got there first
+        with self._wake:
+            if path in self._warm:
+                self.stats["hits"] += 1
+            elif self._in_progress == path or path in self._partial:
+                self.stats["partial"] += 1
+            else:
+                self.stats["misses"] += 1
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["partial"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else None
+
+    def shutdown(self):
+        with self._wake:
+            self._closed = True
+            self._generation += 1
+            self._wake.notify()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._closed and not self._plan:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                generation = self._generation
+                plan, self._plan = self._plan, []
+                self._running_plan = plan
+            remaining = self.budget
+            for path in plan:
+                if remaining <= 0 or generation != self._generation:
+                    break
+                remaining -= self._warm_file(path, remaining, generation)
+
+    def _warm_file(self, path, limit, generation):
+        # Bytes of `path` read into the cache (at most `limit`)
+        try:
+            stamp = os.stat(path).st_mtime
+        except OSError:
+            return 0
+        with self._wake:
+            if self._warm.get(path) == stamp:
+                self._warm.move_to_end(path)
+                return 0
+            self._in_progress = path
+        done = 0
+        complete = False
+        try:
+            with open(path, "rb", buffering=0) as f:
+                size = os.fstat(f.fileno()).st_size
+                length = min(size, limit)
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, length, os.POSIX_FADV_WILLNEED)
+                buffer = bytearray(self.chunk)
+                while done < length and generation == self._generation:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    done += read
+                # A file cut short by the budget is not warm - starting it still reads the disk
+                complete = done >= size
+        except OSError:
+            pass
+        with self._wake:
+            self._in_progress = None
+            self.stats["bytes"] += done
+            if complete:
+                self._partial.pop(path, None)
+                self._warm[path] = stamp
+                while len(self._warm) > WARM_MEMORY:
+                    self._warm.popitem(last=False)
+            elif done:
+                self._warm.pop(path, None)
+                self._partial[path] = stamp
+                self._partial.move_to_end(path)
+                while len(self._partial) > WARM_MEMORY:
+                    self._partial.popitem(last=False)
+        return done
@@ -0,0 +1,32 @@
+import os
+import json
+import sys
+
+SETTINGS_FILE = os.path.join(sys.path[0], "settings.json")
+
+DEFAULT_SETTINGS = {
+    # Folders scanned (recursively) for music. The first root is the default library.
+    "library_roots": [os.path.join(sys.path[0], "songs")],
+}
+
+class SettingsManager:
+    def __init__(self):
+        self.settings_file = SETTINGS_FILE
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.load_settings()
+
+    def load_settings(self):
+        if os.path.exists(self.settings_file):
+            with open(self.settings_file, "r", encoding="utf-8") as f:
+                self.settings.update(json.load(f))
+
+    def save_settings(self):
+        with open(self.settings_file, "w", encoding="utf-8") as f:
+            json.dump(self.settings, f, ensure_ascii=False, indent=2)
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def set(self, key, value):
+        self.settings[key] = value
+        self.save_settings()
@@ -0,0 +1,259 @@
+import os
+import json
+import random
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from core.library import CACHE_DIR
+from core.track_ids import is_content_id
+from core.audio_features import np, compute_features, FEATURE_DIM
+
+AUTO_DJ_AVAILABLE = np is not None
+
+FEATURES_FILE = os.path.join(CACHE_DIR, "features.f32")
+FEATURES_INDEX_FILE = os.path.join(CACHE_DIR, "features.json")
+# Feature extraction decodes audio - keep half the cores free for playback and the UI
+FEATURE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+LSH_TABLES = 12
+LSH_BITS = 10
+SAVE_EVERY = 200
+
+
+class FeatureStore:
+    # Feature vectors as one memory-mapped float32 matrix (row per track).
+    # features.json maps the content id of a file -> row, so a renamed or moved file
+    # keeps its features and an edited one (new id) is analysed again; the matrix
+    # grows by doubling.
+    def __init__(self, matrix_file=FEATURES_FILE, index_file=FEATURES_INDEX_FILE):
+        self.matrix_file = matrix_file
+        self.index_file = index_file
+        self.rows = {}
+        self.count = 0
+        self.matrix = None
+        self._lock = threading.Lock()
+        if os.path.exists(index_file) and os.path.exists(matrix_file):
+            try:
+                with open(index_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                rows = data["rows"]
+                # Older versions keyed the rows by path: those are analysed again
+                if all(is_content_id(track_id) and isinstance(row, int) for track_id, row in rows.items()):
+                    self.rows = rows
+                    self.count = data["count"]
+                    self._map(os.path.getsize(matrix_file) // (4 * FEATURE_DIM))
+            except (OSError, ValueError, KeyError, AttributeError):
+                self.rows, self.count, self.matrix = {}, 0, None
+
+    def _map(self, capacity):
+        if self.matrix is not None:
+            self.matrix.flush()
+        os.makedirs(os.path.dirname(self.matrix_file), exist_ok=True)
+        with open(self.matrix_file, "ab") as f:
+            f.truncate(capacity * 4 * FEATURE_DIM)
+        self.matrix = np.memmap(self.matrix_file, dtype=np.float32, mode="r+", shape=(capacity, FEATURE_DIM))
+
+    def has(self, track_id):
+        return track_id in self.rows
+
+    def row(self, track_id):
+        return self.rows.get(track_id)
+
+    def put(self, track_id, vector):
+        with self._lock:
+            row = self.rows.get(track_id)
+            if row is None:
+                row = self.count
+                self.count += 1
+                if self.matrix is None or row >= len(self.matrix):
+                    self._map(max(1024, row * 2))
+            self.matrix[row] = vector
+            self.rows[track_id] = row
+
+    def snapshot(self):
+        # (ids by row, vectors) of everything stored so far. The vectors are a view of the
+        # memory map, not a copy: a row is written once per id and a growing matrix is
+        # mapped anew, so the rows a snapshot covers do not change under it.
+        with self._lock:
+            ids = [None] * self.count
+            for track_id, row in self.rows.items():
+                ids[row] = track_id
+            vectors = np.asarray(self.matrix[:self.count]) if self.count else np.zeros((0, FEATURE_DIM), np.float32)
+        return ids, vectors
+
+    def save(self):
+        with self._lock:
+            if self.matrix is None:
+                return
+            self.matrix.flush()
+            data = {"count": self.count, "rows": dict(self.rows)}
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+
+class SimilarityIndex:
+    # Approximate nearest neighbours by random-hyperplane LSH over standardised vectors.
+    # Every table keeps its bucket codes sorted, so a bucket is one searchsorted range;
+    # candidates are then ranked exactly by cosine similarity.
+    def __init__(self, tracks, vectors, tables=LSH_TABLES, bits=LSH_BITS, seed=0):
+        self.tracks = tracks
+        self.rows = {track: row for row, track in enumerate(tracks) if track is not None}
+        self.mean = vectors.mean(axis=0) if len(vectors) else np.zeros(FEATURE_DIM, np.float32)
+        self.scale = vectors.std(axis=0) + 1e-6 if len(vectors) else np.ones(FEATURE_DIM, np.float32)
+        normalized = (vectors - self.mean) / self.scale
+        normalized /= np.linalg.norm(normalized, axis=1, keepdims=True) + 1e-9
+        self.vectors = normalized.astype(np.float32)
+        self.planes = np.random.default_rng(seed).standard_normal((tables, FEATURE_DIM, bits)).astype(np.float32)
+        self._weights = (1 << np.arange(bits)).astype(np.int64)
+        self.bits = bits
+        self.orders = []
+        self.codes = []
+        for planes in self.planes:
+            codes = self._codes(self.vectors, planes)
+            order = np.argsort(codes, kind="stable")
+            self.orders.append(order)
+            self.codes.append(codes[order])
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _codes(self, vectors, planes):
+        return ((vectors @ planes) > 0).astype(np.int64) @ self._weights
+
+    def _bucket(self, table, code):
+        codes = self.codes[table]
+        return self.orders[table][np.searchsorted(codes, code, "left"):np.searchsorted(codes, code, "right")]
+
+    def neighbours(self, track, count=20):
+        # Up to `count` (track, similarity) pairs, most similar first
+        row = self.rows.get(track)
+        if row is None:
+            return []
+        query = self.vectors[row]
+        buckets = []
+        for table, planes in enumerate(self.planes):
+            buckets.append(self._bucket(table, int(self._codes(query[None, :], planes)[0])))
+        candidates = np.unique(np.concatenate(buckets))
+        if len(candidates) <= count:
+            # Multi-probe: also look at the buckets one bit away
+            for table, planes in enumerate(self.planes):
+                code = int(self._codes(query[None, :], planes)[0])
+                for bit in range(self.bits):
+                    buckets.append(self._bucket(table, code ^ (1 << bit)))
+            candidates = np.unique(np.concatenate(buckets))
+        candidates = candidates[candidates != row]
+        scores = self.vectors[candidates] @ query
+        best = np.argsort(-scores)[:count]
+        return [(self.tracks[candidates[i]], float(scores[i])) for i in best]
+
+
+class AutoDJ:
+    # Radio mode: computes features in a process pool (once per content id), keeps
+    # them in a FeatureStore and answers "what sounds like this" from a
+    # SimilarityIndex that is rebuilt off the UI thread as new vectors arrive.
+    # Rebuilds run on their own thread, never on the pool's result thread, and the
+    # finished index is swapped in under the lock that pick_next() reads it with.
+    def __init__(self, store=None, workers=FEATURE_WORKERS):
+        self.store = store or FeatureStore()
+        self.workers = workers
+        self.index = None
+        self._pool = None
+        self._queued = set()
+        self._lock = threading.Lock()
+        # Bounds the futures in flight, so a 100k-track library is not queued at once
+        self._slots = threading.Semaphore(workers * 4)
+        self._since_save = 0
+        self._since_rebuild = 0
+        self._closed = False
+        self._rebuild_wanted = threading.Event()
+        threading.Thread(target=self._rebuild_loop, daemon=True).start()
+        if self.store.count:
+            self._rebuild_wanted.set()
+
+    def analyze(self, tracks):
+        # tracks: iterable of (content id, path); only files with unknown content are decoded
+        tracks = [(track_id, path) for track_id, path in tracks if track_id is not None]
+        if tracks:
+            threading.Thread(target=self._submit, args=(tracks,), daemon=True).start()
+
+    def _submit(self, tracks):
+        for track_id, path in tracks:
+            if self._closed:
+                return
+            with self._lock:
+                if track_id in self._queued or self.store.has(track_id):
+                    continue
+                self._queued.add(track_id)
+            self._slots.acquire()
+            with self._lock:
+                if self._closed:
+                    return
+                if self._pool is None:
+                    # spawn: forking a process that runs Qt and libVLC threads can deadlock the child
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                future = self._pool.submit(compute_features, path)
+            future.add_done_callback(lambda f, track_id=track_id: self._done(track_id, f))
+
+    def _done(self, track_id, future):
+        self._slots.release()
+        with self._lock:
+            self._queued.discard(track_id)
+            pending = len(self._queued)
+        if future.cancelled() or future.exception() is not None or self._closed:
+            return
+        vector = future.result()
+        if vector is None:
+            return
+        self.store.put(track_id, vector)
+        self._since_save += 1
+        self._since_rebuild += 1
+        if self._since_save >= SAVE_EVERY or pending == 0:
+            self._since_save = 0
+            self.store.save()
+        # Rebuild when the index would grow noticeably, and once the queue drains
+        if pending == 0 or self._since_rebuild >= max(SAVE_EVERY, len(self.index or ()) // 4):
+            self._since_rebuild = 0
+            self._rebuild_wanted.set()
+
+    def _rebuild_loop(self):
+        # Requests that arrive during a rebuild fold into one more rebuild
+        while True:
+            self._rebuild_wanted.wait()
+            if self._closed:
+                return
+            self._rebuild_wanted.clear()
+            tracks, vectors = self.store.snapshot()
+            if len(tracks) > 1:
+                index = SimilarityIndex(tracks, vectors)
+                with self._lock:
+                    self.index = index
+
+    def pick_next(self, track, avoid=(), exists=None, candidates=20):
+        # The content id of a file similar to content id `track` that is not in `avoid`
+        # (and passes `exists`), None if nothing is known about it yet
+        with self._lock:
+            index = self.index
+        if index is None:
+            return None
+        avoid = set(avoid)
+        choices = [
+            other for other, _ in index.neighbours(track, candidates)
+            if other not in avoid and other != track and (exists is None or exists(other))
+        ]
+        if not choices:
+            return None
+        # A little variety: one of the closest few
+        return random.choice(choices[:3])
+
+    def shutdown(self):
+        self._closed = True
+        self._rebuild_wanted.set()
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self.store.save()
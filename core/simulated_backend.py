@@ -0,0 +1,144 @@
+import time
+import random
+from core.playback_backend import (
+    PlaybackBackend, NOTHING_SPECIAL, OPENING, PLAYING, PAUSED, STOPPED, ENDED, ERROR
+)
+
+DEFAULT_LENGTH_MS = 180000
+
+
+class VirtualClock:
+    # Time that only moves when told to; now() is in seconds like time.monotonic
+    def __init__(self, start_ms=0):
+        self.ms = start_ms
+
+    def now(self):
+        return self.ms / 1000
+
+    def advance(self, ms):
+        self.ms += ms
+
+
+class WallClock(VirtualClock):
+    # Runs with real time (perf_counter), for simulated playback driven by real threads
+    # (e.g. the crossfade scheduler); advance() still adds on top
+    def __init__(self, start_ms=0):
+        self._offset = start_ms - time.perf_counter() * 1000
+
+    @property
+    def ms(self):
+        return int(time.perf_counter() * 1000 + self._offset)
+
+    def advance(self, ms):
+        self._offset += ms
+
+
+class SimulatedBackend(PlaybackBackend):
+    # Plays nothing: the position is derived from a VirtualClock, so thousands of
+    # transitions run per second and every run with the same seed is identical.
+    #   lengths:        {path: ms} or a callable(path) -> ms (default DEFAULT_LENGTH_MS)
+    #   open_delay_ms:  time spent in "Opening" before "Playing"
+    #   fail_paths:     paths that always end in "Error"
+    #   fail_rate:      chance that opening any file fails
+    #   seek_fail_rate: chance that set_time is ignored (like a seek on a non-seekable stream)
+    def __init__(self, clock=None, lengths=None, open_delay_ms=0, fail_paths=(), fail_rate=0.0,
+                 seek_fail_rate=0.0, seed=None):
+        self.clock = clock or VirtualClock()
+        self.lengths = lengths or {}
+        self.open_delay_ms = open_delay_ms
+        self.fail_paths = set(fail_paths)
+        self.fail_rate = fail_rate
+        self.seek_fail_rate = seek_fail_rate
+        self.rng = random.Random(seed)
+        self.path = None
+        self.length_ms = 0
+        self.volume = 100
+        self._state = NOTHING_SPECIAL
+        self._position = 0
+        self._since = 0
+        # Counters for benchmarks / assertions
+        self.stats = {"opens": 0, "errors": 0, "seeks": 0, "failed_seeks": 0, "ends": 0, "volume_changes": 0}
+
+    def now(self):
+        return self.clock.now()
+
+    def _length_of(self, path):
+        if callable(self.lengths):
+            return int(self.lengths(path))
+        return int(self.lengths.get(path, DEFAULT_LENGTH_MS))
+
+    def _update(self):
+        # Apply everything the virtual time has brought since the last call
+        now = self.clock.ms
+        if self._state == OPENING and now - self._since >= self.open_delay_ms:
+            self._state = PLAYING
+            self._since = self._since + self.open_delay_ms
+        if self._state == PLAYING:
+            self._position += now - self._since
+            self._since = now
+            if self._position >= self.length_ms:
+                self._position = self.length_ms
+                self._state = ENDED
+                self.stats["ends"] += 1
+
+    def play_song(self, path, start_ms=0):
+        self.path = path
+        self.stats["opens"] += 1
+        self._position = 0
+        self._since = self.clock.ms
+        if path in self.fail_paths or (self.fail_rate and self.rng.random() < self.fail_rate):
+            self._state = ERROR
+            self.length_ms = 0
+            self.stats["errors"] += 1
+            return
+        self.length_ms = self._length_of(path)
+        self._position = min(start_ms, self.length_ms)
+        self._state = OPENING
+        self._update()
+
+    def play(self):
+        self._update()
+        if self._state == PAUSED:
+            self._state = PLAYING
+            self._since = self.clock.ms
+        elif self._state in (STOPPED, ENDED) and self.path is not None:
+            self.play_song(self.path)
+
+    def pause(self):
+        self._update()
+        if self._state == PLAYING:
+            self._state = PAUSED
+
+    def stop(self):
+        self._state = STOPPED
+        self._position = 0
+
+    def is_playing(self):
+        self._update()
+        return self._state == PLAYING
+
+    def set_time(self, ms):
+        self._update()
+        self.stats["seeks"] += 1
+        if self._state not in (PLAYING, PAUSED) or (self.seek_fail_rate and self.rng.random() < self.seek_fail_rate):
+            self.stats["failed_seeks"] += 1
+            return
+        self._position = max(0, min(int(ms), self.length_ms))
+        self._since = self.clock.ms
+        self._update()
+
+    def set_volume(self, volume):
+        self.volume = volume
+        self.stats["volume_changes"] += 1
+
+    def get_time(self):
+        self._update()
+        return self._position if self._state in (PLAYING, PAUSED, ENDED) else -1
+
+    def get_length(self):
+        self._update()
+        return self.length_ms if self._state in (PLAYING, PAUSED, ENDED) else 0
+
+    def get_state(self):
+        self._update()
+        return self._state
@@ -0,0 +1,72 @@
+import os
+import json
+import getpass
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+# One local socket per user; a second launch hands its arguments to the first one
+SERVER_NAME = f"reem-music-player-{getpass.getuser()}"
+CONNECT_TIMEOUT_MS = 250
+
+
+def forward_to_running_instance(args):
+    # Returns True when a running instance accepted the request
+    socket = QLocalSocket()
+    socket.connectToServer(SERVER_NAME)
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        return False
+    payload = json.dumps({"cwd": os.getcwd(), "args": args}, ensure_ascii=False)
+    socket.write(payload.encode("utf-8") + b"\n")
+    socket.waitForBytesWritten(CONNECT_TIMEOUT_MS)
+    socket.disconnectFromServer()
+    return True
+
+
+class SingleInstanceServer(QObject):
+    # Emits the argument list of every later launch
+    message_received = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        # False if another instance got the name first
+        if self.server.listen(SERVER_NAME):
+            return True
+        if self.server.serverError() == QAbstractSocket.SocketError.AddressInUseError:
+            probe = QLocalSocket()
+            probe.connectToServer(SERVER_NAME)
+            if probe.waitForConnected(CONNECT_TIMEOUT_MS):
+                probe.disconnectFromServer()
+                return False
+            # Socket file left behind by an instance that crashed
+            QLocalServer.removeServer(SERVER_NAME)
+        return self.server.listen(SERVER_NAME)
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._read(s))
+            socket.disconnected.connect(lambda s=socket: self._close(s))
+
+    def _read(self, socket):
+        self._buffers[socket] = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        while b"\n" in self._buffers[socket]:
+            line, self._buffers[socket] = self._buffers[socket].split(b"\n", 1)
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            cwd = message.get("cwd", "")
+            args = message.get("args", [])
+            self.message_received.emit([a if a.startswith("--") else os.path.join(cwd, a) for a in args])
+
+    def _close(self, socket):
+        if socket.bytesAvailable():
+            self._read(socket)
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
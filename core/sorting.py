@@ -0,0 +1,128 @@
+import re
+import locale
+import unicodedata
+from array import array
+from core.utils import display_name
+from core.cue import chapter_entry
+
+# Sort orders of the song list; the grouped ones show a header row per group
+SORT_ORDERS = ("title", "artist", "album", "added", "duration")
+GROUPED_ORDERS = ("artist", "album")
+
+_NUMBER = re.compile(r"(\d+)")
+# Direction marks that often end up in mixed Hebrew/English names
+_BIDI_MARKS = dict.fromkeys(map(ord, "\u200e\u200f\u061c\u202a\u202b\u202c\u202d\u202e\u2066\u2067\u2068\u2069"))
+
+
+def _strxfrm(text):
+    try:
+        return locale.strxfrm(text)
+    except (ValueError, OSError):
+        return text
+
+
+def collation_key(text):
+    # Locale-aware, case-insensitive key with natural number order ("2" < "10").
+    # Niqqud / cantillation marks and accents are ignored, so they do not split words apart.
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text).translate(_BIDI_MARKS)
+        text = "".join(c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c))
+        text = unicodedata.normalize("NFC", text)
+    text = text.casefold()
+    key = []
+    for i, part in enumerate(_NUMBER.split(text)):
+        if i % 2:
+            key.append((0, int(part), ""))
+        elif part.strip():
+            key.append((1, 0, _strxfrm(part.strip())))
+    return tuple(key)
+
+
+def _optional(text):
+    # Missing values sort after every known one
+    return (0, collation_key(text)) if text else (1, ())
+
+
+def _track_number(value):
+    # "3/12" -> 3; unknown numbers go last
+    match = _NUMBER.search(value or "")
+    return int(match.group(1)) if match else 1 << 30
+
+
+class TrackKeys:
+    __slots__ = ("title", "artist", "album", "track", "duration", "added", "artist_name", "album_name")
+
+    def __init__(self, track, entry):
+        entry = entry or {}
+        self.artist_name = entry.get("artist", "")
+        self.album_name = entry.get("album", "")
+        self.title = collation_key(entry.get("title") or display_name(track))
+        self.artist = _optional(self.artist_name)
+        self.album = _optional(self.album_name)
+        self.track = _track_number(entry.get("track"))
+        duration = entry.get("duration")
+        self.duration = duration if duration is not None else float("inf")
+        self.added = entry.get("added", 0)
+
+
+SORT_KEYS = {
+    "title": lambda k: (k.title, k.artist),
+    "artist": lambda k: (k.artist, k.album, k.track, k.title),
+    "album": lambda k: (k.album, k.track, k.title),
+    "added": lambda k: (-k.added, k.title),
+    "duration": lambda k: (k.duration, k.title),
+}
+
+
+class SortIndex:
+    # Sort keys are computed once per track (and again only when its metadata changes).
+    # Every sorted order is cached as a permutation of library positions plus its
+    # inverse (rank), so switching order or stepping through it needs no re-sort.
+    def __init__(self, library, metadata):
+        self.library = library
+        self.metadata = metadata
+        self._keys = {}
+        self._orders = {}
+        try:
+            locale.setlocale(locale.LC_COLLATE, "")
+        except locale.Error:
+            pass
+
+    def invalidate(self, tracks=None):
+        # tracks: songs whose metadata changed; None when only library positions moved
+        for track in tracks or ():
+            self._keys.pop(track, None)
+        self._orders.clear()
+
+    def keys(self, track):
+        keys = self._keys.get(track)
+        if keys is None:
+            entry = self.metadata.get(self.library.path(track))
+            chapter = self.library.segments.get(track)
+            if chapter is not None:
+                entry = chapter_entry(entry, chapter, int(track.rpartition("#")[2]))
+            keys = self._keys[track] = TrackKeys(track, entry)
+        return keys
+
+    def order(self, mode):
+        # (positions in sorted order, rank of every position)
+        cached = self._orders.get(mode)
+        if cached is None:
+            tracks = self.library.tracks
+            key_of = SORT_KEYS[mode]
+            sort_keys = [key_of(self.keys(track)) for track in tracks]
+            order = array("i", sorted(range(len(tracks)), key=sort_keys.__getitem__))
+            rank = array("i", bytes(4 * len(order)))
+            for position, i in enumerate(order):
+                rank[i] = position
+            cached = self._orders[mode] = (order, rank)
+        return cached
+
+    def group(self, mode, track):
+        # Group header text of a track in a grouped order ("" = unknown)
+        keys = self.keys(track)
+        if mode == "artist":
+            return keys.artist_name
+        if mode == "album":
+            return keys.album_name
+        return None
@@ -0,0 +1,120 @@
+import time
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # The visualizer is optional
+    np = None
+
+SPECTRUM_AVAILABLE = np is not None
+
+FFT_SIZE = 2048
+BANDS = 32
+MAX_FPS = 30
+MIN_FPS = 8
+# Share of one CPU core the analyzer may use; above it the frame rate is lowered
+CPU_BUDGET = 0.05
+
+
+class SampleRing:
+    # Single-producer / single-consumer ring of mono float32 samples.
+    # The audio callback only copies into preallocated memory and then moves the
+    # write counter; the reader takes the newest window and never blocks the writer.
+    def __init__(self, capacity=1 << 15):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+
+    def write_pcm16(self, data):
+        samples = np.frombuffer(data, dtype=np.int16)
+        count = len(samples)
+        if count == 0:
+            return
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+            count = self.capacity
+        start = self.written % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first] * (1.0 / 32768)
+        if first < count:
+            self.buffer[:count - first] = samples[first:] * (1.0 / 32768)
+        self.written += count
+
+    def latest(self, count):
+        # Newest `count` samples (None until that many were written)
+        end = self.written
+        if end < count:
+            return None
+        start = (end - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.buffer[start:start + count].copy()
+        return np.concatenate((self.buffer[start:], self.buffer[:start + count - self.capacity]))
+
+
+class SpectrumAnalyzer(threading.Thread):
+    # Worker thread: windowed FFT of the newest samples, reduced to a few
+    # log-spaced bands (0..1), delivered through on_frame(list) at a capped rate
+    def __init__(self, ring, sample_rate, on_frame, bands=BANDS, fft_size=FFT_SIZE, cpu_budget=CPU_BUDGET):
+        super().__init__(name="spectrum", daemon=True)
+        self.ring = ring
+        self.on_frame = on_frame
+        self.fft_size = fft_size
+        self.cpu_budget = cpu_budget
+        self.fps = MAX_FPS
+        self.cpu_load = 0.0
+        self._stop_event = threading.Event()
+        self._window = np.hanning(fft_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+        edges = np.geomspace(40, sample_rate / 2, bands + 1)
+        self._band_starts = np.clip(np.searchsorted(freqs, edges[:-1]), 1, len(freqs) - 1)
+        # Bands narrower than one bin would be empty for reduceat; give them one bin
+        self._band_starts = np.maximum.accumulate(self._band_starts)
+        self._levels = np.zeros(bands, dtype=np.float32)
+        self._last_written = -1
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        next_frame = time.monotonic()
+        idle = False
+        while not self._stop_event.is_set():
+            # Nothing new to show (paused, or the tap is off): only check now and then
+            interval = 1.0 / (MIN_FPS if idle else self.fps)
+            next_frame += interval
+            started = time.thread_time()
+            idle = not self._frame()
+            used = time.thread_time() - started
+            self.cpu_load = self.cpu_load * 0.9 + (used / interval) * 0.1
+            if self.cpu_load > self.cpu_budget and self.fps > MIN_FPS:
+                self.fps -= 1
+            elif self.cpu_load < self.cpu_budget / 2 and self.fps < MAX_FPS:
+                self.fps += 1
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                next_frame = time.monotonic()
+
+    def _frame(self):
+        # False when there was nothing to draw
+        written = self.ring.written
+        if written == self._last_written:
+            # Paused / stopped: let the bars fall once, then stay idle
+            if self._levels.any():
+                self._levels *= 0.7
+                self._levels[self._levels < 0.01] = 0
+                self.on_frame(self._levels.tolist())
+                return True
+            return False
+        self._last_written = written
+        samples = self.ring.latest(self.fft_size)
+        if samples is None:
+            return False
+        spectrum = np.abs(np.fft.rfft(samples * self._window))
+        bands = np.maximum.reduceat(spectrum, self._band_starts)
+        levels = np.clip((20 * np.log10(bands / (self.fft_size / 4) + 1e-9) + 60) / 60, 0, 1)
+        # Fast attack, slow release
+        self._levels = np.where(levels > self._levels, levels, self._levels * 0.85 + levels * 0.15)
+        self.on_frame(self._levels.tolist())
+        return True
@@ -0,0 +1,196 @@
+import os
+import json
+import hashlib
+import threading
+from core.library import CACHE_DIR
+
+IDS_CACHE_FILE = os.path.join(CACHE_DIR, "ids.json")
+# Only the size and this many bytes at each end of a file are hashed, so identifying
+# a file costs at most two small reads however large it is
+HASH_BLOCK = 16 * 1024
+RESOLVE_CHUNK = 256
+_HEX = frozenset("0123456789abcdef")
+
+
+def content_id(path):
+    # blake2b over size + head block + tail block (32 hex chars)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+        digest.update(f.read(HASH_BLOCK))
+        if size > HASH_BLOCK:
+            f.seek(max(HASH_BLOCK, size - HASH_BLOCK))
+            digest.update(f.read(HASH_BLOCK))
+    return digest.hexdigest()
+
+
+def is_content_id(ref):
+    return len(ref) == 32 and _HEX.issuperset(ref)
+
+
+class TrackIds:
+    # Content ids of files, cached by path and re-hashed only when mtime or size change
+    def __init__(self, cache_file=IDS_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._pending = 0
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def cached(self, path):
+        # Last known id of path without touching the disk (verified later by resolve_async)
+        entry = self.entries.get(path)
+        return entry[2] if entry is not None else None
+
+    def compute(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == st.st_mtime and entry[1] == st.st_size:
+            return entry[2]
+        try:
+            track_id = content_id(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.entries[path] = [st.st_mtime, st.st_size, track_id]
+            self._dirty = True
+        return track_id
+
+    def resolve_async(self, items, submit, on_resolved):
+        # items: [(track, path)]. Chunks run through submit(path, fn, *args) - the scanner's
+        # per-device pools - and on_resolved([(track, id)]) is called from those workers
+        items = list(items)
+        if not items:
+            return
+
+        def run(chunk):
+            pairs = []
+            for track, path in chunk:
+                track_id = self.compute(path)
+                if track_id:
+                    pairs.append((track, track_id))
+            if pairs:
+                on_resolved(pairs)
+            with self._lock:
+                self._pending -= 1
+                idle = self._pending == 0
+            if idle:
+                self.save()
+
+        def dispatch():
+            # Every chunk holds files of one device only, so it runs on (and is bounded by)
+            # that device's pool; a folder's files share its device, so one stat per folder
+            by_device = {}
+            device_of_dir = {}
+            for track, path in items:
+                folder = os.path.dirname(path)
+                device = device_of_dir.get(folder)
+                if device is None:
+                    try:
+                        device = device_of_dir[folder] = os.stat(folder).st_dev
+                    except OSError:
+                        continue
+                by_device.setdefault(device, []).append((track, path))
+            for device_items in by_device.values():
+                for start in range(0, len(device_items), RESOLVE_CHUNK):
+                    chunk = device_items[start:start + RESOLVE_CHUNK]
+                    with self._lock:
+                        self._pending += 1
+                    if not submit(chunk[0][1], run, chunk):
+                        with self._lock:
+                            self._pending -= 1
+
+        threading.Thread(target=dispatch, daemon=True).start()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self.entries)
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+
+class TrackRefs:
+    # What favorites and playlists store for a track: its content id once known, so
+    # entries follow a file across renames and moves. Until then (and for entries
+    # written by older versions) the reference is the library key itself.
+    def __init__(self, library):
+        self.library = library
+        self.id_of = {}
+        self.track_by_id = {}
+        # id -> every track with that content (copies of one file share an id)
+        self._tracks_of = {}
+
+    def add(self, pairs):
+        for track, track_id in pairs:
+            if track_id is None:
+                continue
+            old_id = self.id_of.get(track)
+            if old_id is not None and old_id != track_id:
+                # The file was edited: it no longer stands for its old content
+                self._drop(track, old_id)
+            self.id_of[track] = track_id
+            self.track_by_id[track_id] = track
+            self._tracks_of.setdefault(track_id, set()).add(track)
+
+    def forget(self, tracks):
+        # Tracks left the library; a copy with the same content takes over their id
+        for track in tracks:
+            track_id = self.id_of.pop(track, None)
+            if track_id is not None:
+                self._drop(track, track_id)
+
+    def _drop(self, track, track_id):
+        copies = self._tracks_of.get(track_id)
+        if copies is not None:
+            copies.discard(track)
+            if not copies:
+                del self._tracks_of[track_id]
+        if self.track_by_id.get(track_id) == track:
+            if copies:
+                self.track_by_id[track_id] = next(iter(copies))
+            else:
+                del self.track_by_id[track_id]
+
+    def ref(self, track):
+        parent = self.library.parent_of.get(track)
+        if parent is not None:
+            # A chapter of a file is the file's id plus the chapter number ("<id>#3")
+            parent_id = self.id_of.get(parent)
+            return parent_id + track[len(parent):] if parent_id else track
+        return self.id_of.get(track, track)
+
+    def refs_of(self, track):
+        # Every stored reference that track() can map to this track
+        refs = {track, self.ref(track)}
+        parent = self.library.parent_of.get(track)
+        if parent is not None and self.library.playable(parent) == track:
+            # Entries of a split file stand for its first chapter
+            refs.update((parent, self.id_of.get(parent, parent)))
+        return refs
+
+    def track(self, ref):
+        # Library key a stored reference points at, None while it is unresolved
+        track = self.track_by_id.get(ref)
+        if track is None:
+            head, mark, number = ref.rpartition("#")
+            parent = self.track_by_id.get(head) if mark else None
+            if parent is not None:
+                chapter = f"{parent}#{number}"
+                return chapter if chapter in self.library.parent_of else None
+            track = ref
+        return self.library.playable(track)
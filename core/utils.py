@@ -1,6 +1,65 @@
+import os
+import bisect
+
 def format_time(seconds):
     if seconds is None or seconds < 0:
         return "0:00"
     m = int(seconds) // 60
     s = int(seconds) % 60
-    return f"{m}:{s:02d}"
\ No newline at end of file
+    return f"{m}:{s:02d}"
+
+def display_name(song):
+    # Songs may live in nested folders; only the file name is shown
+    return os.path.splitext(os.path.basename(song))[0]
+
+def format_time_ms(ms):
+    # m:ss.mmm (used for the current position label)
+    if ms is None or ms < 0:
+        return "0:00.000"
+    ms = int(ms)
+    return f"{ms // 60000}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+
+def format_duration(seconds):
+    # h:mm:ss for long totals (playlists, the library), m:ss otherwise
+    seconds = int(seconds or 0)
+    if seconds < 3600:
+        return format_time(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit in ("B", "KB") or size >= 100 else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def longest_increasing(values):
+    # Indexes of one longest strictly increasing subsequence of values (O(n log n))
+    tails, tail_index, previous = [], [], [None] * len(values)
+    for n, value in enumerate(values):
+        k = bisect.bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(n)
+        else:
+            tails[k] = value
+            tail_index[k] = n
+        previous[n] = tail_index[k - 1] if k else None
+    result = []
+    n = tail_index[-1] if tail_index else None
+    while n is not None:
+        result.append(n)
+        n = previous[n]
+    return result[::-1]
+
+
+def song_row_keys(songs):
+    # (song, occurrence) of every entry: unique row keys even for a song listed twice
+    seen = {}
+    keys = []
+    for song in songs:
+        n = seen[song] = seen.get(song, -1) + 1
+        keys.append((song, n))
+    return keys
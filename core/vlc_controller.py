@@ -1,26 +1,61 @@
+import ctypes
 import vlc
+from core.playback_backend import PlaybackBackend
 
-class VLCController:
+# The visualizer's silent decode is re-aligned with the audible player beyond this drift
+TAP_DRIFT_MS = 120
+
+
+class VLCController(PlaybackBackend):
     def __init__(self):
         self.instance = vlc.Instance("--quiet")
         self.player = self.instance.media_player_new()
+        self.tap = None
+        # The tap decodes every song a second time, so it only runs while the
+        # visualizer is on screen (set_pcm_tap_active)
+        self.tap_active = False
+        self._path = None
 
-    def play_song(self, path):
+    def _tapping(self):
+        return self.tap is not None and self.tap_active
+
+    def play_song(self, path, start_ms=0):
         media = self.instance.media_new(path)
+        if start_ms:
+            # Demuxing starts at the offset instead of seeking after the first frames
+            media.add_option(f":start-time={start_ms / 1000:.3f}")
         self.player.set_media(media)
         self.player.play()
+        self._path = path
+        if self._tapping():
+            self.tap.open(path, start_ms)
 
     def play(self):
         self.player.play()
+        if self._tapping():
+            if self.tap.idle() and self._path is not None:
+                # Turned on while paused: nothing was opened yet
+                self.tap.open(self._path, self.player.get_time())
+            else:
+                self.tap.play()
 
     def pause(self):
-        self.player.pause()
+        self.player.set_pause(1)
+        if self._tapping():
+            self.tap.pause()
+
+    def stop(self):
+        self.player.stop()
+        if self._tapping():
+            self.tap.stop()
 
     def is_playing(self):
         return self.player.is_playing()
 
     def set_time(self, ms):
-        self.player.set_time(ms)
+        self.player.set_time(int(ms))
+        if self._tapping():
+            self.tap.set_time(ms)
 
     def get_length(self):
         return self.player.get_length()
@@ -30,4 +65,91 @@ class VLCController:
 
     def get_state(self):
         state = self.player.get_state()
-        return str(state).split('.')[-1]
\ No newline at end of file
+        return str(state).split('.')[-1]
+
+    def set_volume(self, volume):
+        self.player.audio_set_volume(int(volume))
+
+    def tick(self):
+        if self._tapping() and self.player.is_playing():
+            current = self.player.get_time()
+            if abs(self.tap.get_time() - current) > TAP_DRIFT_MS:
+                self.tap.set_time(current)
+
+    def enable_pcm_tap(self, on_samples):
+        if self.tap is None:
+            self.tap = PCMTap(self.instance, on_samples)
+        return self.tap.rate
+
+    def set_pcm_tap_active(self, active):
+        if self.tap is None or active == self.tap_active:
+            return
+        self.tap_active = active
+        if not active:
+            self.tap.stop()
+        elif self._path is not None and self.player.is_playing():
+            self.tap.open(self._path, self.player.get_time())
+
+    def release(self):
+        if self.tap is not None:
+            self.tap.release()
+            self.tap = None
+        self.player.stop()
+        self.player.release()
+        self.instance.release()
+
+
+TAP_RATE = 22050
+
+
+class PCMTap:
+    # A second media player on the same libVLC instance that has no audio output:
+    # its decoded PCM (mono, signed 16 bit) is handed to on_samples(bytes) by
+    # libVLC's audio callbacks. The audible player is never touched, so a slow
+    # consumer can only drop visualizer samples, never cause an underrun.
+    # (Tapping the audible player instead is not possible: audio callbacks replace
+    # libVLC's audio output, so the app would have to play the PCM itself.)
+    def __init__(self, instance, on_samples, rate=TAP_RATE):
+        self.instance = instance
+        self.rate = rate
+        self.on_samples = on_samples
+        self.player = instance.media_player_new()
+        # ctypes callbacks must stay referenced for as long as libVLC may call them
+        self._play_cb = vlc.AudioPlayCb(self._play)
+        self.player.audio_set_callbacks(self._play_cb, None, None, None, None, None)
+        self.player.audio_set_format("S16N", rate, 1)
+
+    def _play(self, opaque, samples, count, pts):
+        # Runs on libVLC's audio thread - copy out and return
+        self.on_samples(ctypes.string_at(samples, count * 2))
+
+    def open(self, path, position_ms=0):
+        self.player.set_media(self.instance.media_new(path))
+        self.player.play()
+        if position_ms:
+            self.player.set_time(int(position_ms))
+
+    def play(self):
+        self.player.set_pause(0)
+
+    def pause(self):
+        self.player.set_pause(1)
+
+    def stop(self):
+        self.player.stop()
+
+    def idle(self):
+        # Nothing open (never opened, stopped, ended or failed)
+        return self.player.get_state() in (
+            vlc.State.NothingSpecial, vlc.State.Stopped, vlc.State.Ended, vlc.State.Error
+        )
+
+    def set_time(self, ms):
+        self.player.set_time(int(ms))
+
+    def get_time(self):
+        return self.player.get_time()
+
+    def release(self):
+        self.player.stop()
+        self.player.release()
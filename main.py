@@ -1,9 +1,20 @@
-from PyQt6.QtWidgets import QApplication
-import sys
-from widgets.player.main_player import MusicPlayer
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    player = MusicPlayer()
-    player.show()
+from PyQt6.QtWidgets import QApplication
+import sys
+from core.single_instance import SingleInstanceServer, forward_to_running_instance
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    args = sys.argv[1:]
+    # A second launch only hands its arguments to the running player and exits
+    if forward_to_running_instance(args):
+        sys.exit(0)
+    server = SingleInstanceServer()
+    if not server.listen() and forward_to_running_instance(args):
+        sys.exit(0)
+    # Imported late so a forwarding launch never loads libVLC
+    from widgets.player.main_player import MusicPlayer
+    player = MusicPlayer()
+    server.message_received.connect(player.handle_remote_args)
+    player.show()
+    player.handle_args(args)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,148 @@
+import random
+
+from core.aggregates import Aggregates, FAVORITES_VIEW, LIBRARY_VIEW, playlist_view
+
+
+class Model:
+    # The library, favorites and playlists as plain sets, recounted from scratch
+    def __init__(self):
+        self.stats = {}
+        self.library = set()
+        self.favorites = set()
+        self.playlists = {}
+
+    def stats_of(self, track):
+        return self.stats[track]
+
+    def is_favorite(self, track):
+        return track in self.favorites
+
+    def members(self):
+        views = {LIBRARY_VIEW: self.library, FAVORITES_VIEW: self.favorites & self.library}
+        for name, songs in self.playlists.items():
+            views[playlist_view(name)] = songs & self.library
+        return views
+
+    def recount(self, view, tracks):
+        known = [self.stats[t][0] for t in tracks if self.stats[t][0] is not None]
+        return {
+            "tracks": len(tracks),
+            "duration_ms": sum(known),
+            "unknown": len(tracks) - len(known),
+            "bytes": sum(self.stats[t][1] for t in tracks),
+            "favorites": len(tracks & self.favorites),
+        }
+
+
+def as_dict(totals):
+    return {name: getattr(totals, name) for name in totals.__slots__}
+
+
+def random_stats(rng):
+    return (rng.choice([None, rng.randrange(1000, 600_000)]), rng.randrange(1, 10_000_000))
+
+
+def test_incremental_totals_match_a_full_recount():
+    rng = random.Random(1234)
+    model = Model()
+    changed = []
+    aggregates = Aggregates(model.stats_of, model.is_favorite, lambda: changed.append(True))
+    aggregates.set_view(LIBRARY_VIEW, [])
+    aggregates.set_view(FAVORITES_VIEW, [])
+    serial = 0
+    for step in range(2000):
+        library = sorted(model.library)
+        action = rng.random()
+        if action < 0.25 or not library:
+            # Songs appear (scan / import)
+            new = []
+            for _ in range(rng.randrange(1, 6)):
+                serial += 1
+                track = f"song{serial}.mp3"
+                model.stats[track] = random_stats(rng)
+                new.append(track)
+            model.library.update(new)
+            aggregates.add(LIBRARY_VIEW, new)
+        elif action < 0.35:
+            # Songs disappear from disk
+            gone = rng.sample(library, min(len(library), rng.randrange(1, 4)))
+            model.library.difference_update(gone)
+            aggregates.forget(gone)
+        elif action < 0.5:
+            # A rename: the old key leaves every view; the new one is scanned first and enters
+            # the favorites and playlists once its id is known (as refresh_ref_views does)
+            old = rng.choice(library)
+            serial += 1
+            new = f"renamed{serial}.mp3"
+            model.stats[new] = model.stats[old]
+            model.library.discard(old)
+            model.library.add(new)
+            aggregates.forget([old])
+            aggregates.add(LIBRARY_VIEW, [new])
+            if old in model.favorites:
+                model.favorites.discard(old)
+                model.favorites.add(new)
+                aggregates.set_favorite([new], True)
+            for name, songs in model.playlists.items():
+                if old in songs:
+                    songs.discard(old)
+                    songs.add(new)
+                    aggregates.add(playlist_view(name), [new])
+        elif action < 0.6:
+            track = rng.choice(library)
+            favorite = track not in model.favorites
+            (model.favorites.add if favorite else model.favorites.discard)(track)
+            aggregates.set_favorite([track], favorite)
+        elif action < 0.65:
+            name = f"list{rng.randrange(5)}"
+            if name in model.playlists and rng.random() < 0.5:
+                del model.playlists[name]
+                aggregates.drop_view(playlist_view(name))
+            else:
+                songs = set(rng.sample(library, min(len(library), rng.randrange(0, 8))))
+                model.playlists[name] = songs
+                aggregates.set_view(playlist_view(name), songs)
+        elif action < 0.85 and model.playlists:
+            name = rng.choice(sorted(model.playlists))
+            songs = model.playlists[name]
+            if songs and rng.random() < 0.4:
+                track = rng.choice(sorted(songs))
+                songs.discard(track)
+                aggregates.remove(playlist_view(name), [track])
+            else:
+                track = rng.choice(library)
+                songs.add(track)
+                aggregates.add(playlist_view(name), [track])
+        else:
+            # Tags / durations were read
+            tracks = rng.sample(library, min(len(library), rng.randrange(1, 4)))
+            for track in tracks:
+                model.stats[track] = random_stats(rng)
+            aggregates.update(tracks)
+        views = model.members()
+        assert set(aggregates.views) == set(views), step
+        for view, tracks in views.items():
+            assert as_dict(aggregates.totals(view)) == model.recount(view, tracks), (step, view)
+            assert all(aggregates.contains(view, track) for track in tracks)
+    assert changed
+
+
+def test_changed_views_are_reported_once_until_taken():
+    stats = {"a": (1000, 10), "b": (None, 20)}
+    calls = []
+    aggregates = Aggregates(stats.get, lambda track: track == "a", lambda: calls.append(1))
+    aggregates.add(LIBRARY_VIEW, ["a", "b"])
+    aggregates.add(FAVORITES_VIEW, ["a"])
+    assert calls == [1]
+    assert aggregates.take_changed() == {LIBRARY_VIEW, FAVORITES_VIEW}
+    assert as_dict(aggregates.totals(LIBRARY_VIEW)) == {
+        "tracks": 2, "duration_ms": 1000, "unknown": 1, "bytes": 30, "favorites": 1,
+    }
+    aggregates.update(["a"])
+    assert aggregates.take_changed() == set()
+    stats["b"] = (500, 20)
+    aggregates.update(["b"])
+    assert calls == [1, 1]
+    assert aggregates.take_changed() == {LIBRARY_VIEW}
+    assert aggregates.totals(LIBRARY_VIEW).duration_ms == 1500
+    assert aggregates.totals(playlist_view("none")).tracks == 0
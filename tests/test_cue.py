@@ -0,0 +1,98 @@
+from core.cue import build_chapters, chapter_entry, parse_cue, read_cue_chapters
+from core.library import Library
+
+SHEET = """REM GENRE Electronic
+PERFORMER "Various"
+TITLE "Night Mix"
+FILE "mix.mp3" MP3
+  TRACK 01 AUDIO
+    TITLE "Opening"
+    INDEX 01 00:00:00
+  TRACK 02 AUDIO
+    TITLE "Second  Song (Live)"
+    PERFORMER "Someone Else"
+    INDEX 00 03:58:00
+    INDEX 01 04:00:37
+  TRACK 03 AUDIO
+    TITLE Unquoted
+    INDEX 01 61:02:74
+  TRACK 04 AUDIO
+    TITLE "No index"
+"""
+
+
+def test_parse_cue_reads_titles_performers_and_index_01():
+    tracks = parse_cue(SHEET)
+    assert [t["title"] for t in tracks] == ["Opening", "Second  Song (Live)", "Unquoted"]
+    assert [t["performer"] for t in tracks] == ["Various", "Someone Else", "Various"]
+    assert {t["file"] for t in tracks} == {"mix.mp3"}
+
+
+def test_index_frames_are_75_per_second():
+    starts = [t["start"] for t in parse_cue(SHEET)]
+    # 37 frames = 493.33 ms, 74 frames = 986.67 ms (rounded down)
+    assert starts == [0, 240_493, 3_662_986]
+    assert parse_cue('TRACK 01 AUDIO\nINDEX 01 00:01:75')[0]["start"] == 2000
+
+
+def test_bad_index_and_backslash_paths():
+    tracks = parse_cue('FILE "C:\\rips\\a.flac" WAVE\nTRACK 01 AUDIO\nINDEX 01 xx:00:00\nTRACK 02 AUDIO\nINDEX 01 00:10:00')
+    assert [(t["file"], t["start"]) for t in tracks] == [("C:/rips/a.flac", 10_000)]
+
+
+def test_last_chapter_ends_at_the_end_of_the_file_or_none():
+    starts = [(0, "a", ""), (1000, "b", ""), (2500, "c", "")]
+    assert [(c["start"], c["end"]) for c in build_chapters(starts, 4.25)] == [(0, 1000), (1000, 2500), (2500, 4250)]
+    assert build_chapters(starts, None)[-1]["end"] is None
+    # Empty pieces (and pieces past the end of the file) are dropped
+    assert [c["title"] for c in build_chapters(starts + [(2500, "d", "")], 2.0)] == ["a", "b"]
+    # A single piece is the file itself
+    assert build_chapters([(0, "a", "")], 4.0) == []
+
+
+def test_non_utf8_sheets(tmp_path):
+    sheet = 'FILE "mix.mp3" MP3\nTRACK 01 AUDIO\nTITLE "שיר ראשון"\nINDEX 01 00:00:00\nTRACK 02 AUDIO\nTITLE "Été"\nINDEX 01 01:00:00\n'
+    (tmp_path / "mix.cue").write_bytes(sheet.encode("utf-8-sig"))
+    assert [t for _, t, _ in read_cue_chapters(str(tmp_path / "mix.mp3"))] == ["שיר ראשון", "Été"]
+    hebrew = sheet.replace("Été", "שני")
+    (tmp_path / "mix.cue").write_bytes(hebrew.encode("cp1255"))
+    assert [t for _, t, _ in read_cue_chapters(str(tmp_path / "mix.mp3"))] == ["שיר ראשון", "שני"]
+    # Bytes cp1255 leaves undefined (0xDE) fall back to latin-1
+    (tmp_path / "mix.cue").write_bytes(sheet.replace("שיר ראשון", "Þórr").encode("latin-1"))
+    assert [t for _, t, _ in read_cue_chapters(str(tmp_path / "mix.mp3"))] == ["Þórr", "Été"]
+
+
+def test_sheet_for_several_files_keeps_the_entries_of_this_one(tmp_path):
+    (tmp_path / "album.cue").write_text(
+        'FILE "CD1\\Album.mp3" MP3\nTRACK 01 AUDIO\nTITLE "one"\nINDEX 01 00:00:00\n'
+        'FILE "other.mp3" MP3\nTRACK 02 AUDIO\nTITLE "two"\nINDEX 01 00:00:00\n'
+        'FILE "album.mp3" MP3\nTRACK 03 AUDIO\nTITLE "three"\nINDEX 01 02:00:00\n',
+        encoding="utf-8",
+    )
+    assert read_cue_chapters(str(tmp_path / "album.mp3")) == [(0, "one", ""), (120_000, "three", "")]
+    assert read_cue_chapters(str(tmp_path / "missing.mp3")) == []
+
+
+def test_virtual_tracks_map_to_chapter_offsets(tmp_path):
+    library = Library([str(tmp_path)])
+    library.add(str(tmp_path), ["before.mp3", "mix.mp3", "after.mp3"])
+    starts = [(t["start"], t["title"], t["performer"]) for t in parse_cue(SHEET)]
+    chapters = build_chapters(starts, 3700)
+    assert library.split("mix.mp3", chapters) == (["mix.mp3"], ["mix.mp3#1", "mix.mp3#2", "mix.mp3#3"])
+    assert library.tracks == ["before.mp3", "mix.mp3#1", "mix.mp3#2", "mix.mp3#3", "after.mp3"]
+    assert library.position_of == {track: i for i, track in enumerate(library.tracks)}
+    offsets = [(library.segments[k]["start"], library.segments[k]["end"]) for k in library.children["mix.mp3"]]
+    assert offsets == [(0, 240_493), (240_493, 3_662_986), (3_662_986, 3_700_000)]
+    assert library.path("mix.mp3#2") == library.path("mix.mp3")
+    assert library.parent("mix.mp3#3") == "mix.mp3"
+    assert library.playable("mix.mp3") == "mix.mp3#1"
+    entry = chapter_entry({"title": "Night Mix", "artist": "Various"}, library.segments["mix.mp3#2"], 2)
+    assert (entry["album"], entry["artist"], entry["track"], entry["duration"]) == (
+        "Night Mix", "Someone Else", "2", 3_422.493,
+    )
+    # Fewer chapters after a re-read, then none: the file is listed as itself again
+    assert library.split("mix.mp3", chapters[:2]) == (["mix.mp3#3"], [])
+    assert library.split("mix.mp3", []) == (["mix.mp3#1", "mix.mp3#2"], ["mix.mp3"])
+    assert library.tracks == ["before.mp3", "mix.mp3", "after.mp3"]
+    assert library.position_of == {"before.mp3": 0, "mix.mp3": 1, "after.mp3": 2}
+    assert library.segments == {}
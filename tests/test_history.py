@@ -0,0 +1,137 @@
+import json
+import time
+
+from core.history import PlayHistory
+from core.library import Library
+from core.track_ids import TrackRefs
+
+ID_A = "a" * 32
+ID_B = "b" * 32
+
+
+def open_history(tmp_path, **kwargs):
+    return PlayHistory(str(tmp_path / "history.log"), str(tmp_path / "history_stats.json"), **kwargs)
+
+
+def log_lines(tmp_path):
+    return (tmp_path / "history.log").read_text(encoding="utf-8").splitlines()
+
+
+def test_log_is_replayed_on_startup(tmp_path):
+    history = open_history(tmp_path)
+    now = time.time()
+    history.record("x.mp3", now - 30, 10.0, True)
+    history.record("x.mp3", now - 20, 2.0, False)
+    history.record("y.mp3", now - 10, 5.0, True)
+    history.close()
+    # Three events after the header line; nothing compacted yet
+    assert len(log_lines(tmp_path)) == 4
+
+    history = open_history(tmp_path)
+    assert history.play_count("x.mp3") == 2
+    assert history.skip_rate("x.mp3") == 0.5
+    assert history.most_played() == ["x.mp3", "y.mp3"]
+    assert history.recently_played() == ["y.mp3", "x.mp3"]
+    assert history.never_played(["x.mp3", "z.mp3"]) == ["z.mp3"]
+    history.close()
+
+
+def test_compacts_every_n_events(tmp_path):
+    history = open_history(tmp_path, compact_every=5)
+    now = time.time()
+    for n in range(12):
+        history.record(f"t{n % 3}.mp3", now + n, 1.0, True)
+    # Two compactions: the log only holds the last two events
+    assert len(log_lines(tmp_path)) == 3
+    snapshot = json.loads((tmp_path / "history_stats.json").read_text(encoding="utf-8"))
+    assert sum(stats["plays"] for stats in snapshot["tracks"].values()) == 10
+    assert json.loads(log_lines(tmp_path)[0])["log_id"] == snapshot["log_id"]
+    history.close()
+
+    history = open_history(tmp_path, compact_every=5)
+    assert [history.play_count(f"t{n}.mp3") for n in range(3)] == [4, 4, 4]
+    history.close()
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    history = open_history(tmp_path)
+    history.record("x.mp3", time.time(), 3.0, True)
+    history.close()
+    # The app died in the middle of writing the next event
+    with open(tmp_path / "history.log", "a", encoding="utf-8") as f:
+        f.write('["x.mp3", 17000')
+
+    history = open_history(tmp_path)
+    assert history.play_count("x.mp3") == 1
+    history.record("x.mp3", time.time(), 3.0, True)
+    history.close()
+    assert open_history(tmp_path).play_count("x.mp3") == 2
+
+
+def test_old_log_next_to_new_snapshot_is_not_counted_twice(tmp_path):
+    history = open_history(tmp_path)
+    history.record("x.mp3", time.time(), 3.0, True)
+    history.record("x.mp3", time.time(), 3.0, True)
+    history.close()
+    old_log = (tmp_path / "history.log").read_text(encoding="utf-8")
+    # Crash between the two steps of compact(): the snapshot is written, the log not replaced
+    history = open_history(tmp_path)
+    history.compact()
+    history.close()
+    (tmp_path / "history.log").write_text(old_log, encoding="utf-8")
+
+    history = open_history(tmp_path)
+    assert history.play_count("x.mp3") == 2
+    # ... and the stale log was replaced by one matching the snapshot
+    snapshot = json.loads((tmp_path / "history_stats.json").read_text(encoding="utf-8"))
+    assert json.loads(log_lines(tmp_path)[0])["log_id"] == snapshot["log_id"]
+    history.close()
+
+
+def make_refs(tmp_path, names):
+    library = Library([str(tmp_path / "songs")])
+    library.add(library.roots[0], names)
+    return library, TrackRefs(library)
+
+
+def test_migrate_moves_path_entries_to_content_ids(tmp_path):
+    library, refs = make_refs(tmp_path, ["a.mp3", "b.mp3"])
+    history = open_history(tmp_path, refs=refs)
+    now = time.time()
+    # Recorded before the ids were known
+    history.record("a.mp3", now - 20, 1.0, False)
+    history.record("b.mp3", now - 10, 1.0, True)
+    refs.add([("a.mp3", ID_A)])
+    history.record("a.mp3", now, 4.0, True)
+    assert set(history.tracks) == {"a.mp3", "b.mp3", ID_A}
+
+    assert history.migrate()
+    assert set(history.tracks) == {ID_A, "b.mp3"}
+    stats = history.tracks[ID_A]
+    assert (stats["plays"], stats["completed"], stats["skips"]) == (2, 1, 1)
+    assert history.most_played() == ["a.mp3", "b.mp3"]
+    assert history.recently_played() == ["a.mp3", "b.mp3"]
+    # Nothing left to move until another id is known
+    assert not history.migrate()
+    history.close()
+
+    # The migrated counters were written out
+    history = open_history(tmp_path, refs=refs)
+    assert history.play_count("a.mp3") == 2
+    history.close()
+
+
+def test_history_follows_a_rename(tmp_path):
+    library, refs = make_refs(tmp_path, ["a.mp3"])
+    refs.add([("a.mp3", ID_A)])
+    history = open_history(tmp_path, refs=refs)
+    history.record("a.mp3", time.time(), 4.0, True)
+    # The file is renamed: the old key leaves the library, the new one has the same id
+    library.reconcile(library.roots[0], [])
+    refs.forget(["a.mp3"])
+    library.add(library.roots[0], ["renamed.mp3"])
+    refs.add([("renamed.mp3", ID_A)])
+    assert history.play_count("renamed.mp3") == 1
+    assert history.most_played() == ["renamed.mp3"]
+    assert history.never_played(["renamed.mp3"]) == []
+    history.close()
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+
+from core import importer as importer_module
+from core.importer import LibraryImporter
+from core.track_ids import content_id
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+class Run:
+    # Runs one import to the end and keeps what the callbacks reported
+    def __init__(self, root, workers=2):
+        self.landed = []
+        self.result = None
+        self.finished = threading.Event()
+        self.importer = LibraryImporter(
+            str(root), lambda root, paths: self.landed.extend(paths), lambda done, total: None,
+            self._finished, workers=workers,
+        )
+
+    def _finished(self, counts):
+        self.result = counts
+        self.finished.set()
+
+    def __call__(self, sources, existing=()):
+        assert self.importer.start([str(s) for s in sources], existing)
+        assert self.finished.wait(10)
+        return self.result
+
+
+def files_under(root):
+    return sorted(
+        os.path.relpath(os.path.join(d, f), root).replace(os.sep, "/") for d, _, fs in os.walk(root) for f in fs
+    )
+
+
+def test_copies_files_and_folders(tmp_path):
+    incoming = tmp_path / "incoming"
+    write(incoming / "album" / "one.mp3", b"1" * 300)
+    write(incoming / "album" / "cover.jpg", b"jpg")
+    write(incoming / "two.wav", b"2" * 300)
+    root = tmp_path / "library"
+    run = Run(root)
+    counts = run([incoming / "album", incoming / "two.wav"])
+    assert counts == {"copied": 2, "skipped": 0, "failed": 0, "cancelled": False}
+    assert files_under(root) == ["album/one.mp3", "two.wav"]
+    assert sorted(run.landed) == ["album/one.mp3", "two.wav"]
+
+
+def test_duplicates_of_the_library_and_of_each_other_are_skipped(tmp_path):
+    root = tmp_path / "library"
+    existing = write(root / "old.mp3", b"same" * 100)
+    incoming = tmp_path / "incoming"
+    write(incoming / "again.mp3", b"same" * 100)
+    write(incoming / "a" / "new.mp3", b"new!" * 100)
+    write(incoming / "b" / "new copy.mp3", b"new!" * 100)
+    write(incoming / "c" / "new.mp3", b"new!" * 100)
+    counts = Run(root, workers=4)([incoming], [(existing, None, None)])
+    assert counts["copied"] == 1
+    assert counts["skipped"] == 3
+    copied = files_under(root)
+    assert len(copied) == 2 and "old.mp3" in copied
+    assert any(name.startswith("incoming/") and "new" in name for name in copied)
+
+
+def test_same_name_different_content_gets_a_new_name(tmp_path):
+    root = tmp_path / "library"
+    write(root / "song.mp3", b"old" * 10)
+    write(tmp_path / "in" / "song.mp3", b"new" * 11)
+    Run(root)([tmp_path / "in" / "song.mp3"])
+    assert files_under(root) == ["song (2).mp3", "song.mp3"]
+
+
+def test_failed_copy_leaves_no_part_file(tmp_path, monkeypatch):
+    root = tmp_path / "library"
+    write(tmp_path / "in" / "bad.mp3", b"b" * 500)
+    write(tmp_path / "in" / "good.mp3", b"g" * 500)
+
+    def copystat(source, target):
+        if source.endswith("bad.mp3"):
+            raise OSError("disk full")
+
+    monkeypatch.setattr(importer_module.shutil, "copystat", copystat)
+    counts = Run(root)([tmp_path / "in"])
+    assert (counts["copied"], counts["failed"]) == (1, 1)
+    assert files_under(root) == ["in/good.mp3"]
+
+
+def test_cancel_leaves_no_part_file(tmp_path, monkeypatch):
+    root = tmp_path / "library"
+    write(tmp_path / "in" / "big.mp3", b"x" * (importer_module.COPY_CHUNK * 3))
+    run = Run(root, workers=1)
+    copy = importer_module.LibraryImporter._copy
+
+    def cancel_then_copy(self, source, target):
+        self.cancel()
+        return copy(self, source, target)
+
+    monkeypatch.setattr(importer_module.LibraryImporter, "_copy", cancel_then_copy)
+    counts = run([tmp_path / "in"])
+    assert counts["cancelled"]
+    assert counts["copied"] == 0
+    assert files_under(root) == []
+
+
+def test_duplicate_is_imported_when_the_copy_it_waited_for_fails(tmp_path, monkeypatch):
+    root = tmp_path / "library"
+    first = write(tmp_path / "in" / "a" / "song.mp3", b"s" * 500)
+    write(tmp_path / "in" / "b" / "song.mp3", b"s" * 500)
+    song_id = content_id(first)
+    run = Run(root, workers=2)
+    failed_once = []
+
+    def copystat(source, target):
+        if not failed_once:
+            failed_once.append(source)
+            # Fail only once the other copy is waiting for this one
+            deadline = time.monotonic() + 5
+            while not run.importer._pending.get(song_id) and time.monotonic() < deadline:
+                time.sleep(0.001)
+            assert run.importer._pending.get(song_id)
+            raise OSError("device went away")
+
+    monkeypatch.setattr(importer_module.shutil, "copystat", copystat)
+    counts = run([tmp_path / "in"])
+    assert (counts["copied"], counts["failed"], counts["skipped"]) == (1, 1, 0)
+    copied = files_under(root)
+    assert len(copied) == 1 and copied[0].endswith("song.mp3")
+    assert not any(name.endswith(".part") for name in copied)
@@ -0,0 +1,124 @@
+import random
+
+from core.play_queue import PlayQueue
+
+TRACKS = [f"t{n}" for n in range(6)]
+
+
+def make_queue(**kwargs):
+    return PlayQueue(list(TRACKS), rng=random.Random(7), **kwargs)
+
+
+def test_library_order_wraps_around():
+    queue = make_queue()
+    assert [queue.advance() for _ in range(7)] == TRACKS[1:] + TRACKS[:2]
+
+
+def test_repeat_once_replays_the_song_once():
+    queue = make_queue()
+    queue.select(2)
+    assert queue.cycle_repeat() == "once"
+    assert queue.peek_next() == "t2"
+    assert queue.advance() == "t2"
+    assert queue.repeat_mode == "none"
+    assert queue.advance() == "t3"
+
+
+def test_repeat_always_keeps_the_song():
+    queue = make_queue()
+    queue.select(4)
+    queue.cycle_repeat()
+    assert queue.cycle_repeat() == "always"
+    assert [queue.advance() for _ in range(5)] == ["t4"] * 5
+    assert queue.cycle_repeat() == "none"
+    assert queue.advance() == "t5"
+
+
+def test_shuffle_peek_matches_advance():
+    queue = make_queue()
+    queue.toggle_shuffle()
+    for _ in range(200):
+        expected = queue.peek_next()
+        # Peeking twice draws nothing new
+        assert queue.peek_next() == expected
+        assert queue.advance() == expected
+
+
+def test_shuffle_upcoming_is_what_plays():
+    queue = make_queue()
+    queue.toggle_shuffle()
+    upcoming = queue.upcoming(4)
+    assert [queue.advance() for _ in range(4)] == upcoming
+
+
+def test_shuffle_peek_matches_advance_in_a_playlist():
+    queue = make_queue()
+    queue.toggle_shuffle()
+    queue.play_playlist("mix", ["t5", "t1", "t3"], 0)
+    for _ in range(100):
+        expected = queue.peek_next()
+        assert queue.advance() == expected
+        assert expected in ("t5", "t1", "t3")
+
+
+def test_playlist_plays_in_its_own_order():
+    queue = make_queue()
+    assert queue.play_playlist("mix", ["t5", "t1", "t3"], 0) == "t5"
+    assert [queue.advance() for _ in range(4)] == ["t1", "t3", "t5", "t1"]
+
+
+def test_playlist_edit_keeps_following_the_current_song():
+    queue = make_queue()
+    queue.play_playlist("mix", ["t5", "t1", "t3"], 1)
+    queue.update_playlist(["t0", "t3", "t1"])
+    assert queue.current() == "t1"
+    assert queue.playlist_index == 2
+    assert queue.advance() == "t0"
+
+
+def test_playlist_edit_removing_the_current_song():
+    queue = make_queue()
+    queue.play_playlist("mix", ["t5", "t1", "t3"], 2)
+    queue.update_playlist(["t5", "t1"])
+    # The song keeps playing; the queue continues from the nearest position
+    assert queue.current() == "t3"
+    assert queue.playlist_index == 1
+    assert queue.advance() == "t5"
+
+
+def test_playlist_emptied_while_playing_falls_back_to_the_library():
+    queue = make_queue()
+    queue.play_playlist("mix", ["t5", "t1"], 0)
+    queue.update_playlist([])
+    assert queue.playlist_name is None
+    assert queue.advance() == "t0"
+
+
+def test_back_steps_to_the_previous_song():
+    queue = make_queue()
+    queue.select(1)
+    assert queue.back() == "t0"
+    assert queue.back() == "t5"
+
+
+def test_back_in_a_playlist():
+    queue = make_queue()
+    queue.play_playlist("mix", ["t5", "t1", "t3"], 0)
+    assert queue.back() == "t3"
+    assert queue.back() == "t1"
+
+
+def test_order_hook_decides_the_library_order():
+    order = [5, 3, 1, 0, 2, 4]
+    rank = {position: n for n, position in enumerate(order)}
+    queue = make_queue(order=lambda: (order, rank))
+    queue.select(5)
+    assert [queue.advance() for _ in range(6)] == ["t3", "t1", "t0", "t2", "t4", "t5"]
+    assert queue.back() == "t4"
+
+
+def test_similar_hook_takes_over_at_the_library_end():
+    queue = make_queue(similar=lambda track: "t2")
+    queue.select(5)
+    assert queue.peek_next() == "t2"
+    assert queue.advance() == "t2"
@@ -0,0 +1,77 @@
+import json
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.audio_features import FEATURE_DIM
+from core.similarity import AutoDJ, FeatureStore, SimilarityIndex
+
+
+def track_id(n):
+    return f"{n:032x}"
+
+
+def make_store(tmp_path):
+    return FeatureStore(str(tmp_path / "features.f32"), str(tmp_path / "features.json"))
+
+
+def test_features_are_kept_by_content_id(tmp_path):
+    store = make_store(tmp_path)
+    vectors = np.random.default_rng(0).standard_normal((3, FEATURE_DIM)).astype(np.float32)
+    for n, vector in enumerate(vectors):
+        store.put(track_id(n), vector)
+    store.save()
+    again = make_store(tmp_path)
+    assert again.count == 3 and all(again.has(track_id(n)) for n in range(3))
+    ids, stored = again.snapshot()
+    assert ids == [track_id(0), track_id(1), track_id(2)]
+    assert np.array_equal(stored, vectors)
+
+
+def test_path_keyed_index_of_older_versions_is_dropped(tmp_path):
+    store = make_store(tmp_path)
+    store.put(track_id(1), np.ones(FEATURE_DIM, np.float32))
+    store.save()
+    (tmp_path / "features.json").write_text(json.dumps({"count": 1, "rows": {"song.mp3": [0, 12.5]}}))
+    again = make_store(tmp_path)
+    assert (again.count, again.rows) == (0, {})
+    again.put(track_id(2), np.zeros(FEATURE_DIM, np.float32))
+    assert again.row(track_id(2)) == 0
+
+
+def test_snapshot_is_a_view_that_survives_growth(tmp_path):
+    store = make_store(tmp_path)
+    for n in range(10):
+        store.put(track_id(n), np.full(FEATURE_DIM, n, np.float32))
+    ids, vectors = store.snapshot()
+    assert np.shares_memory(vectors, store.matrix)
+    # The matrix is mapped anew when it grows; the snapshot keeps its rows
+    for n in range(10, 1500):
+        store.put(track_id(n), np.full(FEATURE_DIM, n, np.float32))
+    assert len(store.matrix) >= 1500
+    assert len(ids) == len(vectors) == 10
+    assert [float(v[0]) for v in vectors] == list(range(10))
+
+
+def test_auto_dj_picks_by_content_id(tmp_path):
+    rng = np.random.default_rng(1)
+    centres = rng.standard_normal((2, FEATURE_DIM)) * 10
+    store = make_store(tmp_path)
+    for n in range(40):
+        store.put(track_id(n), (centres[n % 2] + rng.standard_normal(FEATURE_DIM) * 0.1).astype(np.float32))
+    index = SimilarityIndex(*store.snapshot())
+    assert all(int(other, 16) % 2 == 0 for other, _ in index.neighbours(track_id(0), 5))
+    dj = AutoDJ(store=store, workers=1)
+    try:
+        deadline = time.monotonic() + 10
+        while dj.index is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        avoid = {track_id(n) for n in range(2, 40, 4)}
+        for _ in range(20):
+            picked = dj.pick_next(track_id(0), avoid=avoid, exists=lambda other: other != track_id(4))
+            assert int(picked, 16) % 2 == 0 and picked not in avoid | {track_id(0), track_id(4)}
+        assert dj.pick_next(track_id(99)) is None
+    finally:
+        dj.shutdown()
@@ -0,0 +1,87 @@
+import pytest
+
+from core.playback_backend import ENDED, ERROR, OPENING, PAUSED, PLAYING, PlaybackBackend
+from core.simulated_backend import SimulatedBackend, VirtualClock
+
+
+def make_backend(**kwargs):
+    clock = VirtualClock()
+    return clock, SimulatedBackend(clock, lengths={"a": 1000, "b": 2000}, **kwargs)
+
+
+def test_opening_playing_ended():
+    clock, backend = make_backend(open_delay_ms=50)
+    backend.play_song("a")
+    assert backend.get_state() == OPENING
+    clock.advance(50)
+    assert backend.get_state() == PLAYING
+    clock.advance(400)
+    assert backend.get_time() == 400
+    clock.advance(600)
+    assert backend.get_state() == ENDED
+    assert backend.get_time() == 1000
+    assert backend.stats["ends"] == 1
+
+
+def test_pause_stops_the_clock():
+    clock, backend = make_backend()
+    backend.play_song("b")
+    clock.advance(300)
+    backend.pause()
+    assert backend.get_state() == PAUSED
+    clock.advance(5000)
+    assert backend.get_time() == 300
+    backend.play()
+    clock.advance(100)
+    assert backend.get_time() == 400
+
+
+def test_failing_path_reaches_error():
+    clock, backend = make_backend(fail_paths={"b"})
+    backend.play_song("b")
+    assert backend.get_state() == ERROR
+    assert backend.get_time() == -1
+    assert backend.get_length() == 0
+    assert backend.stats["errors"] == 1
+    # The next song still plays
+    backend.play_song("a")
+    clock.advance(1000)
+    assert backend.get_state() == ENDED
+
+
+def test_fail_rate_one_fails_every_open():
+    _, backend = make_backend(fail_rate=1.0, seed=3)
+    for path in ("a", "b", "a"):
+        backend.play_song(path)
+        assert backend.get_state() == ERROR
+    assert backend.stats["errors"] == 3
+
+
+def test_failed_seek_keeps_playing_to_the_end():
+    clock, backend = make_backend(seek_fail_rate=1.0, seed=1)
+    backend.play_song("a")
+    clock.advance(200)
+    backend.set_time(900)
+    assert backend.get_time() == 200
+    assert backend.stats["failed_seeks"] == 1
+    clock.advance(800)
+    assert backend.get_state() == ENDED
+
+
+def test_seek_past_the_end_ends_the_song():
+    clock, backend = make_backend()
+    backend.play_song("a")
+    backend.set_time(5000)
+    assert backend.get_state() == ENDED
+    # Seeking an ended song is refused
+    backend.set_time(10)
+    assert backend.stats["failed_seeks"] == 1
+
+
+def test_incomplete_backend_cannot_be_created():
+    class Partial(PlaybackBackend):
+        def play_song(self, path, start_ms=0):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
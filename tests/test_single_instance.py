@@ -0,0 +1,42 @@
+import os
+import socket
+import uuid
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication, QDir
+
+from core import single_instance
+
+
+@pytest.fixture
+def server_name(monkeypatch):
+    QCoreApplication.instance() or QCoreApplication([])
+    name = f"music-player-test-{uuid.uuid4().hex}"
+    monkeypatch.setattr(single_instance, "SERVER_NAME", name)
+    yield name
+    single_instance.QLocalServer.removeServer(name)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="local sockets are files on Unix only")
+def test_listen_replaces_stale_socket(server_name):
+    # A crashed instance leaves its socket file behind with nobody listening on it
+    path = os.path.join(QDir.tempPath(), server_name)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    assert os.path.exists(path)
+
+    server = single_instance.SingleInstanceServer()
+    assert server.listen()
+    server.server.close()
+
+
+def test_second_listen_is_refused(server_name):
+    first = single_instance.SingleInstanceServer()
+    assert first.listen()
+    second = single_instance.SingleInstanceServer()
+    assert not second.listen()
+    first.server.close()
@@ -0,0 +1,102 @@
+import os
+
+from core.library import Library
+from core.sorting import SortIndex, collation_key
+
+
+def sorted_texts(texts):
+    return sorted(texts, key=collation_key)
+
+
+def test_numbers_sort_naturally():
+    names = ["Track 10", "track 2", "Track 1", "Track 02b", "Track 100", "Track"]
+    assert sorted_texts(names) == ["Track", "Track 1", "track 2", "Track 02b", "Track 10", "Track 100"]
+    assert collation_key("Song 007") == collation_key("song 7")
+
+
+def test_case_accents_and_marks_are_ignored():
+    assert collation_key("Élan") == collation_key("elan")
+    assert collation_key("STRASSE") == collation_key("straße")
+    # Niqqud and direction marks do not split a Hebrew word
+    assert collation_key("שָׁלוֹם") == collation_key("שלום")
+    assert collation_key("‏שלום‎") == collation_key("שלום")
+    # Full-width digits are numbers too
+    assert collation_key("שיר ２") == collation_key("שיר 2")
+
+
+def test_hebrew_titles_sort_alphabetically():
+    names = ["תודה", "אהבה", "שיר 10", "בית", "שיר 9", "גשם"]
+    assert sorted_texts(names) == ["אהבה", "בית", "גשם", "שיר 9", "שיר 10", "תודה"]
+
+
+def make_index(tmp_path, tracks, metadata):
+    root = str(tmp_path)
+    library = Library([root])
+    library.add(root, tracks)
+    entries = {os.path.join(root, track): entry for track, entry in metadata.items()}
+    return library, entries, SortIndex(library, entries)
+
+
+def check(index, library, mode, expected):
+    order, rank = index.order(mode)
+    assert [library.tracks[i] for i in order] == expected
+    # rank is the inverse permutation of order
+    assert sorted(order) == list(range(len(library.tracks)))
+    assert all(rank[i] == position for position, i in enumerate(order))
+
+
+def test_orders_and_their_tie_breaks(tmp_path):
+    metadata = {
+        "b.mp3": {"title": "Beta", "artist": "Zed", "album": "One", "track": "2/9", "duration": 200, "added": 5},
+        "a.mp3": {"title": "Alpha", "artist": "Zed", "album": "One", "track": "1/9", "duration": None, "added": 7},
+        "c.mp3": {"title": "Gamma", "artist": "אמן", "album": "", "track": "", "duration": 100, "added": 7},
+        "song 10.mp3": {},
+        "song 9.mp3": {},
+    }
+    library, _, index = make_index(tmp_path, list(metadata), metadata)
+    check(index, library, "title", ["a.mp3", "b.mp3", "c.mp3", "song 9.mp3", "song 10.mp3"])
+    # Unknown artists / albums go last; tracks by number inside an album
+    check(index, library, "artist", ["a.mp3", "b.mp3", "c.mp3", "song 9.mp3", "song 10.mp3"])
+    check(index, library, "album", ["a.mp3", "b.mp3", "c.mp3", "song 9.mp3", "song 10.mp3"])
+    # Newest first, unknown durations last
+    check(index, library, "added", ["a.mp3", "c.mp3", "b.mp3", "song 9.mp3", "song 10.mp3"])
+    check(index, library, "duration", ["c.mp3", "b.mp3", "a.mp3", "song 9.mp3", "song 10.mp3"])
+    assert index.group("artist", "c.mp3") == "אמן"
+    assert index.group("album", "song 9.mp3") == ""
+    assert index.group("title", "a.mp3") is None
+
+
+def test_permutation_follows_inserts_removals_and_metadata(tmp_path):
+    metadata = {f"t{n}.mp3": {"title": f"Song {n}"} for n in (5, 1, 3)}
+    library, entries, index = make_index(tmp_path, list(metadata), metadata)
+    check(index, library, "title", ["t1.mp3", "t3.mp3", "t5.mp3"])
+    before = index.order("title")
+    # New songs are appended to the library; the cached order is rebuilt around them
+    library.add(str(tmp_path), ["t4.mp3", "t2.mp3", "t0.mp3"])
+    for n in (4, 2, 0):
+        entries[os.path.join(str(tmp_path), f"t{n}.mp3")] = {"title": f"Song {n}"}
+    assert index.order("title") is before
+    index.invalidate()
+    check(index, library, "title", [f"t{n}.mp3" for n in range(6)])
+    # A tag change re-keys only that song
+    entries[os.path.join(str(tmp_path), "t0.mp3")] = {"title": "Song 9"}
+    index.invalidate(["t0.mp3"])
+    check(index, library, "title", ["t1.mp3", "t2.mp3", "t3.mp3", "t4.mp3", "t5.mp3", "t0.mp3"])
+    removed = library.reconcile(str(tmp_path), ["t0.mp3", "t2.mp3", "t4.mp3"])
+    index.invalidate(removed)
+    check(index, library, "title", ["t2.mp3", "t4.mp3", "t0.mp3"])
+    assert library.position_of == {"t4.mp3": 0, "t2.mp3": 1, "t0.mp3": 2}
+
+
+def test_chapters_sort_by_their_own_titles(tmp_path):
+    metadata = {"a.mp3": {"title": "Middle"}, "mix.mp3": {"title": "Mix", "artist": "DJ"}}
+    library, _, index = make_index(tmp_path, list(metadata), metadata)
+    library.split("mix.mp3", [
+        {"start": 0, "end": 1000, "title": "Zulu", "performer": ""},
+        {"start": 1000, "end": 2000, "title": "Alpha", "performer": "Guest"},
+    ])
+    index.invalidate()
+    check(index, library, "title", ["mix.mp3#2", "a.mp3", "mix.mp3#1"])
+    assert index.group("album", "mix.mp3#1") == "Mix"
+    assert index.group("artist", "mix.mp3#2") == "Guest"
+    assert index.keys("mix.mp3#1").track == 1
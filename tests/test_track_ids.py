@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+from core import favorites_manager, playlists_manager
+from core.library import Library
+from core.track_ids import HASH_BLOCK, TrackIds, TrackRefs, content_id, is_content_id
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def songs(tmp_path):
+    root = tmp_path / "songs"
+    write(root / "a.mp3", b"A" * 5000)
+    write(root / "b.mp3", b"B" * 5000)
+    return root
+
+
+def scan(library, root):
+    # What the scanner and the id resolution report for the files under root
+    names = sorted(os.path.relpath(os.path.join(d, f), root) for d, _, fs in os.walk(root) for f in fs)
+    library.reconcile(str(root), names)
+    library.add(str(root), names)
+
+
+def test_content_id_depends_on_content_only(tmp_path):
+    first = write(tmp_path / "one.mp3", b"x" * 100)
+    second = write(tmp_path / "sub" / "two.mp3", b"x" * 100)
+    assert is_content_id(content_id(first))
+    assert content_id(first) == content_id(second)
+    assert content_id(first) != content_id(write(tmp_path / "three.mp3", b"x" * 101))
+
+
+def test_content_id_sees_the_tail_of_large_files(tmp_path):
+    data = bytearray(b"\0" * (HASH_BLOCK * 4))
+    path = write(tmp_path / "big.mp3", bytes(data))
+    before = content_id(path)
+    data[-1] = 1
+    write(tmp_path / "big.mp3", bytes(data))
+    assert content_id(path) != before
+
+
+def test_id_cache_is_invalidated_by_mtime_and_size(tmp_path):
+    path = write(tmp_path / "a.mp3", b"A" * 100)
+    ids = TrackIds(str(tmp_path / "ids.json"))
+    first = ids.compute(path)
+    assert ids.cached(path) == first
+    # Same size, new content and mtime
+    write(tmp_path / "a.mp3", b"Z" * 100)
+    os.utime(path, (1, 1))
+    assert ids.compute(path) != first
+    # New size, mtime put back to the cached one
+    stamp = os.stat(path).st_mtime
+    write(tmp_path / "a.mp3", b"Z" * 101)
+    os.utime(path, (stamp, stamp))
+    third = ids.compute(path)
+    assert third == content_id(path)
+    ids.save()
+    assert TrackIds(str(tmp_path / "ids.json")).cached(path) == third
+
+
+def test_refs_follow_a_rename_and_a_move(songs, tmp_path):
+    library = Library([str(songs)])
+    scan(library, songs)
+    ids = TrackIds(str(tmp_path / "ids.json"))
+    refs = TrackRefs(library)
+    refs.add([(key, ids.compute(library.path(key))) for key in library.tracks])
+    ref = refs.ref("a.mp3")
+    assert is_content_id(ref)
+
+    os.makedirs(songs / "moved")
+    os.rename(songs / "a.mp3", songs / "moved" / "renamed.mp3")
+    removed = library.reconcile(str(songs), ["b.mp3", "moved/renamed.mp3"])
+    refs.forget(removed)
+    assert refs.track(ref) is None
+    added = library.add(str(songs), ["moved/renamed.mp3"])
+    refs.add([(key, ids.compute(library.path(key))) for key in added])
+    assert refs.track(ref) == "moved/renamed.mp3"
+    assert refs.ref("moved/renamed.mp3") == ref
+
+
+def test_copy_takes_over_when_the_original_goes(songs, tmp_path):
+    write(songs / "copy.mp3", b"A" * 5000)
+    library = Library([str(songs)])
+    scan(library, songs)
+    refs = TrackRefs(library)
+    refs.add([(key, content_id(library.path(key))) for key in library.tracks])
+    ref = refs.ref("a.mp3")
+    assert refs.ref("copy.mp3") == ref
+    holder = refs.track(ref)
+    refs.forget([holder])
+    assert refs.track(ref) == ({"a.mp3", "copy.mp3"} - {holder}).pop()
+
+
+def test_favorites_and_playlists_survive_a_rename(songs, tmp_path, monkeypatch):
+    monkeypatch.setattr(favorites_manager, "FAVORITES_FILE", str(tmp_path / "favorites.txt"))
+    monkeypatch.setattr(playlists_manager, "PLAYLISTS_FILE", str(tmp_path / "playlists.json"))
+    library = Library([str(songs)])
+    scan(library, songs)
+    refs = TrackRefs(library)
+    refs.add([(key, content_id(library.path(key))) for key in library.tracks])
+    favorites = favorites_manager.FavoritesManager(refs)
+    playlists = playlists_manager.PlaylistsManager(refs)
+    favorites.add("a.mp3")
+    playlists.create_playlist("mix", ["b.mp3", "a.mp3"])
+
+    os.rename(songs / "a.mp3", songs / "z.mp3")
+    refs.forget(library.reconcile(str(songs), ["b.mp3", "z.mp3"]))
+    added = library.add(str(songs), ["z.mp3"])
+    refs.add([(key, content_id(library.path(key))) for key in added])
+
+    # Read back from disk, as after a restart
+    favorites = favorites_manager.FavoritesManager(refs)
+    playlists = playlists_manager.PlaylistsManager(refs)
+    assert favorites.is_favorite("z.mp3")
+    assert playlists.get_songs("mix") == ["b.mp3", "z.mp3"]
+    assert playlists.playlists_of("z.mp3") == {"mix"}
+
+
+def test_legacy_filename_entries_migrate_to_ids(songs, tmp_path, monkeypatch):
+    monkeypatch.setattr(favorites_manager, "FAVORITES_FILE", str(tmp_path / "favorites.txt"))
+    (tmp_path / "favorites.txt").write_text('["a.mp3"]', encoding="utf-8")
+    library = Library([str(songs)])
+    scan(library, songs)
+    refs = TrackRefs(library)
+    favorites = favorites_manager.FavoritesManager(refs)
+    assert favorites.is_favorite("a.mp3")
+    refs.add([(key, content_id(library.path(key))) for key in library.tracks])
+    assert favorites.migrate()
+    assert favorites.favorites == {refs.ref("a.mp3")}
+    assert favorites.is_favorite("a.mp3")
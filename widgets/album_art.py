@@ -0,0 +1,93 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from core.album_art import ArtDiskCache, find_cover
+
+COVER_SIZE = 200
+ROW_SIZE = 40
+# Upper bound for decoded pixmaps kept in memory (bytes, 4 per pixel)
+MEMORY_BUDGET = 24 * 1024 * 1024
+
+
+class AlbumArtLoader(QObject):
+    # Extracts, decodes and scales cover art on worker threads.
+    # Results are kept in a byte-bounded LRU of pixmaps and announced with art_ready.
+    art_ready = pyqtSignal(str, int)
+    _image_loaded = pyqtSignal(str, int, object)
+
+    def __init__(self, parent=None, memory_budget=MEMORY_BUDGET):
+        super().__init__(parent)
+        self.disk_cache = ArtDiskCache()
+        self.memory_budget = memory_budget
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._pending = set()
+        self._visible_rows = frozenset()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="album-art")
+        self._image_loaded.connect(self._store)
+
+    def cached(self, track, size):
+        # Pixmap from memory (null pixmap: the track has no art), None if not loaded yet
+        key = (track, size)
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+        return pixmap
+
+    def request(self, track, path, size):
+        key = (track, size)
+        if key in self._memory or key in self._pending:
+            return
+        self._pending.add(key)
+        self._pool.submit(self._load, track, path, size)
+
+    def set_visible_rows(self, tracks):
+        # Queued row thumbnails of tracks scrolled out of view are dropped before decoding
+        self._visible_rows = frozenset(tracks)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.disk_cache.save()
+
+    def _load(self, track, path, size):
+        if size == ROW_SIZE and track not in self._visible_rows:
+            self._image_loaded.emit(track, size, None)
+            return
+        image = QImage()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            self._image_loaded.emit(track, size, image)
+            return
+        content_hash = self.disk_cache.lookup(path, mtime)
+        if content_hash:
+            image.load(self.disk_cache.thumbnail_path(content_hash, size))
+        if image.isNull() and content_hash != "":
+            data = find_cover(path)
+            content_hash = self.disk_cache.remember(path, mtime, data)
+            if data and image.loadFromData(data):
+                image = image.scaled(
+                    size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+                )
+                os.makedirs(self.disk_cache.cache_dir, exist_ok=True)
+                image.save(self.disk_cache.thumbnail_path(content_hash, size), "PNG")
+        self._image_loaded.emit(track, size, image)
+
+    def _store(self, track, size, image):
+        key = (track, size)
+        self._pending.discard(key)
+        if image is None:
+            return
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        cost = max(pixmap.width() * pixmap.height() * 4, 64)
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= max(old.width() * old.height() * 4, 64)
+        self._memory[key] = pixmap
+        self._memory_used += cost
+        while self._memory_used > self.memory_budget and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._memory_used -= max(old.width() * old.height() * 4, 64)
+        self.art_ready.emit(track, size)
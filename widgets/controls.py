@@ -1,80 +1,45 @@
 from PyQt6.QtWidgets import QPushButton, QHBoxLayout
 
+def control_button(text, slot, size=None):
+    # Look comes from the app stylesheet (widgets/theme.py) via the role/size properties
+    btn = QPushButton(text)
+    btn.setProperty("role", "control")
+    if size:
+        btn.setProperty("size", size)
+    btn.clicked.connect(slot)
+    return btn
+
 def create_controls(player):
     controls = QHBoxLayout()
     controls.setSpacing(18)
-    btn_style = """
-        QPushButton {
-            background: #FFD700;
-            color: #00BFFF;
-            border-radius: 24px;
-            font-size: 22px;
-            min-width: 48px;
-            min-height: 48px;
-            font-family: 'Segoe UI', Arial, sans-serif;
-            font-weight: bold;
-            border: 2px solid #e6c200;
-        }
-        QPushButton:hover {
-            background: #FFF5B7;
-            color: #164B74;
-            border: 2px solid #bfa600;
-        }
-        QPushButton:pressed {
-            background: #e6c200;
-            color: #164B74;
-            border: 2px solid #bfa600;
-        }
-    """
-    player.fav_btn = QPushButton("⭐")
-    player.fav_btn.setStyleSheet(btn_style + "QPushButton { font-size: 18px; min-width: 40px; min-height: 40px; }")
-    player.fav_btn.clicked.connect(player.toggle_favorite)
+    player.fav_btn = control_button("⭐", player.toggle_favorite, "small")
     controls.addWidget(player.fav_btn)
 
-    player.show_fav_btn = QPushButton("מועדפים")
-    player.show_fav_btn.setStyleSheet(btn_style + "QPushButton { font-size: 14px; min-width: 80px; min-height: 40px; }")
-    player.show_fav_btn.clicked.connect(player.show_favorites)
+    player.show_fav_btn = control_button("מועדפים", player.show_favorites, "text")
     controls.addWidget(player.show_fav_btn)
 
-    player.prev_btn = QPushButton("⏮")
-    player.prev_btn.setStyleSheet(btn_style)
-    player.prev_btn.clicked.connect(player.prev_song)
+    player.prev_btn = control_button("⏮", player.prev_song)
     controls.addWidget(player.prev_btn)
 
-    player.play_pause_btn = QPushButton("▶")
-    player.play_pause_btn.setStyleSheet(
-        btn_style + "QPushButton { font-size: 28px; min-width: 56px; min-height: 56px; }"
-    )
-    player.play_pause_btn.clicked.connect(player.toggle_play_pause)
+    player.play_pause_btn = control_button("▶", player.toggle_play_pause, "large")
     controls.addWidget(player.play_pause_btn)
 
-    player.next_btn = QPushButton("⏭")
-    player.next_btn.setStyleSheet(btn_style)
-    player.next_btn.clicked.connect(player.next_song)
+    player.next_btn = control_button("⏭", player.next_song)
     controls.addWidget(player.next_btn)
 
-    player.repeat_btn = QPushButton("🔁")
-    player.repeat_btn.setStyleSheet(
-        btn_style + "QPushButton { font-size: 18px; min-width: 40px; min-height: 40px; }"
-    )
-    player.repeat_btn.clicked.connect(player.toggle_repeat)
+    player.repeat_btn = control_button("🔁", player.toggle_repeat, "small")
     controls.addWidget(player.repeat_btn)
 
-    player.shuffle_btn = QPushButton("🔀")
-    player.shuffle_btn.setStyleSheet(
-        btn_style + "QPushButton { font-size: 18px; min-width: 40px; min-height: 40px; }"
-    )
-    player.shuffle_btn.clicked.connect(player.toggle_shuffle)
+    player.shuffle_btn = control_button("🔀", player.toggle_shuffle, "small")
     controls.addWidget(player.shuffle_btn)
 
-    player.add_to_playlist_btn = QPushButton("הוסף")
-    player.add_to_playlist_btn.setStyleSheet(btn_style + "QPushButton { font-size: 14px; min-width: 80px; min-height: 40px; }")
-    player.add_to_playlist_btn.clicked.connect(player.add_current_song_to_playlist)
+    player.auto_dj_btn = control_button("📻", player.toggle_auto_dj, "small")
+    controls.addWidget(player.auto_dj_btn)
+
+    player.add_to_playlist_btn = control_button("הוסף", player.add_current_song_to_playlist, "text")
     controls.addWidget(player.add_to_playlist_btn)
 
-    player.remove_from_playlist_btn = QPushButton("הסר")
-    player.remove_from_playlist_btn.setStyleSheet(btn_style + "QPushButton { font-size: 14px; min-width: 80px; min-height: 40px; }")
-    player.remove_from_playlist_btn.clicked.connect(player.remove_current_song_from_playlist)
+    player.remove_from_playlist_btn = control_button("הסר", player.remove_current_song_from_playlist, "text")
     controls.addWidget(player.remove_from_playlist_btn)
 
     return controls
\ No newline at end of file
@@ -2,64 +2,217 @@
 # This is the central widget that manages playback, playlists, favorites, and all user interactions
 import sys
 import os
-import random
-import json
-import vlc
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QFont, QColor, QKeySequence, QShortcut
+import time
+import bisect
+from PyQt6.QtCore import Qt, QTimer, QObject, QPoint, QSize, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QKeySequence, QShortcut, QIcon
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QInputDialog, QHBoxLayout, QLabel, QFrame, QSplitter, QLineEdit, QMessageBox, QListWidgetItem, QPushButton, QMenu, QListWidget
+    QWidget, QVBoxLayout, QInputDialog, QHBoxLayout, QLabel, QFrame, QSplitter, QMessageBox, QListWidgetItem, QMenu, QListWidget
 )
 from widgets.slider import ClickableSlider
 from widgets.controls import create_controls
 from widgets.sidebar import create_sidebar
+from widgets.theme import apply_theme, set_active
+from widgets.album_art import AlbumArtLoader, COVER_SIZE, ROW_SIZE
+from widgets.spectrum import SpectrumView
 from core.playlists_manager import PlaylistsManager
+from core.favorites_manager import FavoritesManager
+from core.settings_manager import SettingsManager
+from core.library import Library, LibraryScanner, RootCache, AUDIO_EXTENSIONS
+from core.track_ids import TrackIds, TrackRefs
+from core.metadata import MetadataCache
+from core.aggregates import Aggregates, LIBRARY_VIEW, FAVORITES_VIEW, playlist_view
+from core.sorting import SortIndex, SORT_ORDERS, GROUPED_ORDERS
+from core.history import PlayHistory
+from core.utils import display_name, format_time_ms, format_duration, format_size, longest_increasing, song_row_keys
+from core.playback_clock import PlaybackClock
+from core.playback_backend import ENDED, ERROR, PAUSED, PLAYING
+from core.play_queue import PlayQueue
+from core.crossfade import CrossfadeBackend
+from core.importer import LibraryImporter
+from core.prefetch import Prefetcher, PREFETCH_TRACKS, PREFETCH_BUDGET_MB
+from core.spectrum import SampleRing, SpectrumAnalyzer, SPECTRUM_AVAILABLE
+from core.similarity import AutoDJ, AUTO_DJ_AVAILABLE
 
-# All mp3 files should be placed in this directory
+# Default library folder; more roots can be listed under "library_roots" in settings.json
 SONGS_DIR = os.path.join(sys.path[0], "songs")
+# At most one seek is sent to libVLC per interval while dragging; the latest position wins
+SEEK_INTERVAL_MS = 150
+# Redraw rate of the seek bar / position label (driven by the local playback clock)
+POSITION_REFRESH_MS = 33
+# Bursts of library / metadata changes re-sort the song pages at most this often
+RESORT_DELAY_MS = 300
+# Content ids arrive in chunks while hashing; favorites / playlist views follow at most this often
+REFS_REFRESH_MS = 500
+# Changed totals (track count, duration, size) of the views are relabelled at most this often
+VIEW_STATS_DELAY_MS = 100
+# The songs page inserts / removes only the rows that changed; when more than this many
+# rows (and more than half the rows kept) are new, it is refilled in one go instead
+SONG_PAGE_REBUILD_MIN = 256
+# Playlist rows show "name\ntotals"; the name itself is kept under this role
+PLAYLIST_NAME_ROLE = Qt.ItemDataRole.UserRole + 1
+# Auto-DJ does not pick any of the last N played songs
+AUTO_DJ_AVOID_RECENT = 50
+REPEAT_LABELS = {"none": "🔁", "once": "🔁1", "always": "🔁♾️"}
+
+class LibrarySignals(QObject):
+    # Carries scanner results from worker threads to the UI thread
+    batch_found = pyqtSignal(str, list)
+    root_done = pyqtSignal(str, object)
+    metadata_loaded = pyqtSignal(list)
+    ids_resolved = pyqtSignal(list)
+    import_landed = pyqtSignal(str, list)
+    import_progress = pyqtSignal(int, int)
+    import_finished = pyqtSignal(object)
+
+class PlaybackSignals(QObject):
+    # A crossfading backend started the queued next song (from its scheduler thread)
+    next_started = pyqtSignal(str)
 
 class MusicPlayer(QWidget):
-    def __init__(self):
+    def __init__(self, backend=None):
+        # backend: a core.playback_backend.PlaybackBackend (default: libVLC)
         super().__init__()
         # Window setup
         self.setWindowTitle("Re'em - Music Player")
         self.setMinimumSize(700, 420)
+        # Library (possibly several roots, scanned in the background)
+        self.settings = SettingsManager()
+        self.library = Library(self.settings.get("library_roots") or [SONGS_DIR])
+        self.songs = self.library.tracks
+        # Content ids: favorites and playlists store these, so entries survive renames and moves
+        self.track_ids = TrackIds()
+        self.track_refs = TrackRefs(self.library)
         # Favorites management
-        self.favorites = set()
-        self.favorites_file = os.path.join(sys.path[0], "favorites.txt")
-        self.load_favorites()
+        self.favorites_manager = FavoritesManager(self.track_refs)
         # Playlist manager
-        self.playlists_manager = PlaylistsManager()
-        # Playback state
-        self.current_song_index = 0
-        self.repeat_mode = "none"
-        self.shuffle = False
+        self.playlists_manager = PlaylistsManager(self.track_refs)
+        self.library_signals = LibrarySignals()
+        self.library_signals.batch_found.connect(self.on_library_batch)
+        self.library_signals.root_done.connect(self.on_library_root_done)
+        self.library_signals.metadata_loaded.connect(self.on_metadata_loaded)
+        self.library_signals.ids_resolved.connect(self.on_ids_resolved)
+        self.library_signals.import_landed.connect(self.on_import_landed)
+        self.library_signals.import_progress.connect(self.on_import_progress)
+        self.library_signals.import_finished.connect(self.on_import_finished)
+        self.scanner = LibraryScanner(
+            self.library_signals.batch_found.emit, self.library_signals.root_done.emit
+        )
+        # Dropped / --import files are copied into the default root; they arrive like scan results
+        self.importer = LibraryImporter(
+            self.library.roots[0],
+            self.library_signals.import_landed.emit,
+            self.library_signals.import_progress.emit,
+            self.library_signals.import_finished.emit,
+        )
+        self._pending_imports = []
+        self._imported_files = set()
+        # Tags / duration / date added, and the sorted orders built from them
+        self.metadata = MetadataCache()
+        self.sort_index = SortIndex(self.library, self.metadata)
+        self.sort_order = self.settings.get("sort_order", "title")
+        if self.sort_order not in SORT_ORDERS:
+            self.sort_order = "title"
+        # Totals per view (library, favorites, each playlist), kept current by the change
+        # notifications below and by metadata updates; never recomputed from the files
+        self.aggregates = Aggregates(self.track_stats, self.favorites_manager.is_favorite, self._schedule_view_stats)
+        self.view_stats_timer = QTimer(self)
+        self.view_stats_timer.setSingleShot(True)
+        self.view_stats_timer.setInterval(VIEW_STATS_DELAY_MS)
+        self.view_stats_timer.timeout.connect(self.update_view_stats)
+        self._playlist_items = {}
+        # Play history (what was played, for how long, skipped or completed)
+        self.history = PlayHistory(refs=self.track_refs)
+        self._history_track = None
+        # Playback state (what plays next is decided by the queue)
+        self.queue = PlayQueue(
+            self.songs, order=lambda: self.sort_index.order(self.sort_order), similar=self._similar_song
+        )
         self.is_paused = False
-        # VLC setup
-        self.instance = vlc.Instance("--quiet")
-        self.player = self.instance.media_player_new()
-        # App stylesheet
-        self.dark_stylesheet = """
-            QWidget { background: #0A2239; color: #FFD700; }
-            QLineEdit { background: #164B74; color: #FFD700; border-radius: 8px; padding: 6px; font-size: 16px; }
-            QLabel#NowPlaying { color: #00BFFF; font-size: 22px; font-weight: bold; }
-            QListWidget { background: #164B74; color: #FFD700; border-radius: 12px; }
-            QListWidget::item:selected { background: #FFD700; color: #00BFFF; font-weight: bold; }
-            QSlider::groove:horizontal { background: #1565C0; height: 8px; border-radius: 4px; }
-            QSlider::handle:horizontal { background: #FFD700; width: 18px; border-radius: 9px; }
-            QPushButton { border: none; }
-        """
-        self.setStyleSheet(self.dark_stylesheet)
+        # Upcoming songs are read ahead into the page cache (settings: prefetch_tracks, prefetch_budget_mb)
+        self.prefetch_tracks = self.settings.get("prefetch_tracks", PREFETCH_TRACKS)
+        self.prefetcher = Prefetcher(budget=self.settings.get("prefetch_budget_mb", PREFETCH_BUDGET_MB) * 1024 * 1024)
+        # Auto-DJ (radio mode); the engine is created the first time it is turned on
+        self.auto_dj = False
+        self.auto_dj_engine = None
+        # Sidebar views
+        self.open_playlist_name = None
+        self._displayed_playlist_songs = []
+        # Row keys of the playlist and history pages ((song, occurrence) per row)
+        self._playlist_row_keys = []
+        self._history_row_keys = []
+        self._highlighted_song = None
+        self._song_rows = {}
+        # Key of every row on the songs page: the song, or ("group", name) for a header
+        self._song_row_keys = []
+        self._history_kind = None
+        # Playback backend
+        if backend is None:
+            # Imported here so other backends never load libVLC
+            from core.vlc_controller import VLCController
+            crossfade_ms = self.settings.get("crossfade_ms", 0)
+            if crossfade_ms > 0:
+                # Two libVLC players: the next song starts on the idle one before the current one ends
+                backend = CrossfadeBackend(VLCController, crossfade_ms)
+            else:
+                backend = VLCController()
+        self.backend = backend
+        self.playback_signals = PlaybackSignals()
+        self.playback_signals.next_started.connect(self.on_next_started)
+        # Path handed to the backend as the song after the current one
+        self._queued_next = None
+        self.clock = PlaybackClock(now=self.backend.now)
+        self._awaiting_playback = False
+        self._pending_seek = None
+        # Chapter (CUE / CHAP piece) being played, and the file the backend has open
+        self._chapter = None
+        self._open_path = None
+        # Spectrum visualizer (needs NumPy and a backend that can tap its audio)
+        self.spectrum_rate = None
+        self.spectrum_analyzer = None
+        if SPECTRUM_AVAILABLE and self.settings.get("visualizer", True):
+            self.spectrum_ring = SampleRing()
+            self.spectrum_rate = self.backend.enable_pcm_tap(self.spectrum_ring.write_pcm16)
+        # App stylesheet (one sheet for the whole app, see widgets/theme.py)
+        apply_theme()
+        # Cover art (decoded off the UI thread, memory bounded)
+        self.album_art = AlbumArtLoader(self)
+        self.album_art.art_ready.connect(self.on_art_ready)
         self._setup_ui()
         self._setup_shortcuts()
+        if self.spectrum_rate is not None:
+            self.spectrum_analyzer = SpectrumAnalyzer(
+                self.spectrum_ring, self.spectrum_rate, self.spectrum_view.levels_received.emit
+            )
+            self.spectrum_analyzer.start()
+            self.spectrum_view.visibility_changed.connect(self.backend.set_pcm_tap_active)
+        # Views are updated by change notifications instead of being rebuilt on every switch
+        self.favorites_manager.add_listener(self.on_favorites_changed)
+        self.playlists_manager.add_listener(self.on_playlists_changed)
+        self.render_playlists_page()
+        self.resort_timer = QTimer(self)
+        self.resort_timer.setSingleShot(True)
+        self.resort_timer.setInterval(RESORT_DELAY_MS)
+        self.resort_timer.timeout.connect(self.render_sorted_pages)
+        self.refs_timer = QTimer(self)
+        self.refs_timer.setSingleShot(True)
+        self.refs_timer.setInterval(REFS_REFRESH_MS)
+        self.refs_timer.timeout.connect(self.refresh_ref_views)
+        # Tracks whose stored references may resolve differently since the last refresh
+        self._ref_changes = set()
         # UI update timer
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_ui)
         self.timer.start(1000)
-        self.load_songs()
-
-        self.active_playlist_songs = None
-        self.active_playlist_index = None
+        # Smooth position display + coalesced seeking
+        self.position_timer = QTimer(self)
+        self.position_timer.timeout.connect(self.update_position)
+        self.position_timer.start(POSITION_REFRESH_MS)
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.setInterval(SEEK_INTERVAL_MS)
+        self.seek_timer.timeout.connect(self.apply_pending_seek)
+        self.scan_library()
 
     def _setup_shortcuts(self):
         # Keyboard shortcuts for all main actions
@@ -81,59 +234,66 @@ class MusicPlayer(QWidget):
         splitter.setHandleWidth(8)
         sidebar = create_sidebar(self)
         splitter.addWidget(sidebar)
+        self._page_lists = {
+            self.songs_page: self.song_list,
+            self.favorites_page: self.favorites_list,
+            self.history_page: self.history_list,
+            self.playlists_page: self.playlists_list,
+            self.playlist_page: self.playlist_songs_list,
+        }
+        # Row thumbnails: loaded only for the rows on screen, shortly after the list settles
+        self.visible_art_timer = QTimer(self)
+        self.visible_art_timer.setSingleShot(True)
+        self.visible_art_timer.setInterval(80)
+        self.visible_art_timer.timeout.connect(self.load_visible_art)
+        for song_list in self._page_lists.values():
+            song_list.setIconSize(QSize(ROW_SIZE, ROW_SIZE))
+            song_list.verticalScrollBar().valueChanged.connect(self.visible_art_timer.start)
+            song_list.model().rowsInserted.connect(self.visible_art_timer.start)
         content = QFrame()
-        content.setStyleSheet("background: #0A2239; border-top-right-radius: 16px; border-bottom-right-radius: 16px;")
+        content.setObjectName("Content")
         content_layout = QVBoxLayout(content)
         content_layout.setContentsMargins(32, 32, 32, 32)
         content_layout.setSpacing(24)
+        # Cover art of the current song
+        self.cover_art = QLabel()
+        self.cover_art.setFixedSize(COVER_SIZE, COVER_SIZE)
+        self.cover_art.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        content_layout.addWidget(self.cover_art, 0, Qt.AlignmentFlag.AlignHCenter)
         # Now playing label
         self.now_playing = QLabel("בחר שיר מהרשימה")
         self.now_playing.setObjectName("NowPlaying")
         self.now_playing.setAlignment(Qt.AlignmentFlag.AlignCenter)
         content_layout.addWidget(self.now_playing)
+        # Spectrum visualizer
+        if self.spectrum_rate is not None:
+            self.spectrum_view = SpectrumView()
+            content_layout.addWidget(self.spectrum_view)
         # Slider row (seek bar + time labels)
         slider_row = QHBoxLayout()
         slider_row.setSpacing(10)
-        self.current_time_label = QLabel("0:00")
+        self.current_time_label = QLabel("0:00.000")
         self.current_time_label.setFont(QFont("Segoe UI", 11))
-        self.current_time_label.setStyleSheet("color: #FFD700; min-width: 48px;")
+        self.current_time_label.setObjectName("TimeLabel")
+        self.current_time_label.setProperty("precise", True)
         slider_row.addWidget(self.current_time_label)
         self.seek_slider = ClickableSlider(Qt.Orientation.Horizontal)
         self.seek_slider.setRange(0, 100)
         self.seek_slider.sliderMoved.connect(self.seek_song)
-        self.seek_slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                border: none;
-                height: 8px;
-                background: #1565C0;
-                border-radius: 4px;
-            }
-            QSlider::sub-page:horizontal {
-                background: #FFF;
-                border-radius: 4px;
-            }
-            QSlider::add-page:horizontal {
-                background: #1565C0;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #FFD700;
-                border: 2px solid #FFF;
-                width: 16px;
-                height: 16px;
-                margin: -4px 0;
-                border-radius: 8px;
-            }
-        """)
+        self.seek_slider.sliderReleased.connect(self.apply_pending_seek)
         slider_row.addWidget(self.seek_slider, 1)
         self.total_time_label = QLabel("0:00")
         self.total_time_label.setFont(QFont("Segoe UI", 11))
-        self.total_time_label.setStyleSheet("color: #FFD700; min-width: 48px;")
+        self.total_time_label.setObjectName("TimeLabel")
         slider_row.addWidget(self.total_time_label)
         content_layout.addLayout(slider_row)
         # Playback controls (play, pause, next, prev, etc)
         controls = create_controls(self)
         content_layout.addLayout(controls)
+        if not AUTO_DJ_AVAILABLE:
+            self.auto_dj_btn.setEnabled(False)
+            self.auto_dj_btn.setToolTip("Auto-DJ דורש numpy")
+        self.sidebar_pages.currentChanged.connect(self.on_sidebar_page_changed)
         splitter.addWidget(content)
         splitter.setSizes([320, 600])
         main_layout = QHBoxLayout(self)
@@ -145,281 +305,785 @@ class MusicPlayer(QWidget):
         # Toggle favorite status for the current song
         if not self.songs:
             return
-        song = self.songs[self.current_song_index]
-        if song in self.favorites:
-            self.favorites.remove(song)
-        else:
-            self.favorites.add(song)
-        self.save_favorites()
-        self.update_fav_btn()
+        self.favorites_manager.toggle(self.queue.current())
 
     def update_fav_btn(self):
         # Update the favorite button icon based on current song
         if not self.songs:
             self.fav_btn.setText("⭐")
             return
-        song = self.songs[self.current_song_index]
-        if song in self.favorites:
+        song = self.queue.current()
+        if self.favorites_manager.is_favorite(song):
             self.fav_btn.setText("★")
         else:
             self.fav_btn.setText("⭐")
 
     def show_favorites(self):
-        # Show only favorite songs in the list
-        self.song_list.clear()
-        for i, song in enumerate(self.songs):
-            if song in self.favorites:
-                item = QListWidgetItem(os.path.splitext(song)[0])
-                item.setData(Qt.ItemDataRole.UserRole, i)
-                self.song_list.addItem(item)
-        self.show_fav_btn.setText("חזור לרשימה")
-        self.show_fav_btn.clicked.disconnect()
-        self.show_fav_btn.clicked.connect(self.show_all_songs)
+        # Toggle between the favorites page and the full song list
+        if self.sidebar_pages.currentWidget() is self.favorites_page:
+            self.show_all_songs()
+        else:
+            self.sidebar_pages.setCurrentWidget(self.favorites_page)
 
     def show_all_songs(self):
-        # Restore the full song list
-        self.load_songs()
-        self.show_fav_btn.setText("מועדפים")
-        self.show_fav_btn.clicked.disconnect()
-        self.show_fav_btn.clicked.connect(self.show_favorites)
-
-    def load_favorites(self):
-        # Load favorites from file (if exists)
-        if os.path.exists(self.favorites_file):
-            with open(self.favorites_file, "r", encoding="utf-8") as f:
-                self.favorites = set(json.load(f))
-
-    def save_favorites(self):
-        # Save favorites to file
-        with open(self.favorites_file, "w", encoding="utf-8") as f:
-            json.dump(list(self.favorites), f, ensure_ascii=False)
+        self.sidebar_pages.setCurrentWidget(self.songs_page)
 
-    def load_songs(self):
-        # Load all mp3 and wav files from the songs directory
-        self.song_list.clear()
-        if not os.path.exists(SONGS_DIR):
+    def on_favorites_changed(self, added, removed):
+        # Keep the favorites page in sync without rebuilding it
+        if removed:
+            for row in range(self.favorites_list.count() - 1, -1, -1):
+                idx = self.favorites_list.item(row).data(Qt.ItemDataRole.UserRole)
+                if self.songs[idx] in removed:
+                    self.favorites_list.takeItem(row)
+        if added:
+            # Insert at the sorted place (rows are in rank order) instead of re-rendering
+            _, rank = self.sort_index.order(self.sort_order)
+            ranks = [rank[self.favorites_list.item(row).data(Qt.ItemDataRole.UserRole)]
+                     for row in range(self.favorites_list.count())]
+            for song in added:
+                if self.library.listed(song):
+                    idx = self.library.position_of[song]
+                    row = bisect.bisect(ranks, rank[idx])
+                    ranks.insert(row, rank[idx])
+                    self.favorites_list.insertItem(row, self._make_list_item(idx, song))
+        self.aggregates.set_favorite([song for song in added if self.library.listed(song)], True)
+        self.aggregates.set_favorite(removed, False)
+        self.update_fav_btn()
+
+    def scan_library(self):
+        # Show every root's cached file list right away, then rescan all roots in the background
+        if SONGS_DIR in self.library.roots and not os.path.exists(SONGS_DIR):
             os.makedirs(SONGS_DIR)
-        self.songs = [f for f in os.listdir(SONGS_DIR) if f.lower().endswith(('.mp3', '.wav'))]
+        for root in self.library.roots:
+            self.library.add(root, RootCache(root).load())
+        items = [(song, self.library.path(song)) for song in self.songs]
+        self._apply_chapters(list(self.songs))
+        # Cached ids resolve favorites / playlists at once; they are re-checked after the scan starts
+        self.track_refs.add([(song, self.track_ids.cached(path)) for song, path in items])
+        self.refresh_song_pages()
+        self.rebuild_playlist_totals()
         self.update_fav_btn()
-        for i, song in enumerate(self.songs):
-            song_name = os.path.splitext(song)[0]
-            item = QListWidgetItem(song_name)
-            font = QFont("Segoe UI", 12)
-            if i == self.current_song_index:
-                font.setBold(True)
-                item.setForeground(QColor("#00BFFF"))
+        self.scanner.scan(self.library.roots)
+        self.track_ids.resolve_async(items, self.scanner.submit, self.library_signals.ids_resolved.emit)
+        # Only stats for unchanged files; picks up edited tags and new / changed CUE sheets
+        self.metadata.load_async(items, self.library_signals.metadata_loaded.emit)
+
+    def on_library_batch(self, root, relative_paths):
+        # New files found by the scanner are appended to the pages as they arrive
+        self._append_songs(self.library.add(root, relative_paths))
+
+    def _append_songs(self, added):
+        if not added:
+            return
+        # Files whose chapters are already known are listed as their pieces right away
+        self._apply_chapters(added)
+        listed = [track for song in added for track in self.library.children.get(song, [song])]
+        self.aggregates.add(LIBRARY_VIEW, listed)
+        self.aggregates.add(FAVORITES_VIEW, [song for song in listed if self.favorites_manager.is_favorite(song)])
+        # New songs go to their sorted place: the song pages are re-rendered once per burst
+        self.sort_index.invalidate()
+        if not self.resort_timer.isActive():
+            self.resort_timer.start()
+        self.metadata.load_async(
+            [(song, self.library.path(song)) for song in added], self.library_signals.metadata_loaded.emit
+        )
+        # Hashing shares the scanner's per-device pools, so it never adds I/O pressure of its own
+        self.track_ids.resolve_async(
+            [(song, self.library.path(song)) for song in added],
+            self.scanner.submit,
+            self.library_signals.ids_resolved.emit,
+        )
+        # Playlist entries written as filenames may point at the new songs
+        self._ref_changes.update(listed)
+        if not self.refs_timer.isActive():
+            self.refs_timer.start()
+        if len(self.songs) == len(added):
+            self.update_fav_btn()
+
+    def _apply_chapters(self, tracks):
+        # List files with chapters (CUE sheet / ID3 CHAP) as virtual tracks, and files whose
+        # chapters went away as themselves again. Returns (removed, added) tracks.
+        removed, added = [], []
+        for track in tracks:
+            entry = self.metadata.get(self.library.path(track))
+            chapters = entry.get("chapters") if entry else None
+            if chapters or track in self.library.children:
+                gone, new = self.library.split(track, chapters or [])
+                removed += gone
+                added += new
+        return removed, added
+
+    def on_library_root_done(self, root, relative_paths):
+        # An unreachable root keeps its cached tracks until it comes back
+        if relative_paths is None:
+            return
+        if root == self.importer.root and self._imported_files:
+            # Files copied in while this scan was running may be missing from its result
+            relative_paths = set(relative_paths) | {
+                rel for rel in self._imported_files if os.path.exists(os.path.join(root, rel))
+            }
+        current = self.queue.current()
+        removed = self.library.reconcile(root, relative_paths)
+        if not removed:
+            return
+        self.track_refs.forget(removed)
+        self.aggregates.forget(removed)
+        self.sort_index.invalidate(removed)
+        self.queue.library_changed(current, self.library.listed)
+        self.schedule_prefetch()
+        # Row data holds library positions, which just shifted
+        self.refresh_song_pages()
+        self.update_fav_btn()
+
+    def on_metadata_loaded(self, tracks):
+        # Tags / durations arrived for these songs: their sort keys change
+        current = self.queue.current()
+        removed, added = self._apply_chapters(tracks)
+        changed = tracks + [c for t in tracks for c in self.library.children.get(t, ())]
+        self.sort_index.invalidate(changed)
+        self.aggregates.update(changed)
+        if removed or added:
+            # A file was split into chapters (or back): library positions moved
+            self.track_refs.forget(removed)
+            self.aggregates.forget(removed)
+            # Playlist entries of the file now resolve to its first piece (or back)
+            self._ref_changes.update(added)
+            if not self.refs_timer.isActive():
+                self.refs_timer.start()
+            self.queue.library_changed(self.library.playable(current) if current else None, self.library.listed)
+            self.refresh_song_pages()
+            self.schedule_prefetch()
+        elif not self.resort_timer.isActive():
+            self.resort_timer.start()
+
+    def on_ids_resolved(self, pairs):
+        # Renamed / moved files get their favorites and playlist entries back once hashed
+        refs = self.track_refs
+        pairs = [(song, track_id) for song, track_id in pairs
+                 if song in self.library.paths and refs.id_of.get(song) != track_id]
+        if not pairs:
+            return
+        if self.auto_dj:
+            # Features are kept by content id: new and edited files are analysed once hashed
+            self.auto_dj_engine.analyze((track_id, self.library.path(song)) for song, track_id in pairs)
+        # The songs themselves, and the copies an id moves to or away from
+        old_ids = [refs.id_of.get(song) for song, _ in pairs]
+        touched = {song for song, _ in pairs} | {refs.track_by_id.get(track_id) for _, track_id in pairs}
+        refs.add(pairs)
+        touched |= {refs.track_by_id.get(track_id) for track_id in old_ids if track_id is not None}
+        touched.discard(None)
+        self._ref_changes.update(t for song in touched for t in self.library.children.get(song, [song]))
+        if not self.refs_timer.isActive():
+            self.refs_timer.start()
+
+    def refresh_ref_views(self):
+        # Filenames written by older versions are replaced by content ids as they become known
+        self.favorites_manager.migrate()
+        self.playlists_manager.migrate()
+        if self.history.migrate() and self._history_kind is not None:
+            self.render_history_page()
+        songs = [song for song in self._ref_changes if self.library.listed(song)]
+        self._ref_changes.clear()
+        # Only the changed tracks move in or out of the favorites and playlist totals
+        changed = set()
+        names = self.playlists_manager.playlist_names()
+        for song in songs:
+            favorite = self.favorites_manager.is_favorite(song)
+            if favorite != self.aggregates.contains(FAVORITES_VIEW, song):
+                self.aggregates.set_favorite([song], favorite)
+                changed.add(FAVORITES_VIEW)
+            member_of = self.playlists_manager.playlists_of(song)
+            for name in names:
+                view = playlist_view(name)
+                if (name in member_of) != self.aggregates.contains(view, song):
+                    if name in member_of:
+                        self.aggregates.add(view, [song])
+                    else:
+                        self.aggregates.remove(view, [song])
+                    changed.add(view)
+        if FAVORITES_VIEW in changed:
+            self.render_favorites_page()
+            self.update_fav_btn()
+        if self.open_playlist_name is not None and playlist_view(self.open_playlist_name) in changed:
+            self.render_playlist_page()
+        if self.queue.playlist_name is not None and playlist_view(self.queue.playlist_name) in changed:
+            self.queue.update_playlist(self.playlists_manager.get_songs(self.queue.playlist_name))
+            self.schedule_prefetch()
+
+    def change_sort_order(self, index):
+        self.sort_order = self.sort_combo.itemData(index)
+        self.settings.set("sort_order", self.sort_order)
+        self.render_sorted_pages()
+        self.schedule_prefetch()
+
+    def render_sorted_pages(self):
+        self.render_songs_page()
+        self.render_favorites_page()
+        self.visible_art_timer.start()
+
+    def refresh_song_pages(self):
+        # Library positions changed: every page is rebuilt, the library totals recounted
+        self.aggregates.set_view(LIBRARY_VIEW, [s for s in self.songs if self.library.listed(s)])
+        self.aggregates.set_view(FAVORITES_VIEW, [s for s in self.songs if self.favorites_manager.is_favorite(s)])
+        self.render_songs_page()
+        self.render_favorites_page()
+        if self.open_playlist_name is not None:
+            self.render_playlist_page()
+        if self._history_kind is not None:
+            self.render_history_page()
+
+    def _make_list_item(self, i, song):
+        item = QListWidgetItem(self.song_label(song))
+        item.setData(Qt.ItemDataRole.UserRole, i)
+        return item
+
+    def _style_song_item(self, item, is_current):
+        font = QFont("Segoe UI", 12)
+        font.setBold(is_current)
+        item.setForeground(QColor("#00BFFF" if is_current else "#FFD700"))
+        item.setFont(font)
+
+    def _make_song_item(self, i, song):
+        item = self._make_list_item(i, song)
+        self._style_song_item(item, i == self.queue.index)
+        return item
+
+    def _make_group_item(self, name):
+        item = QListWidgetItem(name or "לא ידוע")
+        item.setFlags(Qt.ItemFlag.NoItemFlags)
+        font = QFont("Segoe UI", 12)
+        font.setBold(True)
+        item.setFont(font)
+        item.setForeground(QColor("#FFFFFF"))
+        return item
+
+    def _songs_page_rows(self):
+        # (key, value) of every row the songs page shows: (song, library position) or
+        # (("group", name), name) for a group header
+        text = self.search_bar.text().lower()
+        order, _ = self.sort_index.order(self.sort_order)
+        grouped = self.sort_order in GROUPED_ORDERS
+        group = None
+        rows = []
+        for i in order:
+            song = self.songs[i]
+            if text in song.lower() or (song in self.library.segments and text in self.song_label(song).lower()):
+                if grouped:
+                    name = self.sort_index.group(self.sort_order, song)
+                    if name != group:
+                        group = name
+                        rows.append((("group", name), name))
+                rows.append((song, i))
+        return rows
+
+    def _make_song_page_item(self, key, value):
+        return self._make_group_item(value) if isinstance(key, tuple) else self._make_song_item(value, key)
+
+    def render_songs_page(self):
+        # All songs of the library matching the search text, in the chosen (cached) order.
+        # Only rows that appear or disappear are inserted / removed, so the selection and
+        # the scroll position survive searches, rescans and re-sorts.
+        rows = self._songs_page_rows()
+        new_row = {key: n for n, (key, _) in enumerate(rows)}
+        keys = self._song_row_keys
+        keep = self._kept_rows(keys, new_row)
+        # The scroll position follows the row at the top of the view
+        top = self.song_list.itemAt(0, 0)
+        top = keys[self.song_list.row(top)] if top is not None else None
+        # Runs of removed rows go in one call each, but rows are inserted one by one
+        if len(rows) - len(keep) > max(SONG_PAGE_REBUILD_MIN, len(keep) // 2):
+            self._rebuild_songs_page(rows)
+        else:
+            self._apply_rows(self.song_list, keys, rows, keep, self._make_song_page_item)
+        top_item = self.song_list.item(new_row[top]) if top in new_row else None
+        if top_item is not None and self.song_list.itemAt(0, 0) is not top_item:
+            self.song_list.scrollToItem(top_item, QListWidget.ScrollHint.PositionAtTop)
+        self._song_rows = {value: row for row, (key, value) in enumerate(rows) if not isinstance(key, tuple)}
+        # Kept rows still have the playing style they were made with
+        current = self.queue.current()
+        for song, is_current in ((self._highlighted_song, False), (current, True)):
+            item = self._song_page_item(song)
+            if item is not None:
+                self._style_song_item(item, is_current)
+        self._highlighted_song = current
+
+    def _kept_rows(self, keys, new_row):
+        # The largest set of current rows (by key) that is already in the new order
+        present = [row for row, key in enumerate(keys) if key in new_row]
+        return {present[n] for n in longest_increasing([new_row[keys[row]] for row in present])}
+
+    def _apply_rows(self, song_list, keys, rows, keep, make_item):
+        # Turn song_list (whose rows are `keys`) into rows [(key, value)] in place: rows
+        # not in `keep` are removed, missing ones inserted with make_item(key, value).
+        # Song rows hold their library position as value.
+        # Removed from the end, one run of adjacent rows at a time
+        end = len(keys)
+        for row in range(len(keys) - 1, -2, -1):
+            if row < 0 or row in keep:
+                if end > row + 1:
+                    song_list.model().removeRows(row + 1, end - row - 1)
+                    del keys[row + 1:end]
+                end = row
+        for row, (key, value) in enumerate(rows):
+            if row < len(keys) and keys[row] == key:
+                # Library positions shift when songs come and go
+                item = song_list.item(row)
+                if isinstance(value, int) and item.data(Qt.ItemDataRole.UserRole) != value:
+                    item.setData(Qt.ItemDataRole.UserRole, value)
             else:
-                font.setBold(False)
-                item.setForeground(QColor("#FFD700"))
-            item.setFont(font)
-            self.song_list.addItem(item)
+                song_list.insertItem(row, make_item(key, value))
+                keys.insert(row, key)
+
+    def _sync_song_rows(self, song_list, keys, songs, make_item):
+        # Songs pages other than the library (a playlist, history): rows that stay keep
+        # their items, so only the songs that came or went cost anything. A song listed
+        # twice is told apart by its occurrence number.
+        rows = [(key, self.library.position_of[key[0]]) for key in song_row_keys(songs)]
+        keep = self._kept_rows(keys, {key: n for n, (key, _) in enumerate(rows)})
+        self._apply_rows(song_list, keys, rows, keep, make_item)
+
+    def _rebuild_songs_page(self, rows):
+        # Mostly new rows (a new sort order, a search widened): one clear and
+        # refill, then the selection and the current row are put back
+        keys = self._song_row_keys
+        selected = {keys[self.song_list.row(item)] for item in self.song_list.selectedItems()}
+        current = self.song_list.currentItem()
+        current = keys[self.song_list.row(current)] if current is not None else None
+        self.song_list.clear()
+        self._song_row_keys = [key for key, _ in rows]
+        for key, value in rows:
+            self.song_list.addItem(self._make_song_page_item(key, value))
+        selection = self.song_list.selectionModel()
+        for row, key in enumerate(self._song_row_keys):
+            if key in selected:
+                self.song_list.item(row).setSelected(True)
+            if key == current:
+                selection.setCurrentIndex(self.song_list.model().index(row, 0), selection.SelectionFlag.NoUpdate)
+
+    def render_favorites_page(self):
+        self.favorites_list.clear()
+        order, _ = self.sort_index.order(self.sort_order)
+        for i in order:
+            song = self.songs[i]
+            if self.favorites_manager.is_favorite(song):
+                self.favorites_list.addItem(self._make_list_item(i, song))
+
+    def load_songs(self):
+        # Show all songs of the library
+        self.render_songs_page()
+        self.show_all_songs()
 
     def filter_songs(self, text=""):
         # Filter songs in the list by search text
-        self.song_list.clear()
-        for i, song in enumerate(self.songs):
-            if text.lower() in song.lower():
-                item = QListWidgetItem(os.path.splitext(song)[0])
-                item.setData(Qt.ItemDataRole.UserRole, i)
-                self.song_list.addItem(item)
-
-    def update_song_list_selection(self, song_name):
-        for i in range(self.song_list.count()):
-            item = self.song_list.item(i)
-            font = QFont("Segoe UI", 12)
-            if item.text() == song_name:
-                font.setBold(True)
-                item.setForeground(QColor("#00BFFF"))
-                self.song_list.setCurrentRow(i)
-            else:
-                font.setBold(False)
-                item.setForeground(QColor("#FFD700"))
-            item.setFont(font)
-
-    def start_song(self, idx):
-        # Start playback of the song at index idx
-        if self.active_playlist_songs:
-            song = self.active_playlist_songs[idx]
-            self.active_playlist_index = idx
-            self.current_song_index = self.songs.index(song)
-        else:
-            self.current_song_index = idx
-            song = self.songs[idx]
+        self.render_songs_page()
+        self.show_all_songs()
+
+    def _song_page_item(self, song):
+        if song is None or not self.library.listed(song):
+            return None
+        row = self._song_rows.get(self.library.position_of.get(song))
+        return None if row is None else self.song_list.item(row)
+
+    def update_song_list_selection(self, song):
+        # Re-style only the previously and the newly playing rows of the songs page
+        previous = self._song_page_item(self._highlighted_song)
+        if previous is not None:
+            self._style_song_item(previous, False)
+        current = self._song_page_item(song)
+        if current is not None:
+            self._style_song_item(current, True)
+            self.song_list.setCurrentItem(current)
+        self._highlighted_song = song
+
+    def on_sidebar_page_changed(self, index):
+        page = self.sidebar_pages.widget(index)
+        self.show_fav_btn.setText("חזור לרשימה" if page is self.favorites_page else "מועדפים")
+        in_playlists = page is self.playlists_page or page is self.playlist_page
+        self.show_playlists_btn.setText("חזור לרשימת השירים" if in_playlists else "הצג רשימות השמעה")
+        self.show_playlists_btn.setVisible(page is not self.playlist_page)
+        self.visible_art_timer.start()
+
+    def current_song_list(self):
+        return self._page_lists[self.sidebar_pages.currentWidget()]
+
+    def play_current(self, started=False):
+        # Start playback of the queue's current song (started: the backend already plays
+        # it - a crossfade began it ahead of the previous song's end)
+        song = self.queue.current()
         self.update_fav_btn()
-        if not self.songs:
+        if song is None:
             return
-        song_name = os.path.splitext(song)[0]
-        self.now_playing.setText(song_name)
-        self.update_song_list_selection(song_name)
-        song_path = os.path.join(SONGS_DIR, song)
-        media = self.instance.media_new(song_path)
-        self.player.set_media(media)
-        self.player.play()
+        self.now_playing.setText(self.song_label(song))
+        self.update_song_list_selection(song)
+        path = self.library.path(song)
+        previous = self._chapter
+        self._chapter = self.library.segments.get(song)
+        start = self._chapter_start()
+        self._pending_seek = None
+        self.seek_timer.stop()
+        if self._chapter is not None and path == self._open_path and self.backend.get_state() in (PLAYING, PAUSED):
+            # Another chapter of the open file: a seek instead of reopening and demuxing it
+            # again. Going straight on to the following chapter needs not even that.
+            if not (previous is not None and previous["end"] == start and self.clock.running):
+                self.backend.set_time(start)
+                self.clock.seek(start)
+            if self.backend.get_state() == PAUSED:
+                self.backend.play()
+            self.clock.resume()
+            self._awaiting_playback = False
+        else:
+            self.prefetcher.started(path)
+            if not started:
+                self.backend.play_song(path, start)
+            self._open_path = path
+            # The clock starts once the backend actually reports playback (see update_position)
+            self.clock.start(start, running=False)
+            self.clock.length_ms = 0
+            self._awaiting_playback = True
+        self._show_length()
+        self._begin_play_event(song)
         self.is_paused = False
         self.play_pause_btn.setText("⏸")
+        self.show_cover(song)
+        # Decode the next song's cover now so it shows without a stall
+        next_song = self.peek_next_song()
+        if next_song is not None:
+            self.album_art.request(next_song, self.library.path(next_song), COVER_SIZE)
+        self.schedule_prefetch()
 
-    def song_double_clicked(self, item):
-        song_name = os.path.splitext(item.text())[0]
-        if self.active_playlist_songs:
-            idx = next((i for i, song in enumerate(self.active_playlist_songs) if os.path.splitext(song)[0] == song_name), None)
-            if idx is not None:
-                self.start_song(idx)
+    def song_label(self, song):
+        # List / now-playing text; chapters show their file, number and title
+        chapter = self.library.segments.get(song)
+        if chapter is None:
+            return display_name(song)
+        number = song.rpartition("#")[2]
+        label = f"{display_name(self.library.parent(song))} · {number}"
+        return f"{label}. {chapter['title']}" if chapter["title"] else label
+
+    def _chapter_start(self):
+        # Offset of the current chapter in its file (the slider and labels count from it)
+        return self._chapter["start"] if self._chapter is not None else 0
+
+    def _show_length(self):
+        end = self.clock.length_ms
+        if self._chapter is not None and self._chapter["end"] is not None:
+            end = self._chapter["end"]
+        length = end - self._chapter_start()
+        if length > 0:
+            self.seek_slider.setMaximum(length)
+            self.total_time_label.setText(self.format_time(length // 1000))
+
+    def schedule_prefetch(self):
+        # Called whenever what plays next may have changed; the previous plan is dropped
+        if not self.songs:
+            return
+        upcoming = self.queue.upcoming(self.prefetch_tracks)
+        self.prefetcher.plan([self.library.path(song) for song in upcoming if self.library.listed(song)])
+        self.queue_next_song()
+        hit_rate = self.prefetcher.hit_rate()
+        if hit_rate is not None:
+            self.next_btn.setToolTip(f"טעינה מוקדמת: {hit_rate:.0%} מהשירים היו מוכנים מראש")
+
+    def queue_next_song(self):
+        # Tell the backend what follows the current song, so a crossfading one can start
+        # it ahead of the end. The next chapter of the same file already follows seamlessly.
+        current = self.queue.current()
+        next_song = self.peek_next_song() if current is not None else None
+        if next_song is None or (next_song != current and self.library.parent(next_song) == self.library.parent(current)):
+            self._queued_next = None
+            self.backend.queue_next(None)
+            return
+        chapter = self.library.segments.get(current)
+        next_chapter = self.library.segments.get(next_song)
+        self._queued_next = self.library.path(next_song)
+        self.backend.queue_next(
+            self._queued_next,
+            next_chapter["start"] if next_chapter is not None else 0,
+            chapter["end"] if chapter is not None else None,
+            self.playback_signals.next_started.emit,
+        )
+
+    def on_next_started(self, path):
+        # The backend began the queued song; the UI follows (unless it already moved on
+        # by itself, e.g. on reaching the end of a chapter first)
+        if path != self._queued_next:
+            return
+        self._finish_play_event(completed=True)
+        repeat_mode = self.queue.repeat_mode
+        song = self.queue.advance()
+        if self.queue.repeat_mode != repeat_mode:
+            self._show_repeat_mode()
+        self.play_current(started=song is not None and self.library.path(song) == path)
+
+    def show_cover(self, song):
+        pixmap = self.album_art.cached(song, COVER_SIZE)
+        if pixmap is None:
+            self.cover_art.clear()
+            self.album_art.request(song, self.library.path(song), COVER_SIZE)
+        elif pixmap.isNull():
+            self.cover_art.clear()
         else:
+            self.cover_art.setPixmap(pixmap)
+
+    def _visible_song_items(self):
+        song_list = self.current_song_list()
+        count = song_list.count()
+        if not count:
+            return []
+        first = song_list.indexAt(QPoint(0, 0)).row()
+        last = song_list.indexAt(QPoint(0, song_list.viewport().height() - 1)).row()
+        first = max(first, 0)
+        if last < 0:
+            last = count - 1
+        return [song_list.item(i) for i in range(first, last + 1)]
+
+    def load_visible_art(self):
+        # Set (or request) thumbnails for the rows currently on screen
+        visible = []
+        for item in self._visible_song_items():
             idx = item.data(Qt.ItemDataRole.UserRole)
-            if idx is None:
-                idx = self.song_list.row(item)
-            self.start_song(idx)
+            if idx is None or idx >= len(self.songs):
+                continue
+            song = self.songs[idx]
+            visible.append(song)
+            pixmap = self.album_art.cached(song, ROW_SIZE)
+            if pixmap is not None and not pixmap.isNull():
+                item.setIcon(QIcon(pixmap))
+        self.album_art.set_visible_rows(visible)
+        for song in visible:
+            if self.album_art.cached(song, ROW_SIZE) is None:
+                self.album_art.request(song, self.library.path(song), ROW_SIZE)
+
+    def on_art_ready(self, song, size):
+        pixmap = self.album_art.cached(song, size)
+        if pixmap is None:
+            return
+        if size == COVER_SIZE:
+            if self.queue.current() == song:
+                self.show_cover(song)
+        elif not pixmap.isNull():
+            for item in self._visible_song_items():
+                idx = item.data(Qt.ItemDataRole.UserRole)
+                if idx is not None and idx < len(self.songs) and self.songs[idx] == song:
+                    item.setIcon(QIcon(pixmap))
+
+    def _begin_play_event(self, song):
+        # The previous track (if still open) was left before its end: a skip
+        self._finish_play_event(completed=False)
+        self._history_track = song
+        self._history_started_at = time.time()
+        self._history_listened = 0.0
+        self._history_resumed = time.monotonic()
+
+    def _pause_play_event(self):
+        if self._history_track is not None and self._history_resumed is not None:
+            self._history_listened += time.monotonic() - self._history_resumed
+            self._history_resumed = None
+
+    def _resume_play_event(self):
+        if self._history_track is not None and self._history_resumed is None:
+            self._history_resumed = time.monotonic()
+
+    def _finish_play_event(self, completed):
+        if self._history_track is None:
+            return
+        self._pause_play_event()
+        self.history.record(self._history_track, self._history_started_at, self._history_listened, completed)
+        self._history_track = None
+
+    def show_history(self, kind):
+        # Show most played / recently played / never played songs (served from the history counters)
+        self._history_kind = kind
+        self.render_history_page()
+        self.sidebar_pages.setCurrentWidget(self.history_page)
+
+    def render_history_page(self):
+        if self._history_kind == "most":
+            songs = [s for s in self.history.most_played(len(self.songs)) if self.library.listed(s)]
+        elif self._history_kind == "recent":
+            songs = [s for s in self.history.recently_played(len(self.songs)) if self.library.listed(s)]
+        else:
+            songs = self.history.never_played(self.songs)
+        self._sync_song_rows(self.history_list, self._history_row_keys, songs,
+                             lambda key, i: self._make_list_item(i, key[0]))
+        # Counters of the rows that stayed may have moved on since
+        for row, song in enumerate(songs):
+            item = self.history_list.item(row)
+            tip = self._history_tip(song)
+            if item.toolTip() != tip:
+                item.setToolTip(tip)
+
+    def _history_tip(self, song):
+        plays = self.history.play_count(song)
+        return f"השמעות: {plays} · דילוגים: {self.history.skip_rate(song):.0%}" if plays else ""
+
+    def song_double_clicked(self, item):
+        # Playing from the library / favorites / history leaves playlist playback
+        self.queue.play_library(item.data(Qt.ItemDataRole.UserRole))
+        self.play_current()
+
+    def playlist_song_double_clicked(self, item):
+        self.queue.play_playlist(self.open_playlist_name, self._displayed_playlist_songs, self.playlist_songs_list.row(item))
+        self.play_current()
 
     def show_playlist_songs(self, item):
-        playlist_name = item.text()
-        self.current_playlist_name = playlist_name  # Store for context menu use
-        playlists = self.playlists_manager.load_playlists()
-        for pl in playlists:
-            if pl["name"] == playlist_name:
-                self.active_playlist_songs = [song for song in pl["songs"] if song in self.songs]
-                self.song_list.clear()
-                for song in pl["songs"]:
-                    if song in self.songs:
-                        idx = self.songs.index(song)
-                        song_item = QListWidgetItem(os.path.splitext(song)[0])
-                        song_item.setData(Qt.ItemDataRole.UserRole, idx)
-                        self.song_list.addItem(song_item)
-                break
-        if hasattr(self, "show_playlists_btn") and self.show_playlists_btn is not None:
-            self.show_playlists_btn.hide()
-        if hasattr(self, "back_to_playlists_btn") and self.back_to_playlists_btn is not None:
-            self.back_to_playlists_btn.hide()
-            sidebar_layout = self.song_list.parentWidget().layout()
-            sidebar_layout.removeWidget(self.back_to_playlists_btn)
-            self.back_to_playlists_btn.deleteLater()
-            self.back_to_playlists_btn = None
-        self.back_to_playlists_btn = QPushButton("חזור לרשימות ההשמעה")
-        self.back_to_playlists_btn.setStyleSheet(
-            "background: #FFD700; color: #164B74; font-weight: bold; border-radius: 8px; padding: 8px; margin-top: 12px;"
-        )
-        self.back_to_playlists_btn.clicked.connect(self.show_playlists_list)
-        sidebar_layout = self.song_list.parentWidget().layout()
-        sidebar_layout.addWidget(self.back_to_playlists_btn)
-        self.back_to_playlists_btn.show()
-        # Set context menu for removing song from playlist
-        self.song_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        try:
-            self.song_list.customContextMenuRequested.disconnect()
-        except Exception:
-            pass
-        self.song_list.customContextMenuRequested.connect(self.show_remove_song_from_playlist_menu)
+        self.open_playlist_name = item.data(PLAYLIST_NAME_ROLE)
+        self.render_playlist_page()
+        self.sidebar_pages.setCurrentWidget(self.playlist_page)
+
+    def render_playlist_page(self):
+        entries = self.playlists_manager.get_songs(self.open_playlist_name)
+        self._displayed_playlist_songs = [song for song in entries if song in self.library.position_of]
+        self._sync_song_rows(self.playlist_songs_list, self._playlist_row_keys, self._displayed_playlist_songs,
+                             lambda key, i: self._make_list_item(i, key[0]))
+
+    def on_playlists_changed(self, playlist_name, added, removed):
+        # Change notification from PlaylistsManager (None: playlists added or deleted)
+        if playlist_name is None:
+            names = set(self.playlists_manager.playlist_names())
+            self.sync_playlist_totals(names)
+            self.render_playlists_page()
+            if self.open_playlist_name is not None and self.open_playlist_name not in names:
+                self.show_playlists_list()
+            if self.queue.playlist_name is not None and self.queue.playlist_name not in names:
+                self.queue.leave_playlist()
+            return
+        view = playlist_view(playlist_name)
+        self.aggregates.add(view, [song for song in added if self.library.listed(song)])
+        self.aggregates.remove(view, removed)
+        if playlist_name == self.open_playlist_name:
+            # Only the rows of the songs that came or went change
+            self.render_playlist_page()
+        if playlist_name == self.queue.playlist_name:
+            self.queue.update_playlist(
+                [s for s in self.playlists_manager.get_songs(playlist_name) if self.library.listed(s)]
+            )
+            self.schedule_prefetch()
 
     def toggle_play_pause(self):
-        if self.player.is_playing():
-            self.player.pause()
+        if self.backend.is_playing():
+            self.backend.pause()
+            self.clock.pause()
+            self._pause_play_event()
             self.is_paused = True
             self.play_pause_btn.setText("▶")
         elif self.is_paused:
-            self.player.play()
+            self.backend.play()
+            self.clock.resume()
+            self._resume_play_event()
             self.is_paused = False
             self.play_pause_btn.setText("⏸")
         else:
-            self.start_song(self.current_song_index)
+            self.play_current()
 
     def next_song(self):
-        # Go to next song (handles repeat and shuffle modes)
+        # Go to next song (handles repeat, shuffle and auto-DJ modes)
         if not self.songs:
             return
-        if self.active_playlist_songs:
-            if self.shuffle:
-                self.active_playlist_index = random.randint(0, len(self.active_playlist_songs) - 1)
-            else:
-                self.active_playlist_index = (self.active_playlist_index + 1) % len(self.active_playlist_songs)
-            self.start_song(self.active_playlist_index)
-            return
-        if self.repeat_mode == "once":
-            self.start_song(self.current_song_index)
-            self.repeat_mode = "none"
-            self.repeat_btn.setText("🔁")
-            self.repeat_btn.setStyleSheet(
-                self.repeat_btn.styleSheet()
-                .replace("background: #00BFFF;", "background: #FFD700;")
-                .replace("border: 2px solid #00BFFF;", "")
-                .replace("color: #FFD700;", "color: #00BFFF;")
-            )
-        elif self.repeat_mode == "always":
-            self.start_song(self.current_song_index)
-        else:
-            if self.shuffle:
-                self.current_song_index = random.randint(0, len(self.songs) - 1)
-            else:
-                self.current_song_index = (self.current_song_index + 1) % len(self.songs)
-            self.start_song(self.current_song_index)
+        repeat_mode = self.queue.repeat_mode
+        self.queue.advance()
+        if self.queue.repeat_mode != repeat_mode:
+            self._show_repeat_mode()
+        self.play_current()
+
+    def _similar_song(self, song):
+        # PlayQueue hook: auto-DJ's pick after `song` (None while auto-DJ is off)
+        if not self.auto_dj:
+            return None
+        # Features are kept by content id; chapters share their file's
+        refs = self.track_refs
+        track_id = refs.id_of.get(self.library.parent(song))
+        if track_id is None:
+            return None
+        recent = self.history.recently_played(AUTO_DJ_AVOID_RECENT)
+        picked = self.auto_dj_engine.pick_next(
+            track_id,
+            avoid={refs.id_of.get(self.library.parent(track)) for track in recent},
+            exists=lambda other: self.library.listed(refs.track_by_id.get(other)),
+        )
+        return refs.track_by_id.get(picked) if picked is not None else None
+
+    def peek_next_song(self):
+        # The song next_song() will play (without advancing)
+        return self.queue.peek_next()
 
     def prev_song(self):
         # Go to previous song (handles shuffle mode)
         if not self.songs:
             return
-        if self.active_playlist_songs:
-            if self.shuffle:
-                self.active_playlist_index = random.randint(0, len(self.active_playlist_songs) - 1)
-            else:
-                self.active_playlist_index = (self.active_playlist_index - 1) % len(self.active_playlist_songs)
-            self.start_song(self.active_playlist_index)
-            return
-        if self.shuffle:
-            self.current_song_index = random.randint(0, len(self.songs) - 1)
-        else:
-            self.current_song_index = (self.current_song_index - 1) % len(self.songs)
-        self.start_song(self.current_song_index)
+        self.queue.back()
+        self.play_current()
 
     def toggle_repeat(self):
         # Cycle repeat mode: none -> once -> always -> none
-        if self.repeat_mode == "none":
-            self.repeat_mode = "once"
-            self.repeat_btn.setText("🔁1")
-            self.repeat_btn.setStyleSheet(
-                self.repeat_btn.styleSheet()
-                .replace("background: #FFD700;", "background: #00BFFF;")
-                .replace("color: #00BFFF;", "color: #FFD700;")
-            )
-        elif self.repeat_mode == "once":
-            self.repeat_mode = "always"
-            self.repeat_btn.setText("🔁♾️")
-            self.repeat_btn.setStyleSheet(
-                self.repeat_btn.styleSheet()
-                .replace("background: #00BFFF;", "background: #00BFFF;")
-                .replace("color: #FFD700;", "color: #FFD700;")
-                .replace("border: 2px solid #FFD700;", "border: 2px solid #00BFFF;")
-            )
-        else:
-            self.repeat_mode = "none"
-            self.repeat_btn.setText("🔁")
-            self.repeat_btn.setStyleSheet(
-                self.repeat_btn.styleSheet()
-                .replace("background: #00BFFF;", "background: #FFD700;")
-                .replace("border: 2px solid #00BFFF;", "")
-                .replace("color: #FFD700;", "color: #00BFFF;")
-            )
+        self.queue.cycle_repeat()
+        self._show_repeat_mode()
+        self.schedule_prefetch()
+
+    def _show_repeat_mode(self):
+        self.repeat_btn.setText(REPEAT_LABELS[self.queue.repeat_mode])
+        set_active(self.repeat_btn, self.queue.repeat_mode != "none")
 
     def toggle_shuffle(self):
-        self.shuffle = not self.shuffle
-        if self.shuffle:
-            self.shuffle_btn.setStyleSheet(
-                self.shuffle_btn.styleSheet()
-                .replace("background: #FFD700;", "background: #00BFFF;")
-                .replace("color: #00BFFF;", "color: #FFD700;")
-                + "border: 2px solid #00BFFF;"
-            )
-        else:
-            self.shuffle_btn.setStyleSheet(
-                self.shuffle_btn.styleSheet()
-                .replace("background: #00BFFF;", "background: #FFD700;")
-                .replace("color: #FFD700;", "color: #00BFFF;")
-                .replace("border: 2px solid #00BFFF;", "")
+        set_active(self.shuffle_btn, self.queue.toggle_shuffle())
+        self.schedule_prefetch()
+
+    def toggle_auto_dj(self):
+        # Radio mode: instead of wrapping around / random shuffle picks, continue with
+        # songs that sound like the current one. Features are computed in the background.
+        self.auto_dj = not self.auto_dj
+        self.queue.reset_lookahead()
+        set_active(self.auto_dj_btn, self.auto_dj)
+        if self.auto_dj:
+            if self.auto_dj_engine is None:
+                self.auto_dj_engine = AutoDJ()
+            # Files not hashed yet are analysed from on_ids_resolved
+            files = dict.fromkeys(map(self.library.parent, self.songs))
+            self.auto_dj_engine.analyze(
+                (self.track_refs.id_of.get(song), self.library.path(song)) for song in files
             )
+        self.schedule_prefetch()
 
     def seek_song(self, value):
-        # Seek to a specific time in the song (in seconds)
+        # Seek to a specific time in the song (in ms). Requests are coalesced:
+        # the first one is applied at once, later ones at most once per
+        # SEEK_INTERVAL_MS and only the latest position is sent.
+        self._pending_seek = int(value) + self._chapter_start()
+        self.clock.seek(self._pending_seek)
+        self.current_time_label.setText(format_time_ms(int(value)))
+        if not self.seek_timer.isActive():
+            self.apply_pending_seek()
+            self.seek_timer.start()
+
+    def apply_pending_seek(self):
+        if self._pending_seek is None:
+            return
         try:
-            self.player.set_time(int(float(value) * 1000))
+            self.backend.set_time(self._pending_seek)
         except Exception:
             pass
+        self._pending_seek = None
+
+    def update_position(self):
+        # Redraw the seek bar and position label from the local clock (no libVLC time queries)
+        if self._awaiting_playback:
+            if not self.backend.is_playing():
+                return
+            self._awaiting_playback = False
+            self.clock.start(max(self.backend.get_time(), 0))
+        if not (self.clock.running or self.is_paused) or self.seek_slider.isSliderDown():
+            return
+        pos = self.clock.position()
+        if self._chapter is not None:
+            end = self._chapter["end"]
+            if end is not None and pos >= end and self.clock.running:
+                # End of a chapter is detected on the clock; the file itself plays on
+                self._finish_play_event(completed=True)
+                self.next_song()
+                return
+            pos = max(pos - self._chapter["start"], 0)
+        self.seek_slider.setValue(pos)
+        self.current_time_label.setText(format_time_ms(pos))
 
     def format_time(self, seconds):
         # Format seconds as m:ss (used for time labels)
@@ -431,26 +1095,33 @@ class MusicPlayer(QWidget):
 
     def update_ui(self):
         # Update UI elements (seek bar, time labels, play/pause button)
-        if self.player.is_playing() or self.is_paused:
+        # (the position itself is drawn by update_position; this only re-syncs the clock)
+        if self.backend.is_playing() or self.is_paused:
             try:
-                length = self.player.get_length() // 1000
-                pos = self.player.get_time() // 1000
-                if length > 0:
-                    self.seek_slider.setMaximum(length)
-                    self.seek_slider.setValue(pos)
-                self.current_time_label.setText(self.format_time(pos))
-                self.total_time_label.setText(self.format_time(length))
+                length = self.backend.get_length()
+                if length > 0 and length != self.clock.length_ms:
+                    self.clock.length_ms = length
+                    self._show_length()
+                if self.backend.is_playing() and self._pending_seek is None and not self.seek_slider.isSliderDown():
+                    self.clock.sync(self.backend.get_time())
+                    self.backend.tick()
             except Exception:
                 pass
         else:
-            self.current_time_label.setText("0:00")
+            self.clock.pause()
+            self.current_time_label.setText(format_time_ms(0))
             self.total_time_label.setText("0:00")
-        state = self.player.get_state()
-        if state == vlc.State.Ended:
+        state = self.backend.get_state()
+        if state == ENDED:
+            self._finish_play_event(completed=True)
+            self.next_song()
+        elif state == ERROR:
+            # Unplayable file: move on instead of stalling
+            self._finish_play_event(completed=False)
             self.next_song()
-        elif state == vlc.State.Paused:
+        elif state == PAUSED:
             self.play_pause_btn.setText("▶")
-        elif state == vlc.State.Playing:
+        elif state == PLAYING:
             self.play_pause_btn.setText("⏸")
 
     def show_shortcuts_help(self):
@@ -479,202 +1150,161 @@ class MusicPlayer(QWidget):
 
     def toggle_playlists_view(self):
         # Toggle between playlists list and song list
-        if hasattr(self, "show_playlists_btn") and self.show_playlists_btn is not None:
-            self.show_playlists_btn.show()
-        if hasattr(self, "back_to_playlists_btn") and self.back_to_playlists_btn is not None:
-            self.back_to_playlists_btn.hide()
-            sidebar_layout = self.song_list.parentWidget().layout()
-            sidebar_layout.removeWidget(self.back_to_playlists_btn)
-            self.back_to_playlists_btn.deleteLater()
-            self.back_to_playlists_btn = None
-        if hasattr(self, "create_playlist_btn") and self.create_playlist_btn is not None:
-            sidebar_layout = self.song_list.parentWidget().layout()
-            sidebar_layout.removeWidget(self.create_playlist_btn)
-            self.create_playlist_btn.deleteLater()
-            self.create_playlist_btn = None
-        if not hasattr(self, 'showing_playlists'):
-            self.showing_playlists = False
-        if not self.showing_playlists:
-            self.song_list.clear()
-            playlists = self.playlists_manager.load_playlists()
-            try:
-                self.song_list.itemClicked.disconnect()
-            except TypeError:
-                pass
-            for pl in playlists:
-                item = QListWidgetItem(pl["name"])
-                self.song_list.addItem(item)
-            self.song_list.itemClicked.connect(self.show_playlist_songs)
-            self.song_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-            self.song_list.customContextMenuRequested.connect(self.show_playlist_context_menu)
-            self.show_playlists_btn.setText("חזור לרשימת השירים")
-            self.showing_playlists = True
-            btn_style = """
-                QPushButton {
-                    background: #FFD700;
-                    color: #00BFFF;
-                    border-radius: 16px;
-                    font-size: 15px;
-                    min-width: 80px;
-                    min-height: 36px;
-                    font-family: 'Segoe UI', Arial, sans-serif;
-                    font-weight: bold;
-                    border: 2px solid #e6c200;
-                }
-                QPushButton:hover {
-                    background: #FFF5B7;
-                    color: #164B74;
-                    border: 2px solid #bfa600;
-                }
-                QPushButton:pressed {
-                    background: #e6c200;
-                    color: #164B74;
-                    border: 2px solid #bfa600;
-                }
-            """
-            self.create_playlist_btn = QPushButton("צור רשימת השמעה")
-            self.create_playlist_btn.setStyleSheet(btn_style)
-            self.create_playlist_btn.clicked.connect(self.create_new_playlist)
-            sidebar_layout = self.song_list.parentWidget().layout()
-            sidebar_layout.addWidget(self.create_playlist_btn)
+        page = self.sidebar_pages.currentWidget()
+        if page is self.playlists_page or page is self.playlist_page:
+            self.show_all_songs()
         else:
-            try:
-                self.song_list.itemClicked.disconnect()
-            except TypeError:
-                pass
-            self.load_songs()
-            self.show_playlists_btn.setText("הצג רשימות השמעה")
-            self.showing_playlists = False
-            self.song_list.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
-            if hasattr(self, "create_playlist_btn") and self.create_playlist_btn is not None:
-                sidebar_layout = self.song_list.parentWidget().layout()
-                sidebar_layout.removeWidget(self.create_playlist_btn)
-                self.create_playlist_btn.deleteLater()
-                self.create_playlist_btn = None
+            self.sidebar_pages.setCurrentWidget(self.playlists_page)
 
     def show_playlists_list(self):
-        # Show the list of playlists in the sidebar
-        self.active_playlist_songs = None
-        self.active_playlist_index = None
-        # Reset context menu to playlist context
-        self.song_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        try:
-            self.song_list.customContextMenuRequested.disconnect()
-        except Exception:
-            pass
-        self.song_list.customContextMenuRequested.connect(self.show_playlist_context_menu)
-        if hasattr(self, "show_playlists_btn") and self.show_playlists_btn is not None:
-            self.show_playlists_btn.show()
-        if hasattr(self, "back_to_playlists_btn") and self.back_to_playlists_btn is not None:
-            self.back_to_playlists_btn.hide()
-            sidebar_layout = self.song_list.parentWidget().layout()
-            sidebar_layout.removeWidget(self.back_to_playlists_btn)
-            self.back_to_playlists_btn.deleteLater()
-            self.back_to_playlists_btn = None
-        if hasattr(self, "create_playlist_btn") and self.create_playlist_btn is not None:
-            sidebar_layout = self.song_list.parentWidget().layout()
-            sidebar_layout.removeWidget(self.create_playlist_btn)
-            self.create_playlist_btn.deleteLater()
-            self.create_playlist_btn = None
-        self.song_list.clear()
-        playlists = self.playlists_manager.load_playlists()
-        try:
-            self.song_list.itemClicked.disconnect()
-        except TypeError:
-            pass
-        for pl in playlists:
-            item = QListWidgetItem(pl["name"])
-            self.song_list.addItem(item)
-        self.song_list.itemClicked.connect(self.show_playlist_songs)
-        self.song_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.song_list.customContextMenuRequested.connect(self.show_playlist_context_menu)
-        self.show_playlists_btn.setText("חזור לרשימת השירים")
-        self.showing_playlists = True
-        btn_style = """
-            QPushButton {
-                background: #FFD700;
-                color: #00BFFF;
-                border-radius: 16px;
-                font-size: 15px;
-                min-width: 80px;
-                min-height: 36px;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                font-weight: bold;
-                border: 2px solid #e6c200;
-            }
-            QPushButton:hover {
-                background: #FFF5B7;
-                color: #164B74;
-                border: 2px solid #bfa600;
-            }
-            QPushButton:pressed {
-                background: #e6c200;
-                color: #164B74;
-                border: 2px solid #bfa600;
-            }
-        """
-        self.create_playlist_btn = QPushButton("צור רשימת השמעה")
-        self.create_playlist_btn.setStyleSheet(btn_style)
-        self.create_playlist_btn.clicked.connect(self.create_new_playlist)
-        sidebar_layout = self.song_list.parentWidget().layout()
-        sidebar_layout.addWidget(self.create_playlist_btn)
+        # Show the list of playlists in the sidebar (with their totals, already up to date)
+        self.open_playlist_name = None
+        self.update_view_stats()
+        self.sidebar_pages.setCurrentWidget(self.playlists_page)
+
+    def render_playlists_page(self):
+        self.playlists_list.clear()
+        self._playlist_items = {}
+        for name in self.playlists_manager.playlist_names():
+            item = QListWidgetItem(self.playlist_text(name))
+            item.setData(PLAYLIST_NAME_ROLE, name)
+            self.playlists_list.addItem(item)
+            self._playlist_items[name] = item
+
+    def track_stats(self, track):
+        # (duration ms or None, bytes) of a track from the metadata cache (no file access);
+        # a chapter counts for its share of the file
+        entry = self.metadata.get(self.library.path(track))
+        if not entry:
+            return None, 0
+        duration = entry.get("duration")
+        size = entry.get("size", 0)
+        chapter = self.library.segments.get(track)
+        if chapter is None:
+            return (None if duration is None else int(duration * 1000)), size
+        if chapter["end"] is None:
+            return None, 0
+        length = chapter["end"] - chapter["start"]
+        return length, int(size * length / (duration * 1000)) if duration else 0
+
+    def totals_text(self, view):
+        totals = self.aggregates.totals(view)
+        duration = format_duration(totals.duration_ms / 1000) + ("+" if totals.unknown else "")
+        text = f"{totals.tracks} שירים · {duration} · {format_size(totals.bytes)}"
+        if totals.favorites and view != FAVORITES_VIEW:
+            text += f" · ★ {totals.favorites}"
+        return text
+
+    def playlist_text(self, name):
+        return f"{name}\n{self.totals_text(playlist_view(name))}"
+
+    def _playlist_totals_views(self):
+        return {view for view in self.aggregates.views if view.startswith(playlist_view(""))}
+
+    def _count_playlist(self, name, songs):
+        self.aggregates.set_view(playlist_view(name), [song for song in songs if self.library.listed(song)])
+
+    def rebuild_playlist_totals(self):
+        # Recount every playlist (after entries started resolving to different tracks)
+        playlists = self.playlists_manager.all_songs()
+        for view in self._playlist_totals_views() - {playlist_view(name) for name in playlists}:
+            self.aggregates.drop_view(view)
+        for name, songs in playlists.items():
+            self._count_playlist(name, songs)
+
+    def sync_playlist_totals(self, names):
+        # Totals for created playlists, none for deleted ones
+        known = self._playlist_totals_views()
+        for name in names:
+            if playlist_view(name) not in known:
+                self._count_playlist(name, self.playlists_manager.get_songs(name))
+        for view in known - {playlist_view(name) for name in names}:
+            self.aggregates.drop_view(view)
+
+    def _schedule_view_stats(self):
+        if not self.view_stats_timer.isActive():
+            self.view_stats_timer.start()
+
+    def update_view_stats(self):
+        # Relabel only the views whose totals changed
+        self.view_stats_timer.stop()
+        for view in self.aggregates.take_changed():
+            if view == LIBRARY_VIEW:
+                self.song_list.setToolTip(self.totals_text(view))
+            elif view == FAVORITES_VIEW:
+                self.favorites_list.setToolTip(self.totals_text(view))
+            else:
+                item = self._playlist_items.get(view[len(playlist_view("")):])
+                if item is not None:
+                    item.setText(self.playlist_text(item.data(PLAYLIST_NAME_ROLE)))
 
     def show_playlist_context_menu(self, pos):
-        item = self.song_list.itemAt(pos)
+        item = self.playlists_list.itemAt(pos)
         if not item:
             return
         menu = QMenu(self)
         delete_action = menu.addAction("מחק רשימת השמעה")
-        action = menu.exec(self.song_list.mapToGlobal(pos))
+        action = menu.exec(self.playlists_list.mapToGlobal(pos))
         if action == delete_action:
-            playlist_name = item.text()
+            playlist_name = item.data(PLAYLIST_NAME_ROLE)
             reply = QMessageBox.question(self, "אישור מחיקה", f"האם למחוק את רשימת ההשמעה '{playlist_name}'?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
-                playlists = self.playlists_manager.load_playlists()
-                playlists = [pl for pl in playlists if pl["name"] != playlist_name]
-                self.playlists_manager.save_playlists(playlists)
-                self.toggle_playlists_view()
-                self.toggle_playlists_view()
+                self.playlists_manager.delete_playlist(playlist_name)
 
+    def selected_songs(self, song_list):
+        # Selected songs of a list, in list order
+        rows = sorted(index.row() for index in song_list.selectionModel().selectedRows())
+        songs = []
+        for row in rows:
+            idx = song_list.item(row).data(Qt.ItemDataRole.UserRole)
+            if idx is not None and idx < len(self.songs):
+                songs.append(self.songs[idx])
+        return songs
 
-    def show_remove_song_from_playlist_menu(self, pos):
-        item = self.song_list.itemAt(pos)
-        if not item:
+    def show_songs_context_menu(self, pos):
+        # Bulk actions on the selected songs; each one is a single write
+        song_list = self.current_song_list()
+        songs = self.selected_songs(song_list)
+        if not songs:
             return
-        from PyQt6.QtWidgets import QMenu
         menu = QMenu(self)
-        remove_action = menu.addAction("הסר שיר מהפלייליסט")
-        action = menu.exec(self.song_list.mapToGlobal(pos))
-        if action == remove_action:
-            song_name = item.text()
-            playlist_name = getattr(self, "current_playlist_name", None)
-            if not playlist_name:
-                QMessageBox.warning(self, "שגיאה", "לא ניתן לזהות את הפלייליסט.")
-                return
-            song_filename = None
-            for song in self.songs:
-                if os.path.splitext(song)[0] == song_name:
-                    song_filename = song
-                    break
-            if not song_filename:
-                QMessageBox.warning(self, "שגיאה", "לא נמצא קובץ שיר תואם.")
-                return
-            self.playlists_manager.remove_from_playlist(song_filename, playlist_name)
-            self.show_playlist_songs(QListWidgetItem(playlist_name))
+        add_action = menu.addAction(f"הוסף {len(songs)} שירים לרשימת השמעה")
+        create_action = menu.addAction("צור רשימת השמעה מהבחירה")
+        favorite_action = menu.addAction("הוסף למועדפים")
+        unfavorite_action = menu.addAction("הסר מהמועדפים")
+        remove_action = None
+        if song_list is self.playlist_songs_list:
+            remove_action = menu.addAction("הסר מהפלייליסט")
+        action = menu.exec(song_list.mapToGlobal(pos))
+        if action is None:
+            return
+        if action == add_action:
+            self.add_songs_to_playlist(songs)
+        elif action == create_action:
+            self.create_new_playlist(songs)
+        elif action == favorite_action:
+            self.favorites_manager.add_many(songs)
+        elif action == unfavorite_action:
+            self.favorites_manager.remove_many(songs)
+        elif action == remove_action:
+            self.playlists_manager.remove_many_from_playlist(songs, self.open_playlist_name)
 
-    def add_current_song_to_playlist(self):
-        playlists = [pl["name"] for pl in self.playlists_manager.load_playlists()]
+    def add_songs_to_playlist(self, songs):
+        playlists = self.playlists_manager.playlist_names()
         if not playlists:
             QMessageBox.information(self, "הוספה", "אין רשימות השמעה קיימות. צור אחת תחילה.")
             return
         playlist_name, ok = QInputDialog.getItem(self, "הוסף", "בחר רשימה:", playlists, editable=False)
         if ok and playlist_name:
-            song = self.songs[self.current_song_index]
-            self.playlists_manager.add_to_playlist(song, playlist_name)
+            self.playlists_manager.add_many_to_playlist(songs, playlist_name)
+
+    def add_current_song_to_playlist(self):
+        if self.songs:
+            self.add_songs_to_playlist([self.queue.current()])
 
     def remove_current_song_from_playlist(self):
-        song = self.songs[self.current_song_index]
-        playlists = [pl["name"] for pl in self.playlists_manager.load_playlists() if song in pl["songs"]]
+        song = self.queue.current()
+        playlists = self.playlists_manager.playlists_containing(song)
         if not playlists:
             QMessageBox.information(self, "הסר", "השיר לא נמצא באף רשימת השמעה.")
             return
@@ -682,9 +1312,9 @@ class MusicPlayer(QWidget):
         if ok and playlist_name:
             self.playlists_manager.remove_from_playlist(song, playlist_name)
 
-    def create_new_playlist(self):
-        # Create a new playlist with a unique name
-        playlists = [pl["name"] for pl in self.playlists_manager.load_playlists()]
+    def create_new_playlist(self, songs=()):
+        # Create a new playlist with a unique name (optionally filled with the given songs)
+        playlists = self.playlists_manager.playlist_names()
         name, ok = QInputDialog.getText(self, "צור רשימת השמעה", "שם רשימת ההשמעה:")
         if not ok or not name.strip():
             return
@@ -692,29 +1322,104 @@ class MusicPlayer(QWidget):
         if name in playlists:
             QMessageBox.warning(self, "שגיאה", f"רשימת השמעה בשם '{name}' כבר קיימת.")
             return
-        all_playlists = self.playlists_manager.load_playlists()
-        all_playlists.append({"name": name, "songs": []})
-        self.playlists_manager.save_playlists(all_playlists)
-        if hasattr(self, 'showing_playlists') and self.showing_playlists:
-            self.toggle_playlists_view()
-            self.toggle_playlists_view()
+        self.playlists_manager.create_playlist(name, songs)
 
     def save_playlist_order(self):
-        if not self.active_playlist_songs or not hasattr(self, "current_playlist_name"):
+        if self.open_playlist_name is None:
             return
         # סדר חדש לפי הרשימה ב־QListWidget
         new_order = []
-        for i in range(self.song_list.count()):
-            song_name = self.song_list.item(i).text()
-            for song in self.songs:
-                if os.path.splitext(song)[0] == song_name:
-                    new_order.append(song)
-                    break
-        # עדכן את הפלייליסט בקובץ
-        playlists = self.playlists_manager.load_playlists()
-        for pl in playlists:
-            if pl["name"] == self.current_playlist_name:
-                pl["songs"] = new_order
-                break
-        self.playlists_manager.save_playlists(playlists)
-        self.active_playlist_songs = new_order
\ No newline at end of file
+        for i in range(self.playlist_songs_list.count()):
+            idx = self.playlist_songs_list.item(i).data(Qt.ItemDataRole.UserRole)
+            if idx is not None and idx < len(self.songs):
+                new_order.append(self.songs[idx])
+        self._displayed_playlist_songs = new_order
+        # The items were moved by the drag itself
+        self._playlist_row_keys[:] = song_row_keys(new_order)
+        # עדכן את הפלייליסט בקובץ (entries of missing files stay at the end)
+        self.playlists_manager.set_songs(self.open_playlist_name, new_order)
+
+    def open_files(self, paths):
+        # Play files given on the command line or forwarded by a later launch
+        songs = []
+        for path in paths:
+            if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS):
+                song, added = self.library.add_file(path)
+                if added:
+                    self._append_songs([song])
+                songs.append(song)
+        if songs:
+            self.queue.play_library(self.library.position_of[songs[0]])
+            self.play_current()
+
+    def handle_args(self, args):
+        # Command line (or a forwarded launch): "--import PATH..." copies files / folders
+        # into the library, any other paths are played
+        if "--import" in args:
+            at = args.index("--import")
+            self.import_paths(args[at + 1:])
+            args = args[:at]
+        self.open_files(args)
+
+    def import_paths(self, paths):
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            return
+        self._pending_imports.extend(paths)
+        if not self.importer.running():
+            self._start_import()
+
+    def _start_import(self):
+        sources, self._pending_imports = self._pending_imports, []
+        # Sizes / ids known so far spare the importer a stat or a hash per library file
+        existing = []
+        for song in self.songs:
+            path = self.library.path(song)
+            entry = self.metadata.get(path)
+            existing.append((path, entry["size"] if entry else None, self.track_refs.id_of.get(song)))
+        self.import_bar.setRange(0, 0)
+        self.import_row.show()
+        self.importer.start(sources, existing)
+
+    def on_import_landed(self, root, relative_paths):
+        # Copied files join the library like scanner results
+        self._imported_files.update(relative_paths)
+        self.on_library_batch(root, relative_paths)
+
+    def on_import_progress(self, done, total):
+        self.import_bar.setRange(0, total)
+        self.import_bar.setValue(done)
+
+    def cancel_import(self):
+        self._pending_imports = []
+        self.importer.cancel()
+
+    def on_import_finished(self, summary):
+        if self._pending_imports:
+            self._start_import()
+            return
+        self.import_row.hide()
+        if summary["failed"]:
+            QMessageBox.warning(self, "ייבוא", f"{summary['failed']} קבצים לא יובאו.")
+
+    def handle_remote_args(self, args):
+        self.handle_args(args)
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+    def closeEvent(self, event):
+        self.importer.cancel()
+        self.scanner.shutdown()
+        self.album_art.shutdown()
+        if self.spectrum_analyzer is not None:
+            self.spectrum_analyzer.stop()
+        self.backend.release()
+        if self.auto_dj_engine is not None:
+            self.auto_dj_engine.shutdown()
+        self.metadata.shutdown()
+        self.track_ids.save()
+        self.prefetcher.shutdown()
+        self._finish_play_event(completed=False)
+        self.history.close()
+        super().closeEvent(event)
\ No newline at end of file
@@ -1,7 +1,15 @@
-from PyQt6.QtWidgets import QFrame, QVBoxLayout, QLabel, QLineEdit, QListWidget, QPushButton, QInputDialog, QMessageBox
+from PyQt6.QtWidgets import QFrame, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QPushButton, QInputDialog, QMessageBox, QMenu, QStackedWidget, QWidget, QComboBox, QProgressBar
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
 
+SORT_LABELS = {
+    "title": "לפי שם",
+    "artist": "לפי אמן ← אלבום",
+    "album": "לפי אלבום",
+    "added": "נוספו לאחרונה",
+    "duration": "לפי משך",
+}
+
 class PlaylistSongListWidget(QListWidget):
     def __init__(self, parent=None, main_player=None):
         super().__init__(parent)
@@ -9,65 +17,152 @@ class PlaylistSongListWidget(QListWidget):
 
     def dropEvent(self, event):
         super().dropEvent(event)
-        # שמור סדר חדש רק אם מוצג פלייליסט
-        if self.main_player and self.main_player.active_playlist_songs is not None:
+        # שמור סדר חדש של הפלייליסט המוצג
+        if self.main_player and self.main_player.open_playlist_name is not None:
             self.main_player.save_playlist_order()
 
+class LibrarySongListWidget(QListWidget):
+    # Files and folders dragged in from outside the app are imported into the library
+    def __init__(self, parent=None, main_player=None):
+        super().__init__(parent)
+        self.main_player = main_player
+        self.setAcceptDrops(True)
+
+    def _local_paths(self, event):
+        if not event.mimeData().hasUrls():
+            return []
+        return [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+
+    def dragEnterEvent(self, event):
+        if self._local_paths(event):
+            event.acceptProposedAction()
+        else:
+            super().dragEnterEvent(event)
+
+    def dragMoveEvent(self, event):
+        if self._local_paths(event):
+            event.acceptProposedAction()
+        else:
+            super().dragMoveEvent(event)
+
+    def dropEvent(self, event):
+        paths = self._local_paths(event)
+        if paths and self.main_player:
+            event.acceptProposedAction()
+            self.main_player.import_paths(paths)
+        else:
+            super().dropEvent(event)
+
+def sidebar_button(text, slot):
+    # Look comes from the app stylesheet (widgets/theme.py) via the role property
+    btn = QPushButton(text)
+    btn.setProperty("role", "sidebar")
+    btn.clicked.connect(slot)
+    return btn
+
+def _song_list(list_widget=None, player=None):
+    song_list = list_widget or QListWidget()
+    if player is not None:
+        # Song lists allow extended selection with bulk actions on right click
+        song_list.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        song_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        song_list.customContextMenuRequested.connect(player.show_songs_context_menu)
+    song_list.setFont(QFont("Montserrat", 13, QFont.Weight.DemiBold))
+    song_list.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+    song_list.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+    return song_list
+
+def _page(*widgets):
+    page = QWidget()
+    page.setObjectName("SidebarPage")
+    layout = QVBoxLayout(page)
+    layout.setContentsMargins(0, 0, 0, 0)
+    layout.setSpacing(12)
+    for widget, stretch in widgets:
+        layout.addWidget(widget, stretch)
+    return page
+
 def create_sidebar(player):
     sidebar = QFrame()
+    sidebar.setObjectName("Sidebar")
     sidebar.setMinimumWidth(180)
     sidebar.setMaximumWidth(500)
-    sidebar.setStyleSheet("background: #164B74; border-top-left-radius: 16px; border-bottom-left-radius: 16px;")
     sidebar_layout = QVBoxLayout(sidebar)
     sidebar_layout.setContentsMargins(18, 18, 18, 18)
     sidebar_layout.setSpacing(12)
     sidebar_label = QLabel("שירים")
     sidebar_label.setFont(QFont("Montserrat", 16, QFont.Weight.Bold))
-    sidebar_label.setStyleSheet("color: #FFD700; letter-spacing: 1px;")
+    sidebar_label.setObjectName("SidebarTitle")
     sidebar_layout.addWidget(sidebar_label)
     player.search_bar = QLineEdit()
     player.search_bar.setPlaceholderText("מה אתם רוצים לנגן?")
     player.search_bar.textChanged.connect(player.filter_songs)
     sidebar_layout.addWidget(player.search_bar)
-    player.song_list = PlaylistSongListWidget(main_player=player)
-    player.song_list.setFont(QFont("Montserrat", 13, QFont.Weight.DemiBold))
-    player.song_list.setStyleSheet("""
-        QListWidget { padding-right: 0px; }
-        QListWidget::item { padding: 10px 8px; }
-    """)
-    player.song_list.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-    player.song_list.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-    player.song_list.setDragDropMode(player.song_list.DragDropMode.InternalMove)
-    player.song_list.setDefaultDropAction(Qt.DropAction.MoveAction)
+
+    # Every view is a persistent page: switching only changes the current index,
+    # and each list keeps its own items and scroll position.
+    player.sidebar_pages = QStackedWidget()
+    player.sidebar_pages.setObjectName("SidebarPages")
+
+    player.sort_combo = QComboBox()
+    for order, label in SORT_LABELS.items():
+        player.sort_combo.addItem(label, order)
+    player.sort_combo.setCurrentIndex(player.sort_combo.findData(player.sort_order))
+    player.sort_combo.currentIndexChanged.connect(player.change_sort_order)
+    player.song_list = _song_list(LibrarySongListWidget(main_player=player), player=player)
     player.song_list.itemDoubleClicked.connect(player.song_double_clicked)
-    sidebar_layout.addWidget(player.song_list, 1)
-    # עיצוב אחיד לכפתורים
-    btn_style = """
-        QPushButton {
-            background: #FFD700;
-            color: #00BFFF;
-            border-radius: 16px;
-            font-size: 15px;
-            min-width: 80px;
-            min-height: 36px;
-            font-family: 'Segoe UI', Arial, sans-serif;
-            font-weight: bold;
-            border: 2px solid #e6c200;
-        }
-        QPushButton:hover {
-            background: #FFF5B7;
-            color: #164B74;
-            border: 2px solid #bfa600;
-        }
-        QPushButton:pressed {
-            background: #e6c200;
-            color: #164B74;
-            border: 2px solid #bfa600;
-        }
-    """
-    player.show_playlists_btn = QPushButton("הצג רשימות השמעה")
-    player.show_playlists_btn.setStyleSheet(btn_style)
+    # Import progress (shown while dropped / command-line files are being copied)
+    player.import_row = QWidget()
+    import_layout = QHBoxLayout(player.import_row)
+    import_layout.setContentsMargins(0, 0, 0, 0)
+    player.import_bar = QProgressBar()
+    player.import_bar.setFormat("מייבא %v/%m")
+    import_layout.addWidget(player.import_bar, 1)
+    player.import_cancel_btn = sidebar_button("בטל", player.cancel_import)
+    import_layout.addWidget(player.import_cancel_btn)
+    player.import_row.hide()
+    player.songs_page = _page((player.sort_combo, 0), (player.song_list, 1), (player.import_row, 0))
+
+    player.favorites_list = _song_list(player=player)
+    player.favorites_list.itemDoubleClicked.connect(player.song_double_clicked)
+    player.favorites_page = _page((player.favorites_list, 1))
+
+    player.history_list = _song_list(player=player)
+    player.history_list.itemDoubleClicked.connect(player.song_double_clicked)
+    player.history_page = _page((player.history_list, 1))
+
+    player.playlists_list = _song_list()
+    player.playlists_list.itemClicked.connect(player.show_playlist_songs)
+    player.playlists_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+    player.playlists_list.customContextMenuRequested.connect(player.show_playlist_context_menu)
+    player.create_playlist_btn = sidebar_button("צור רשימת השמעה", lambda: player.create_new_playlist())
+    player.playlists_page = _page((player.playlists_list, 1), (player.create_playlist_btn, 0))
+
+    player.playlist_songs_list = _song_list(PlaylistSongListWidget(main_player=player), player=player)
+    player.playlist_songs_list.setDragDropMode(QListWidget.DragDropMode.InternalMove)
+    player.playlist_songs_list.setDefaultDropAction(Qt.DropAction.MoveAction)
+    player.playlist_songs_list.itemDoubleClicked.connect(player.playlist_song_double_clicked)
+    player.back_to_playlists_btn = QPushButton("חזור לרשימות ההשמעה")
+    player.back_to_playlists_btn.setProperty("role", "back")
+    player.back_to_playlists_btn.clicked.connect(player.show_playlists_list)
+    player.playlist_page = _page((player.playlist_songs_list, 1), (player.back_to_playlists_btn, 0))
+
+    for page in (player.songs_page, player.favorites_page, player.history_page, player.playlists_page, player.playlist_page):
+        player.sidebar_pages.addWidget(page)
+    sidebar_layout.addWidget(player.sidebar_pages, 1)
+
+    player.show_playlists_btn = sidebar_button("הצג רשימות השמעה", player.toggle_playlists_view)
     sidebar_layout.addWidget(player.show_playlists_btn)
-    player.show_playlists_btn.clicked.connect(player.toggle_playlists_view)
+
+    player.history_btn = QPushButton("היסטוריה")
+    player.history_btn.setProperty("role", "sidebar")
+    history_menu = QMenu(player.history_btn)
+    history_menu.addAction("הכי מושמעים", lambda: player.show_history("most"))
+    history_menu.addAction("הושמעו לאחרונה", lambda: player.show_history("recent"))
+    history_menu.addAction("לא הושמעו", lambda: player.show_history("never"))
+    history_menu.addSeparator()
+    history_menu.addAction("כל השירים", player.show_all_songs)
+    player.history_btn.setMenu(history_menu)
+    sidebar_layout.addWidget(player.history_btn)
 
     return sidebar
\ No newline at end of file
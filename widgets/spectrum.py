@@ -0,0 +1,51 @@
+from PyQt6.QtCore import QRectF, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QWidget
+
+SPECTRUM_HEIGHT = 64
+BAR_COLOR = QColor("#FFD700")
+PEAK_COLOR = QColor("#00BFFF")
+
+
+class SpectrumView(QWidget):
+    # Paint-only: band levels (0..1) arrive already reduced from the analyzer thread
+    # through levels_received (queued to the UI thread); nothing is computed here.
+    # visibility_changed(bool) reports it appearing / disappearing (also when the
+    # window is minimized), so the audio tap only runs while there is something to see.
+    levels_received = pyqtSignal(list)
+    visibility_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedHeight(SPECTRUM_HEIGHT)
+        self.levels = []
+        self.levels_received.connect(self.set_levels)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.visibility_changed.emit(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.levels = []
+        self.visibility_changed.emit(False)
+
+    def set_levels(self, levels):
+        self.levels = levels
+        self.update()
+
+    def paintEvent(self, event):
+        if not self.levels:
+            return
+        painter = QPainter(self)
+        count = len(self.levels)
+        slot = self.width() / count
+        gap = min(3.0, slot * 0.25)
+        height = self.height()
+        for i, level in enumerate(self.levels):
+            bar = level * height
+            if bar < 1:
+                continue
+            color = PEAK_COLOR if level > 0.9 else BAR_COLOR
+            painter.fillRect(QRectF(i * slot + gap / 2, height - bar, slot - gap, bar), color)
+        painter.end()
@@ -0,0 +1,67 @@
+from PyQt6.QtWidgets import QApplication
+
+# The one stylesheet of the app. Widgets pick their look through object names and
+# dynamic properties ("role", "size", "active") instead of carrying their own sheets,
+# so a state change is a property flip plus a re-polish of that single widget.
+APP_STYLESHEET = """
+    QWidget { background: #0A2239; color: #FFD700; }
+    QLineEdit { background: #164B74; color: #FFD700; border-radius: 8px; padding: 6px; font-size: 16px; }
+    QComboBox { background: #0A2239; color: #FFD700; border-radius: 8px; padding: 4px 8px; font-size: 14px; }
+    QComboBox QAbstractItemView { background: #164B74; color: #FFD700; selection-background-color: #FFD700; selection-color: #00BFFF; }
+    QLabel#NowPlaying { color: #00BFFF; font-size: 22px; font-weight: bold; }
+    QLabel#SidebarTitle { background: #164B74; color: #FFD700; letter-spacing: 1px; }
+    QLabel#TimeLabel { color: #FFD700; min-width: 48px; }
+    QLabel#TimeLabel[precise="true"] { min-width: 72px; }
+    QProgressBar { background: #0A2239; color: #FFD700; border-radius: 8px; text-align: center; min-height: 24px; }
+    QProgressBar::chunk { background: #1565C0; border-radius: 8px; }
+    QListWidget { background: #164B74; color: #FFD700; border-radius: 12px; padding-right: 0px; }
+    QListWidget::item { padding: 10px 8px; }
+    QListWidget::item:selected { background: #FFD700; color: #00BFFF; font-weight: bold; }
+    QFrame#Sidebar { background: #164B74; border-top-left-radius: 16px; border-bottom-left-radius: 16px; }
+    QStackedWidget#SidebarPages, QWidget#SidebarPage { background: #164B74; }
+    QFrame#Content { background: #0A2239; border-top-right-radius: 16px; border-bottom-right-radius: 16px; }
+
+    QSlider::groove:horizontal { border: none; height: 8px; background: #1565C0; border-radius: 4px; }
+    QSlider::sub-page:horizontal { background: #FFF; border-radius: 4px; }
+    QSlider::add-page:horizontal { background: #1565C0; border-radius: 4px; }
+    QSlider::handle:horizontal {
+        background: #FFD700; border: 2px solid #FFF; width: 16px; height: 16px; margin: -4px 0; border-radius: 8px;
+    }
+
+    QPushButton { border: none; }
+    QPushButton[role="control"], QPushButton[role="sidebar"] {
+        background: #FFD700;
+        color: #00BFFF;
+        font-family: 'Segoe UI', Arial, sans-serif;
+        font-weight: bold;
+        border: 2px solid #e6c200;
+    }
+    QPushButton[role="control"] { border-radius: 24px; font-size: 22px; min-width: 48px; min-height: 48px; }
+    QPushButton[role="control"][size="large"] { font-size: 28px; min-width: 56px; min-height: 56px; }
+    QPushButton[role="control"][size="small"] { font-size: 18px; min-width: 40px; min-height: 40px; }
+    QPushButton[role="control"][size="text"] { font-size: 14px; min-width: 80px; min-height: 40px; }
+    QPushButton[role="sidebar"] { border-radius: 16px; font-size: 15px; min-width: 80px; min-height: 36px; }
+    QPushButton[role="control"]:hover, QPushButton[role="sidebar"]:hover {
+        background: #FFF5B7; color: #164B74; border: 2px solid #bfa600;
+    }
+    QPushButton[role="control"]:pressed, QPushButton[role="sidebar"]:pressed {
+        background: #e6c200; color: #164B74; border: 2px solid #bfa600;
+    }
+    QPushButton[role="control"][active="true"] { background: #00BFFF; color: #FFD700; border: 2px solid #00BFFF; }
+    QPushButton[role="back"] {
+        background: #FFD700; color: #164B74; font-weight: bold; border-radius: 8px; padding: 8px; margin-top: 12px;
+    }
+"""
+
+
+def apply_theme(app=None):
+    (app or QApplication.instance()).setStyleSheet(APP_STYLESHEET)
+
+
+def set_active(widget, active):
+    # Only this widget is re-polished; nothing is re-parsed
+    if widget.property("active") == active:
+        return
+    widget.setProperty("active", active)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)